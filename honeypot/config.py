@@ -3,6 +3,8 @@ Configuration file for the honeypot system.
 Centralized configuration for all services and modules.
 """
 
+import os
+
 # Network Configuration
 HTTP_HOST = '0.0.0.0'
 HTTP_PORT = 8080
@@ -16,15 +18,57 @@ SSH_HOST_KEY_FILE = '/app/ssh_host_key'
 
 # Service Configuration
 SOCKET_TIMEOUT = 30
-SOCKET_BACKLOG = 5
 BUFFER_SIZE = 4096
 
+# HTTP Request Limits (services/http_reader.py)
+HTTP_MAX_HEADER_SIZE = 16 * 1024   # Request line + headers; beyond that: 431
+HTTP_MAX_HEADERS = 100             # Max header lines per request
+HTTP_MAX_BODY_SIZE = int(os.environ.get('HONEYPOT_HTTP_MAX_BODY', 1024 * 1024))  # Body bytes kept in memory (rest is read and discarded)
+HTTP_HEADER_TIMEOUT = 10           # seconds to receive all headers (Slowloris)
+HTTP_BODY_TIMEOUT = 60             # seconds to receive the whole body
+HTTP_KEEPALIVE_TIMEOUT = 5         # idle seconds between requests on a persistent connection (Apache default)
+HTTP_KEEPALIVE_MAX_REQUESTS = 100  # requests per connection before closing it (Apache MaxKeepAliveRequests)
+
 # SSH Configuration
 SSH_KEY_SIZE = 2048
 SSH_AUTH_ATTEMPTS_THRESHOLD = 2  # Accept after N attempts
 
 # Logging Configuration
 LOG_DATA_MAX_LENGTH = 500  # Max chars to log from data payload
+LOG_BODY_MAX_LENGTH = 8192  # Max chars to log from an HTTP request body
+
+# Detection rules (detection/rules.py): literal / regex rules per detector,
+# optionally scoped to the request path, headers or body. Reloaded with the
+# endpoint profiles (SIGHUP or POST /api/reload); per-rule hit counts and match
+# time are reported in /api/stats. Without the file the built-in lists are used.
+DETECTION_RULES_FILE = os.environ.get(
+    'HONEYPOT_RULES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json'))
+
+# Payload normalization (detection/normalizer.py): URL / double-URL, HTML
+# entities, \uXXXX escapes and base64 blobs are decoded before detection, up to
+# NORMALIZE_MAX_DEPTH layers and NORMALIZE_MAX_CHARS decoded characters per
+# request part (the rest is matched raw). Caps the CPU a hostile payload can cost.
+NORMALIZE_MAX_DEPTH = int(os.environ.get('HONEYPOT_NORMALIZE_DEPTH', 3))
+NORMALIZE_MAX_CHARS = int(os.environ.get('HONEYPOT_NORMALIZE_MAX_CHARS', 64 * 1024))
+NORMALIZE_BASE64_MIN_LENGTH = 12   # Shorter base64 runs (under 9 bytes of text) are left alone
+
+# Behaviour tracker (detection/tracker.py): per source IP, across connections
+# and services, auth attempts, distinct paths and 404 answers over the last
+# TRACKER_WINDOW seconds. Raises 'brute_force' and 'directory_scan' attacks.
+# At most TRACKER_MAX_IPS addresses are kept (least recently seen evicted).
+TRACKER_WINDOW = int(os.environ.get('HONEYPOT_TRACKER_WINDOW', 300))   # seconds
+TRACKER_BUCKETS = 10               # Window resolution: TRACKER_WINDOW / 10 seconds
+TRACKER_MAX_IPS = int(os.environ.get('HONEYPOT_TRACKER_MAX_IPS', 50000))
+TRACKER_MAX_PATHS = 256            # Paths remembered per IP (older ones count as new again)
+BRUTE_FORCE_THRESHOLD = int(os.environ.get('HONEYPOT_BRUTE_FORCE_THRESHOLD', 10))  # auth attempts per window
+DIRECTORY_SCAN_PATHS = int(os.environ.get('HONEYPOT_DIRECTORY_SCAN_PATHS', 30))    # distinct paths per window...
+DIRECTORY_SCAN_404_RATIO = 0.5     # ...with at least this share of 404 answers
+
+# Client fingerprints (detection/fingerprint.py): JA4H-like hash of header order
+# and casing, HTTP version and request-line quirks, logged with every HTTP
+# request. Known tools are a table lookup; each distinct request shape is
+# hashed once and kept in an LRU of FINGERPRINT_CACHE_SIZE entries.
+FINGERPRINT_CACHE_SIZE = int(os.environ.get('HONEYPOT_FINGERPRINT_CACHE', 4096))
 
 # Geolocation Configuration
 GEOLOCATION_TIMEOUT = 2  # seconds
@@ -33,5 +77,110 @@ GEOLOCATION_CACHE_ENABLED = True
 # Honeypot Profile Configuration
 # Options: 'all' (default), 'generic', 'wordpress', 'api', 'database', 'iot', 'devops'
 # Can be overridden by env var: HONEYPOT_PROFILE=iot python main.py
-import os
 HONEYPOT_PROFILE = os.environ.get('HONEYPOT_PROFILE', 'all').lower()
+
+# Dynamic endpoints (profile functions such as get_login_page) are rendered on
+# first hit and cached as bytes for this many seconds (0 = render every hit).
+# A page can override it with @render_cache(ttl=...)
+DYNAMIC_RESPONSE_TTL = int(os.environ.get('HONEYPOT_DYNAMIC_TTL', 60))
+
+# Response compression: gzip/deflate variants are built once, with the route
+# table, for text bodies of at least HTTP_COMPRESSION_MIN_SIZE bytes and picked
+# per request from Accept-Encoding (no compression on the request path)
+HTTP_COMPRESSION = os.environ.get('HONEYPOT_HTTP_COMPRESSION', '1') == '1'
+HTTP_COMPRESSION_MIN_SIZE = 1024
+
+# Lure files (responses/profiles/lures.py): fake multi-hundred-MB backups and
+# firmware generated chunk by chunk and sent at a limited rate per connection.
+# A download is cut after LURE_MAX_SECONDS so it cannot hold a worker forever.
+LURE_CHUNK_SIZE = 64 * 1024
+LURE_RATE = int(os.environ.get('HONEYPOT_LURE_RATE', 256 * 1024))  # bytes/second per connection (0 = unpaced)
+LURE_MAX_SECONDS = int(os.environ.get('HONEYPOT_LURE_MAX_SECONDS', 900))
+# Paced downloads at once, per service and per IP. In thread mode each one holds
+# a worker for up to LURE_MAX_SECONDS; over the cap the client only gets the
+# first chunk and the connection is closed (a download that broke off).
+LURE_MAX_STREAMS = int(os.environ.get('HONEYPOT_LURE_MAX_STREAMS', 8))
+LURE_MAX_STREAMS_PER_IP = int(os.environ.get('HONEYPOT_LURE_MAX_STREAMS_PER_IP', 2))
+
+# Upload capture (core/upload_store.py): request bodies bigger than
+# UPLOAD_CAPTURE_THRESHOLD are hashed (SHA-256) while they arrive and stored once
+# per hash in UPLOAD_DIR; the log record only keeps the hash and the size.
+# Least recently seen bodies are evicted beyond UPLOAD_QUOTA bytes.
+UPLOAD_CAPTURE_ENABLED = os.environ.get('HONEYPOT_UPLOAD_CAPTURE', '1') == '1'
+UPLOAD_CAPTURE_THRESHOLD = LOG_BODY_MAX_LENGTH   # What the log can't hold goes to the store
+UPLOAD_DIR = os.environ.get('HONEYPOT_UPLOAD_DIR', os.path.join(os.environ.get('LOG_DIR', '/logs'), 'uploads'))
+UPLOAD_MAX_FILE_SIZE = int(os.environ.get('HONEYPOT_UPLOAD_MAX_FILE', 64 * 1024 * 1024))  # larger: hash only
+UPLOAD_QUOTA = int(os.environ.get('HONEYPOT_UPLOAD_QUOTA', 1024 * 1024 * 1024))
+
+# HTTPS (services/tls.py): a second HTTPService speaking TLS, e.g. for the Tapo
+# persona whose real API only answers on 443. The self-signed certificate of
+# the active profile is generated on first boot and cached in TLS_CERT_DIR.
+HTTPS_ENABLED = os.environ.get('HONEYPOT_HTTPS', '0') == '1'
+HTTPS_PORT = int(os.environ.get('HONEYPOT_HTTPS_PORT', 8443))
+TLS_CERT_DIR = os.environ.get('HONEYPOT_TLS_DIR', '/app/tls')
+TLS_HANDSHAKE_TIMEOUT = 10   # seconds for the client to finish the handshake
+TLS_SESSION_TICKETS = 2      # TLS 1.3 tickets sent per full handshake (resumption)
+# Certificate subject per profile: (Common Name, Organization or None)
+TLS_CERT_SUBJECTS = {
+    'default': ('ubuntu', None),              # Apache's ssl-cert "snakeoil" uses the hostname
+    'iot': ('C200', 'TP-LINK'),
+    'api': ('api.internal', None),
+    'database': ('db01.internal', None),
+    'devops': ('ci.internal', None),
+}
+
+# Load balancers (services/proxy_protocol.py)
+# TRUSTED_PROXIES: comma-separated CIDRs of our balancers / reverse proxies.
+# Connections from them must start with a PROXY protocol v1/v2 header when
+# PROXY_PROTOCOL is on, and their X-Forwarded-For is honoured by HTTPService.
+# They are also exempt from MAX_CONNECTIONS_PER_IP (every client shares their IP).
+TRUSTED_PROXIES = os.environ.get('HONEYPOT_TRUSTED_PROXIES', '')
+PROXY_PROTOCOL = os.environ.get('HONEYPOT_PROXY_PROTOCOL', '0') == '1'
+PROXY_PROTOCOL_TIMEOUT = 5   # seconds for the balancer to send the header
+
+# Port multiplexer (services/mux.py): one accept loop over many odd ports; each
+# connection is sniffed (first bytes, MSG_PEEK) and handed to the HTTP, HTTPS,
+# SSH or RTSP handler. A client silent for MUX_BANNER_TIMEOUT is treated as SSH
+# (SSH clients wait for the server banner).
+MUX_ENABLED = os.environ.get('HONEYPOT_MUX', '0') == '1'
+MUX_PORTS = os.environ.get('HONEYPOT_MUX_PORTS', '81,2323,3000,5555,7547,8000-8010,8081,8888,9000,9090')
+MUX_BANNER_TIMEOUT = 3       # seconds to wait for the client's first bytes
+MUX_PEEK_BYTES = 512         # bytes peeked to classify the protocol
+
+# Concurrency Model
+# 'asyncio' (default): one event loop per service, one coroutine per connection.
+# 'thread': classic model, one OS thread per connection (fallback).
+# SSH always runs on threads (Paramiko's Transport is thread-based).
+SERVICE_MODE = os.environ.get('HONEYPOT_SERVICE_MODE', 'asyncio').lower()
+ASYNC_BLOCKING_WORKERS = 16  # Bounded pool for blocking work (logging, geolocation) in asyncio mode
+
+# Admission Control (applied per service, in both concurrency models)
+SOCKET_BACKLOG = int(os.environ.get('HONEYPOT_SOCKET_BACKLOG', 1024))  # Kernel accept queue (listen backlog)
+MAX_WORKERS = int(os.environ.get('HONEYPOT_MAX_WORKERS', 64))          # Max concurrent handlers per service
+MAX_QUEUED = int(os.environ.get('HONEYPOT_MAX_QUEUED', 256))           # Connections waiting for a worker ('queue' policy)
+MAX_CONNECTIONS_PER_IP = int(os.environ.get('HONEYPOT_MAX_PER_IP', 16))
+# What to do when the service is full: 'queue' (wait, then shed), 'shed' (RST) or 'tarpit' (hold silently)
+OVERLOAD_POLICY = os.environ.get('HONEYPOT_OVERLOAD_POLICY', 'queue').lower()
+TARPIT_SECONDS = 60          # How long a tarpitted connection is held before RST
+TARPIT_MAX = 4096            # Max tarpitted connections at once (beyond that: shed)
+
+# Multi-process Mode (python main.py --workers N [--isolate])
+# Each worker process binds its services with SO_REUSEPORT (Linux/BSD) and the
+# kernel balances connections between them. Set automatically in worker processes.
+WORKERS = int(os.environ.get('HONEYPOT_WORKERS', 1))
+SOCKET_REUSEPORT = False
+# --isolate: one child process per service (HTTP, SSH, RTSP, Management API), so a
+# crash or a CPU-heavy wave in one service never touches the others.
+ISOLATE_SERVICES = os.environ.get('HONEYPOT_ISOLATE', '0') == '1'
+HEALTH_PING_INTERVAL = 2     # seconds between health pings from each child
+HEALTH_TIMEOUT = 10          # no ping (or no running service) for this long -> restart
+RESTART_BACKOFF_BASE = 1     # first restart delay (seconds), doubled on each crash...
+RESTART_BACKOFF_MAX = 60     # ...up to this cap
+RESTART_STABLE_SECONDS = 30  # a child that lived this long resets its backoff
+
+# RTSP Camera Service (port 554 usually needs root)
+RTSP_ENABLED = os.environ.get('HONEYPOT_RTSP', '0') == '1'
+RTSP_PORT = int(os.environ.get('HONEYPOT_RTSP_PORT', 554))
+
+# Management API (localhost only)
+MANAGEMENT_PORT = 5000
@@ -1,9 +1,10 @@
 """
 Core modules for the honeypot system.
-Includes logging and geolocation services.
+Includes logging, geolocation and the shared clock.
 """
 
 from .logger import HoneypotLogger
 from .geolocation import GeoLocationService
+from .clock import Clock
 
-__all__ = ['HoneypotLogger', 'GeoLocationService']
+__all__ = ['HoneypotLogger', 'GeoLocationService', 'Clock']
@@ -0,0 +1,64 @@
+"""
+Shared wall clock for the honeypot.
+Formats the HTTP Date header, the ISO-8601 log timestamp and the log
+partition date at most once per second; every caller reads the cached strings.
+"""
+
+import datetime
+import time
+from typing import Tuple
+
+
+class Clock:
+    """Per-second cache of the formatted timestamps used on the hot path"""
+
+    # (epoch second, HTTP-date, Date header line, ISO-8601 local time, YYYY-MM-DD)
+    # One tuple swapped as a whole: readers in other threads never see a
+    # half-refreshed set of strings.
+    _snapshot: Tuple = (None, '', b'', '', '')
+
+    @classmethod
+    def _current(cls) -> Tuple:
+        """Return the snapshot for the current second, refreshing it if needed"""
+        now = time.time()
+        snapshot = cls._snapshot
+        if snapshot[0] == int(now):
+            return snapshot
+        return cls._refresh(now)
+
+    @classmethod
+    def _refresh(cls, now: float) -> Tuple:
+        """Format every string for the second containing `now`"""
+        second = int(now)
+        utc = datetime.datetime.fromtimestamp(second, datetime.timezone.utc)
+        local = datetime.datetime.fromtimestamp(second)
+        http_date = utc.strftime('%a, %d %b %Y %H:%M:%S GMT')
+        snapshot = (
+            second,
+            http_date,
+            f"Date: {http_date}\r\n".encode('latin-1'),
+            local.isoformat(),
+            local.strftime('%Y-%m-%d'),
+        )
+        cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def http_date(cls) -> str:
+        """RFC 7231 date for HTTP headers, e.g. 'Sat, 14 Dec 2024 02:00:00 GMT'"""
+        return cls._current()[1]
+
+    @classmethod
+    def date_header(cls) -> bytes:
+        """Ready-to-send b'Date: ...\\r\\n' header line"""
+        return cls._current()[2]
+
+    @classmethod
+    def iso(cls) -> str:
+        """Local ISO-8601 timestamp (second precision) for log records"""
+        return cls._current()[3]
+
+    @classmethod
+    def log_date(cls) -> str:
+        """Local 'YYYY-MM-DD' used to partition (rotate) the log files"""
+        return cls._current()[4]
@@ -4,12 +4,13 @@ Provides JSON-formatted logging with geolocation.
 """
 
 import logging
+import logging.handlers
 import json
-import datetime
 import os
 from typing import Dict, Any, Optional
 
 from .geolocation import GeoLocationService
+from .clock import Clock
 
 
 # Get instance metadata (for GCP deployment tracking)
@@ -52,6 +53,7 @@ class HoneypotLogger:
     """Enhanced logger with JSON formatting, geolocation, and automatic rotation"""
     
     _current_date = None
+    _queue_mode = False  # True in worker processes: records go to the supervisor's queue
     _logger = logging.getLogger('honeypot')
     _logger.setLevel(logging.INFO)
     
@@ -65,7 +67,9 @@ class HoneypotLogger:
     @classmethod
     def _check_rotation(cls):
         """Check if date has changed and rotate log file if needed"""
-        now_date = datetime.datetime.now().strftime('%Y-%m-%d')
+        if cls._queue_mode:
+            return  # The supervisor owns the file (and its rotation)
+        now_date = Clock.log_date()
         
         if cls._current_date != now_date:
             # Rotate
@@ -85,6 +89,40 @@ class HoneypotLogger:
             cls._current_date = now_date
             print(f"[*] Log rotated to: {new_log_file}")
 
+    # --- MULTI-PROCESS LOGGING ---
+    # Several worker processes writing the same file would interleave or lose
+    # lines on rotation. Workers send records through a multiprocessing queue
+    # and a single listener in the supervisor writes (and rotates) the file.
+
+    @classmethod
+    def attach_to_queue(cls, log_queue) -> None:
+        """
+        Route this process' log records to a supervisor queue.
+
+        Args:
+            log_queue: multiprocessing.Queue shared with the supervisor
+        """
+        for handler in cls._logger.handlers[:]:
+            cls._logger.removeHandler(handler)
+            handler.close()
+        cls._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        cls._queue_mode = True
+
+    @classmethod
+    def start_queue_listener(cls, log_queue) -> logging.handlers.QueueListener:
+        """
+        Start the single writer for records coming from worker processes.
+
+        Args:
+            log_queue: multiprocessing.Queue shared with the workers
+
+        Returns:
+            Running QueueListener (call .stop() on shutdown to flush)
+        """
+        listener = logging.handlers.QueueListener(log_queue, _RotatingFileSink())
+        listener.start()
+        return listener
+
     # --- SAMAEL INTEGRATION ---
     _samael_client = None
 
@@ -126,7 +164,7 @@ class HoneypotLogger:
                     "source": "alucard",
                     "event_type": event_type,
                     "data": data,
-                    "timestamp": datetime.datetime.now().isoformat()
+                    "timestamp": Clock.iso()
                 }
                 client.send_telemetry(payload)
             except Exception as e:
@@ -155,7 +193,7 @@ class HoneypotLogger:
         HoneypotLogger._check_rotation()
 
         log_entry = {
-            'timestamp': datetime.datetime.now().isoformat(),
+            'timestamp': Clock.iso(),
             'instance': INSTANCE_METADATA,  # Add instance metadata
             'service': service,
             'source_ip': ip,
@@ -221,3 +259,12 @@ class HoneypotLogger:
             "details": details,
             "geolocation": GeoLocationService.get_location(ip)
         })
+
+
+class _RotatingFileSink(logging.Handler):
+    """Listener-side handler: rotate by date, then write through HoneypotLogger's handlers"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        HoneypotLogger._check_rotation()
+        for handler in HoneypotLogger._logger.handlers:
+            handler.handle(record)
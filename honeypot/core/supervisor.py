@@ -0,0 +1,284 @@
+"""
+Process supervisor for the honeypot.
+Runs services in child processes, watches their health pings, restarts the
+ones that crash or hang (with exponential backoff), forwards reload requests
+(SIGHUP) and shuts them all down through their control pipes.
+"""
+
+import multiprocessing
+import multiprocessing.managers
+import signal
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import config
+from .logger import HoneypotLogger
+
+
+class WorkerSpec:
+    """Description of one supervised child process"""
+
+    def __init__(self, name: str, target: Callable, args: Tuple = ()):
+        """
+        Args:
+            name: Unique process name (used in console output and /api/stats)
+            target: Top-level (picklable) function; target(*args) must start its
+                    services without blocking and return them as a list
+            args: Positional arguments for target
+        """
+        self.name = name
+        self.target = target
+        self.args = args
+
+
+def _bootstrap(target: Callable, args: Tuple, log_queue, conn) -> None:
+    """Child-process entry point: logging, services, health pings, reloads, shutdown"""
+    # Ctrl+C and SIGHUP reach the whole process group; only the supervisor
+    # reacts to them and tells the children what to do through their pipe.
+    _ignore_sigint()
+    HoneypotLogger.attach_to_queue(log_queue)
+    config.SOCKET_REUSEPORT = True
+
+    services = target(*args)
+    try:
+        # A 'reload' message reloads the services in place; anything else on the
+        # pipe (a stop message or EOF because the supervisor died) ends the child.
+        # A shared multiprocessing.Event is not used on purpose: a child killed
+        # while waiting on it wedges Event.set().
+        while True:
+            if not conn.poll(config.HEALTH_PING_INTERVAL):
+                conn.send(_health_report(services))
+            elif conn.recv() == 'reload':
+                _reload_services(services)
+            else:
+                break
+    except (BrokenPipeError, EOFError, OSError):
+        pass  # Supervisor is gone: shut down as well
+    finally:
+        for service in services:
+            service.stop()
+
+
+def _ignore_sigint() -> None:
+    """Initializer for helper processes: only the supervisor handles Ctrl+C and SIGHUP"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, 'SIGHUP'):  # Not on Windows
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+
+def _reload_services(services: list) -> None:
+    """Reload every service that supports it (e.g. HTTP endpoint tables)"""
+    for service in services:
+        if not hasattr(service, 'reload'):
+            continue
+        try:
+            routes = service.reload()
+            print(f"[*] {getattr(service, 'service_name', service)}: recargado {routes}")
+        except Exception as e:
+            # Keep serving with what was loaded before
+            print(f"[!] {getattr(service, 'service_name', service)}: recarga fallida: {e}")
+
+
+def _health_report(services: list) -> dict:
+    """Payload of one health ping: liveness plus the services' admission counters"""
+    return {
+        'ts': time.time(),
+        'healthy': all(getattr(s, 'running', True) for s in services),
+        'stats': [s.get_stats() for s in services if hasattr(s, 'get_stats')],
+    }
+
+
+class _Worker:
+    """Supervisor-side bookkeeping for one spec"""
+
+    def __init__(self, spec: WorkerSpec):
+        self.spec = spec
+        self.proc = None
+        self.conn = None              # Parent end of the ping / stop pipe
+        self.started_at = 0.0
+        self.last_ping = 0.0
+        self.unhealthy_since = None
+        self.died_at = None
+        self.failures = 0             # Consecutive crashes (drives the backoff)
+        self.restarts = 0
+        self.last_report = {}         # Latest health ping payload
+
+    def backoff(self) -> float:
+        """Seconds to wait before the next restart: base * 2^(failures-1), capped"""
+        delay = config.RESTART_BACKOFF_BASE * (2 ** max(0, self.failures - 1))
+        return min(delay, config.RESTART_BACKOFF_MAX)
+
+
+class Supervisor:
+    """Starts, watches and restarts child processes"""
+
+    def __init__(self, specs: List[WorkerSpec] = None):
+        """
+        Initialize supervisor.
+
+        Args:
+            specs: Processes to run (more can be added with add())
+        """
+        # 'spawn' gives every child a clean interpreter (no inherited locks from
+        # the log listener thread) and behaves the same on Linux and Windows.
+        self._ctx = multiprocessing.get_context('spawn')
+        self.log_queue = self._ctx.Queue()
+        # Health of every child, readable from other processes (e.g. the
+        # management API) through a Manager proxy.
+        self._manager = multiprocessing.managers.SyncManager(ctx=self._ctx)
+        self._manager.start(_ignore_sigint)
+        self.status = self._manager.dict()
+        self._workers: Dict[str, _Worker] = {}
+        self._stop_requested = False  # Plain flags: safe to set from a signal handler
+        self._reload_requested = False
+        for spec in specs or []:
+            self.add(spec)
+
+    def add(self, spec: WorkerSpec) -> None:
+        """Register a process to supervise (before run())"""
+        self._workers[spec.name] = _Worker(spec)
+
+    def _spawn(self, worker: _Worker) -> None:
+        """Start (or restart) the process for one worker"""
+        if worker.conn is not None:
+            worker.conn.close()
+        parent_conn, child_conn = self._ctx.Pipe()
+        spec = worker.spec
+        worker.proc = self._ctx.Process(
+            target=_bootstrap,
+            args=(spec.target, spec.args, self.log_queue, child_conn),
+            name=spec.name
+        )
+        worker.proc.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.started_at = worker.last_ping = time.monotonic()
+        worker.unhealthy_since = None
+        worker.died_at = None
+        print(f"[*] Supervisor: {spec.name} arrancado (pid {worker.proc.pid})")
+
+    def run(self) -> None:
+        """Start every child and supervise them until stop(), SIGTERM or Ctrl+C"""
+        listener = HoneypotLogger.start_queue_listener(self.log_queue)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._request_stop)
+            if signal.getsignal(signal.SIGINT) is not signal.SIG_IGN:
+                signal.signal(signal.SIGINT, self._request_stop)
+            if hasattr(signal, 'SIGHUP'):
+                signal.signal(signal.SIGHUP, self._request_reload)
+
+        try:
+            for worker in self._workers.values():
+                self._spawn(worker)
+
+            while not self._stop_requested:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._broadcast('reload')
+                for worker in self._workers.values():
+                    self._check_worker(worker)
+                time.sleep(0.5)
+        finally:
+            self.shutdown()
+            listener.stop()
+            self._manager.shutdown()
+
+    def _check_worker(self, worker: _Worker) -> None:
+        """Read pings, kill hung children and restart dead ones after their backoff"""
+        now = time.monotonic()
+        name = worker.spec.name
+
+        if worker.proc.is_alive():
+            self._drain_pings(worker, now)
+            if now - worker.last_ping > config.HEALTH_TIMEOUT:
+                print(f"[!] Supervisor: {name} no responde a los pings, reiniciando")
+                worker.proc.terminate()
+            elif worker.unhealthy_since and now - worker.unhealthy_since > config.HEALTH_TIMEOUT:
+                print(f"[!] Supervisor: {name} lleva {config.HEALTH_TIMEOUT}s sin servicio activo, reiniciando")
+                worker.proc.terminate()
+            else:
+                self._publish(worker)
+            return
+
+        if worker.died_at is None:
+            worker.died_at = now
+            # A child that ran long enough was healthy: start the backoff from scratch
+            if now - worker.started_at >= config.RESTART_STABLE_SECONDS:
+                worker.failures = 0
+            worker.failures += 1
+            print(f"[!] Supervisor: {name} terminó (exit code {worker.proc.exitcode}), "
+                  f"reinicio en {worker.backoff():.0f}s")
+            self._publish(worker)
+
+        if now - worker.died_at >= worker.backoff():
+            worker.restarts += 1
+            self._spawn(worker)
+
+    def _drain_pings(self, worker: _Worker, now: float) -> None:
+        """Consume every pending health ping from a child"""
+        report = None
+        try:
+            while worker.conn.poll():
+                report = worker.conn.recv()
+        except (EOFError, OSError):
+            return
+        if report is None:
+            return
+        worker.last_ping = now
+        worker.last_report = report
+        if report['healthy']:
+            worker.unhealthy_since = None
+        elif worker.unhealthy_since is None:
+            worker.unhealthy_since = now
+
+    def _publish(self, worker: _Worker) -> None:
+        """Expose a child's health and counters in the shared status dict"""
+        report = worker.last_report
+        alive = worker.proc.is_alive()
+        self.status[worker.spec.name] = {
+            'pid': worker.proc.pid,
+            'alive': alive,
+            'healthy': alive and report.get('healthy', False),
+            'restarts': worker.restarts,
+            'last_ping_age': round(time.monotonic() - worker.last_ping, 1),
+            'stats': report.get('stats', []),
+        }
+
+    def _request_stop(self, signum=None, frame=None) -> None:
+        """SIGTERM / Ctrl+C handler"""
+        self._stop_requested = True
+
+    def _request_reload(self, signum=None, frame=None) -> None:
+        """SIGHUP handler: the supervisor loop forwards it to the children"""
+        self._reload_requested = True
+
+    def reload(self) -> None:
+        """Ask every child to reload its services (same as SIGHUP)"""
+        self._reload_requested = True
+
+    def _broadcast(self, message: str) -> None:
+        """Send a control message to every child that has a pipe"""
+        for worker in self._workers.values():
+            if worker.conn is not None:
+                try:
+                    worker.conn.send(message)
+                except OSError:
+                    pass  # Already dead: it reloads everything when restarted
+
+    def stop(self) -> None:
+        """Ask the supervisor loop (and then every child) to stop"""
+        self._stop_requested = True
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """Shared shutdown path: tell every child to stop, wait, then terminate stragglers"""
+        self._stop_requested = True
+        self._broadcast('stop')
+        procs = [w.proc for w in self._workers.values() if w.proc is not None]
+        deadline = time.monotonic() + timeout
+        for proc in procs:
+            proc.join(max(0, deadline - time.monotonic()))
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(1)
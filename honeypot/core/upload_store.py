@@ -0,0 +1,224 @@
+"""
+Content-addressed store for captured request bodies (webshells, droppers, uploads).
+Bodies are hashed (SHA-256) while they stream in and kept once per hash, under
+a total size quota with least-recently-seen eviction. Logs only carry the
+hash and size.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import config
+
+
+class BodyCapture:
+    """One body being received: hashed on the fly and spooled to a temp file"""
+
+    __slots__ = ('store', 'hasher', 'size', '_file', '_path')
+
+    def __init__(self, store: 'UploadStore'):
+        self.store = store
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self._file = None
+        self._path = None
+
+    def write(self, data) -> None:
+        """Hash and spool the next piece of the body"""
+        self.hasher.update(data)
+        self.size += len(data)
+        if self.size > self.store.max_file_size:
+            self._discard()       # Too big to keep: only its hash will be logged
+            return
+        if self._file is None and self._path is None:
+            try:
+                fd, self._path = tempfile.mkstemp(dir=self.store.tmp_dir, prefix='body-')
+                self._file = os.fdopen(fd, 'wb')
+            except OSError:
+                self._path = ''   # Store not writable: hash only
+                return
+        if self._file is not None:
+            self._file.write(data)
+
+    def finish(self) -> Dict:
+        """
+        Close the capture and commit it to the store.
+
+        Returns:
+            {'sha256', 'size', 'stored'} where stored is 'new', 'duplicate' or
+            'skipped' (over UPLOAD_MAX_FILE_SIZE or store not writable)
+        """
+        digest = self.hasher.hexdigest()
+        if self._file is None:
+            self._discard()
+            return {'sha256': digest, 'size': self.size, 'stored': 'skipped'}
+        self._file.close()
+        self._file = None
+        try:
+            stored = self.store.commit(self._path, digest, self.size)
+        except OSError:
+            self._discard()       # Disk full / permissions: the hash is still logged
+            stored = 'skipped'
+        self._path = ''
+        return {'sha256': digest, 'size': self.size, 'stored': stored}
+
+    def abort(self) -> None:
+        """Drop an unfinished body (client disconnected or the request failed)"""
+        self._discard()
+
+    def _discard(self) -> None:
+        """Close and delete the temp file, keep hashing if more data comes"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+        self._path = ''
+
+
+class UploadStore:
+    """
+    Files are stored as <root>/<sha[:2]>/<sha>. The LRU index (hash -> size) is
+    rebuilt from disk at startup (oldest mtime first); a duplicate body refreshes
+    its entry and mtime instead of writing again.
+
+    Worker processes (--workers N) share the directory: duplicates written by a
+    sibling are found on disk, while the quota is enforced per process.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, root: str, max_bytes: int, max_file_size: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self._lock = threading.Lock()
+        self._index = OrderedDict()   # sha256 -> size, least recently seen first
+        self.total_bytes = 0
+        self.counters = {'new': 0, 'duplicate': 0, 'evicted': 0}
+        try:
+            os.makedirs(self.tmp_dir, exist_ok=True)
+        except OSError:
+            pass                      # BodyCapture falls back to hash-only
+        self._remove_stale_temp_files()
+        self._load_index()
+
+    @classmethod
+    def default(cls) -> 'UploadStore':
+        """Process-wide store configured from config.py (created on first use)"""
+        store = cls._default
+        if store is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(config.UPLOAD_DIR, config.UPLOAD_QUOTA,
+                                       config.UPLOAD_MAX_FILE_SIZE)
+                store = cls._default
+        return store
+
+    def begin(self) -> BodyCapture:
+        """Start capturing a new body"""
+        return BodyCapture(self)
+
+    def path_for(self, digest: str) -> str:
+        """Final location of a stored body"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def commit(self, temp_path: str, digest: str, size: int) -> str:
+        """
+        Move a fully received body into place, or drop it if already stored.
+
+        Returns:
+            'new' or 'duplicate'
+        """
+        path = self.path_for(digest)
+        with self._lock:
+            # Checked on disk, not only in the index: a sibling worker process may
+            # have stored (or evicted) it since
+            if os.path.exists(path):
+                os.unlink(temp_path)
+                _touch(path)
+                stored = 'duplicate'
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                stored = 'new'
+            self.total_bytes += size - self._index.pop(digest, 0)
+            self._index[digest] = size    # Most recently seen goes last
+            self.counters[stored] += 1
+            self._evict_locked()
+            return stored
+
+    def stats(self) -> Dict:
+        """Store size and counters (for /api/stats)"""
+        with self._lock:
+            return {'files': len(self._index), 'bytes': self.total_bytes,
+                    'quota': self.max_bytes, **self.counters}
+
+    def _evict_locked(self) -> None:
+        """Delete least recently seen bodies until the store fits its quota"""
+        while self.total_bytes > self.max_bytes and len(self._index) > 1:
+            digest, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.counters['evicted'] += 1
+            try:
+                os.unlink(self.path_for(digest))
+            except OSError:
+                pass
+
+    def _remove_stale_temp_files(self, max_age: float = 3600) -> None:
+        """Delete bodies left half-written by a crash (recent ones may be a sibling's)"""
+        try:
+            with os.scandir(self.tmp_dir) as files:
+                cutoff = time.time() - max_age
+                for entry in files:
+                    if entry.name.startswith('body-') and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+        except OSError:
+            pass
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from the files already on disk"""
+        entries = []
+        try:
+            prefixes = [d for d in os.listdir(self.root) if len(d) == 2]
+        except OSError:
+            return
+        for prefix in prefixes:
+            try:
+                with os.scandir(os.path.join(self.root, prefix)) as files:
+                    for entry in files:
+                        if entry.is_file() and len(entry.name) == 64:
+                            info = entry.stat()
+                            entries.append((info.st_mtime, entry.name, info.st_size))
+            except OSError:
+                continue
+        for _, digest, size in sorted(entries):
+            self._index[digest] = size
+            self.total_bytes += size
+        with self._lock:
+            self._evict_locked()
+
+
+def _touch(path: str) -> None:
+    """Refresh mtime so the LRU order survives a restart"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def capture_factory() -> Optional[Callable[[], BodyCapture]]:
+    """Function returning a new BodyCapture, or None when capture is disabled"""
+    if not config.UPLOAD_CAPTURE_ENABLED:
+        return None
+    return UploadStore.default().begin
@@ -3,7 +3,11 @@ Attack detection modules.
 Provides pattern matching and attack identification.
 """
 
+from .matcher import Match, PatternMatcher
+from .normalizer import NormalizedParts, normalize
+from .rules import Rule, Ruleset, reload_rules
 from .http_attacks import HTTPAttackDetector
 from .ssh_attacks import SSHAttackDetector
 
-__all__ = ['HTTPAttackDetector', 'SSHAttackDetector']
+__all__ = ['HTTPAttackDetector', 'SSHAttackDetector', 'Match', 'PatternMatcher',
+           'Rule', 'Ruleset', 'reload_rules', 'NormalizedParts', 'normalize']
@@ -0,0 +1,137 @@
+"""
+HTTP client fingerprinting from the shape of the request, in the spirit of JA4H.
+The User-Agent is one header anyone can set; the order and casing of the
+headers, the HTTP version and request-line quirks come from the client's HTTP
+library, so a tool keeps its fingerprint whatever User-Agent it claims.
+
+Fingerprint: '<a>_<flags>_<hash>'
+    a      JA4H_a: method (2 chars), version (11/10/20/09, 00 if unknown), cookie c/n,
+           referer r/n, header count (without cookie and referer), first 4
+           alphanumerics of Accept-Language ('0000' if none)
+    flags  header casing (T title, l lower, U upper, m mixed) plus quirks:
+           a absolute-form target, o other non-path target, s extra spaces in
+           the request line, n bare LF line endings, v non-canonical version,
+           h no Host header, d repeated header
+    hash   first 12 hex digits of SHA-256 over the header names as sent, in
+           order (cookie and referer excluded, as in JA4H)
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import config
+
+
+# Default request of common clients: (version, header names in order), as
+# captured from the tools themselves. The method is not part of the lookup.
+KNOWN_TOOLS = {
+    'curl': ('HTTP/1.1', ('Host', 'User-Agent', 'Accept')),
+    'wget': ('HTTP/1.1', ('Host', 'User-Agent', 'Accept', 'Accept-Encoding', 'Connection')),
+    'python-requests': ('HTTP/1.1', ('Host', 'User-Agent', 'Accept-Encoding', 'Accept', 'Connection')),
+    'python-urllib': ('HTTP/1.1', ('Accept-Encoding', 'Host', 'User-Agent', 'Connection')),
+    # Go's net/http: also gobuster, nuclei, httpx and most Go scanners
+    'go-net-http': ('HTTP/1.1', ('Host', 'User-Agent', 'Accept-Encoding')),
+    'masscan': ('HTTP/1.0', ('User-Agent', 'Accept')),
+}
+
+_VERSIONS = {'HTTP/1.1': '11', 'HTTP/1.0': '10', 'HTTP/2.0': '20', 'HTTP/0.9': '09'}
+_UNCOUNTED = ('cookie', 'referer')
+
+
+def fingerprint_request(request, user_agent: str = None) -> Dict:
+    """
+    Fingerprint of a parsed request and the tool it matches.
+
+    Args:
+        request: HTTPRequest (method, target, version, header_list, head)
+        user_agent: Claimed User-Agent, to flag known tools posing as a browser
+
+    Returns:
+        {'ja4h': fingerprint, 'tool': known tool or None, 'spoofed_user_agent': bool}
+    """
+    names = []
+    cookie = referer = 'n'
+    language = '0000'
+    for name, value in request.header_list:
+        lowered = name.lower()
+        if lowered in _UNCOUNTED:
+            if lowered == 'cookie':
+                cookie = 'c'
+            else:
+                referer = 'r'
+            continue
+        if lowered == 'accept-language':
+            language = (''.join(filter(str.isalnum, value.split(',', 1)[0]))[:4].lower() or '0').ljust(4, '0')
+        names.append(name)
+
+    version = request.version
+    quirks = ''
+    target = request.target
+    if not target.startswith('/'):
+        quirks += 'a' if '://' in target else 'o'
+    head = request.head
+    newline = head.find(b'\n')
+    request_line = head if newline == -1 else head[:newline]
+    if request_line.rstrip(b'\r').count(b' ') != 2:
+        quirks += 's'
+    if head.count(b'\n') != head.count(b'\r\n'):
+        quirks += 'n'
+    if version not in _VERSIONS:
+        quirks += 'v'
+
+    head_a = (f"{request.method[:2].lower():_<2}{_VERSIONS.get(version.upper(), '00')}"
+              f"{cookie}{referer}{min(len(names), 99):02d}{language}")
+    fingerprint, tool = _classify(head_a, quirks, ','.join(names))
+    spoofed = tool is not None and 'mozilla' in (user_agent or '').lower()
+    return {'ja4h': fingerprint, 'tool': tool, 'spoofed_user_agent': spoofed}
+
+
+@lru_cache(maxsize=config.FINGERPRINT_CACHE_SIZE)
+def _classify(head_a: str, quirks: str, names: str) -> Tuple[str, Optional[str]]:
+    """
+    Fingerprint and known tool of one request shape. Bots repeat the same
+    shape over and over: casing, hashing and the lookup run once per shape.
+    """
+    fingerprint = _fingerprint(head_a, quirks, names)
+    return fingerprint, _KNOWN.get(fingerprint[2:])
+
+
+def _fingerprint(head_a: str, quirks: str, names: str) -> str:
+    """'<a>_<flags>_<hash>' from the parts fingerprint_request() extracted"""
+    header_names = names.split(',') if names else []
+    lowered = [name.lower() for name in header_names]
+    flags = _casing(header_names) + quirks
+    if 'host' not in lowered:
+        flags += 'h'
+    if len(set(lowered)) != len(lowered):
+        flags += 'd'
+    digest = hashlib.sha256(names.encode('latin-1')).hexdigest()[:12]
+    return f"{head_a}_{flags}_{digest}"
+
+
+def _casing(names: list) -> str:
+    """T (Title-Case), l (lower), U (UPPER) or m (mixed) over every header name"""
+    if not names:
+        return 'T'
+    if all(name == name.lower() for name in names):
+        return 'l'
+    if all(name == name.upper() for name in names):
+        return 'U'
+    if all(name == name.title() for name in names):
+        return 'T'
+    return 'm'
+
+
+# Fingerprint without the method -> tool
+_KNOWN = {
+    _fingerprint(f"{_VERSIONS[version]}nn{len(names):02d}0000", '', ','.join(names)): tool
+    for tool, (version, names) in KNOWN_TOOLS.items()
+}
+
+
+def fingerprint_stats() -> Dict:
+    """Size and hit rate of the request-shape cache (for /api/stats)"""
+    info = _classify.cache_info()
+    return {'known_tools': len(_KNOWN), 'cached_shapes': info.currsize,
+            'max_shapes': info.maxsize, 'hits': info.hits, 'misses': info.misses}
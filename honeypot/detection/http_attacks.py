@@ -3,13 +3,19 @@ HTTP attack detection module.
 Identifies common web attack patterns.
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional
+from urllib.parse import parse_qsl
+
+from . import rules
+from .matcher import Match
+from .normalizer import NormalizedParts, normalize
 
 
 class HTTPAttackDetector:
     """Detector for HTTP-based attacks"""
     
-    # Attack patterns
+    # Built-in attack patterns, used when the rules file (DETECTION_RULES_FILE)
+    # has no "http" section
     SQL_INJECTION_PATTERNS = [
         'union select',
         "' or '1'='1",
@@ -52,36 +58,50 @@ class HTTPAttackDetector:
     ]
     
     @classmethod
-    def detect(cls, request_data: str) -> List[str]:
+    def detect(cls, request_data: str, parts: Dict[str, str] = None) -> List[str]:
         """
         Detect attacks in HTTP request data.
         
         Args:
             request_data: Raw HTTP request data
+            parts: Request parts for scoped rules ('path', 'query', 'headers', 'body'...).
+                   Without them every rule is checked against the whole request
             
         Returns:
-            List of detected attack types
+            List of detected attack types (matched on the decoded payload too)
         """
-        detected = []
-        data_lower = request_data.lower()
-        
-        # SQL Injection
-        if any(pattern in data_lower for pattern in cls.SQL_INJECTION_PATTERNS):
-            detected.append('sql_injection')
-        
-        # XSS
-        if any(pattern in data_lower for pattern in cls.XSS_PATTERNS):
-            detected.append('xss')
-        
-        # Path Traversal
-        if any(pattern in request_data for pattern in cls.PATH_TRAVERSAL_PATTERNS):
-            detected.append('path_traversal')
+        if parts is None:
+            return rules.ruleset('http').detect(normalize(request_data))
+        return rules.ruleset('http').detect_parts(NormalizedParts({**parts, 'request': request_data}))
+    
+    @classmethod
+    def detect_request(cls, request, body: str = None) -> List[str]:
+        """
+        Detect attacks in a parsed HTTP request: each rule only looks at the
+        parts of its scope (query string, path, a given header, a form field...).
         
-        # Command Injection
-        if any(pattern in request_data for pattern in cls.COMMAND_INJECTION_PATTERNS):
-            detected.append('command_injection')
+        Args:
+            request: Parsed request (method, target, header_list, body, as HTTPRequest)
+            body: Request body as text, if the caller already decoded it
+            
+        Returns:
+            List of detected attack types
+        """
+        return rules.ruleset('http').detect_parts(RequestParts(request, body))
+    
+    @classmethod
+    def find(cls, request_data: str) -> List[Match]:
+        """
+        Locate every attack pattern in HTTP request data.
         
-        return detected
+        Args:
+            request_data: Raw HTTP request data
+            
+        Returns:
+            Matches (category, pattern, offset) of every rule, in order;
+            offsets refer to normalize(request_data)
+        """
+        return rules.ruleset('http').find(normalize(request_data))
     
     @classmethod
     def get_attack_details(cls, attack_type: str, request_data: str) -> Dict:
@@ -111,3 +131,70 @@ class HTTPAttackDetector:
             'path_traversal': 'medium'
         }
         return severity_map.get(attack_type, 'low')
+
+
+class RequestParts(NormalizedParts):
+    """
+    Parts of a parsed HTTP request for scoped rules. Each one is extracted
+    (and normalized) only when some rule asks for it.
+    
+    Parts: path, query, headers, body, form (all urlencoded form values),
+    header:<name> and form:<field> (names are case-insensitive).
+    """
+    
+    __slots__ = ('request', 'body', '_form')
+    
+    def __init__(self, request, body: str = None):
+        super().__init__({}, sections=('path', 'query', 'headers', 'body'))
+        self.request = request
+        self.body = body
+        self._form = None
+    
+    def source(self, name: str) -> Optional[str]:
+        if name not in self.raw:
+            self.raw[name] = self._extract(name)
+        return self.raw[name]
+    
+    def _extract(self, name: str) -> Optional[str]:
+        target = self.request.target.split('#', 1)[0]
+        if name == 'path':
+            return target.split('?', 1)[0]
+        if name == 'query':
+            return target.partition('?')[2] or None
+        if name == 'headers':
+            return '\r\n'.join(f"{key}: {value}" for key, value in self.request.header_list)
+        if name == 'body':
+            if self.body is None:
+                self.body = bytes(self.request.body).decode('utf-8', errors='ignore')
+            return self.body or None
+        if name.startswith('header:'):
+            wanted = name[7:]
+            values = [value for key, value in self.request.header_list if key.lower() == wanted]
+            return ', '.join(values) if values else None
+        if name == 'form' or name.startswith('form:'):
+            fields = self._form_fields()
+            if name == 'form':
+                return '\n'.join(value for _, value in fields) or None
+            values = [value for key, value in fields if key.lower() == name[5:]]
+            return '\n'.join(values) if values else None
+        return None
+    
+    def _form_fields(self) -> list:
+        """(name, value) of an application/x-www-form-urlencoded body (parsed once)"""
+        if self._form is None:
+            self._form = []
+            content_type = ''
+            for key, value in self.request.header_list:
+                if key.lower() == 'content-type':
+                    content_type = value.lower()
+            if content_type.startswith('application/x-www-form-urlencoded'):
+                self._form = parse_qsl(self.source('body') or '', keep_blank_values=True)
+        return self._form
+
+
+rules.register_builtin('http', {
+    'sql_injection': HTTPAttackDetector.SQL_INJECTION_PATTERNS,
+    'xss': HTTPAttackDetector.XSS_PATTERNS,
+    'path_traversal': HTTPAttackDetector.PATH_TRAVERSAL_PATTERNS,
+    'command_injection': HTTPAttackDetector.COMMAND_INJECTION_PATTERNS,
+})
@@ -0,0 +1,110 @@
+"""
+Multi-pattern matcher shared by the attack and scanner detectors.
+Every category's literal patterns are compiled into one Aho-Corasick
+automaton, so a payload is scanned once whatever the number of rules.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class Match(NamedTuple):
+    """One pattern occurrence in the scanned text"""
+    category: str
+    pattern: str
+    start: int          # Offset in the scanned text (case-folded when ignore_case)
+
+
+class PatternMatcher:
+    """
+    Compiled set of {category: [literal patterns]}.
+
+    With pyahocorasick installed the patterns form a single automaton (one pass
+    over the text, cost independent of the rule count). Without it, each
+    pattern is searched with str.find / `in` (C speed, but one pass per rule);
+    both backends return the same results.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]], ignore_case: bool = True):
+        """
+        Args:
+            categories: Category name -> literal patterns. Declaration order is
+                        the order categories() reports them in
+            ignore_case: Match patterns regardless of case
+        """
+        self.ignore_case = ignore_case
+        self.category_order = list(categories)
+        self._rank = {category: i for i, category in enumerate(self.category_order)}
+        self.patterns = []            # [(pattern, category)] as matched (lowered if ignore_case)
+        for category, patterns in categories.items():
+            for pattern in patterns:
+                if pattern:
+                    self.patterns.append((pattern.lower() if ignore_case else pattern, category))
+
+        self._automaton = None
+        if ahocorasick is not None and self.patterns:
+            automaton = ahocorasick.Automaton()
+            for pattern, category in self.patterns:
+                # One key may belong to several categories: store them all
+                entries = automaton.get(pattern, (pattern, ()))[1]
+                automaton.add_word(pattern, (pattern, entries + (category,)))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    @property
+    def backend(self) -> str:
+        """'aho-corasick' or 'substring' (fallback without pyahocorasick)"""
+        return 'aho-corasick' if self._automaton is not None else 'substring'
+
+    def _prepare(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def scan(self, text: str) -> List[Match]:
+        """
+        Every occurrence of every pattern.
+
+        Returns:
+            Matches ordered by end offset (ties: longest pattern first)
+        """
+        text = self._prepare(text)
+        matches = []
+        if self._automaton is not None:
+            for end, (pattern, categories) in self._automaton.iter(text):
+                start = end - len(pattern) + 1
+                matches.extend(Match(category, pattern, start) for category in categories)
+            return matches
+
+        for pattern, category in self.patterns:
+            start = text.find(pattern)
+            while start != -1:
+                matches.append(Match(category, pattern, start))
+                start = text.find(pattern, start + 1)
+        matches.sort(key=lambda m: (m.start + len(m.pattern), -len(m.pattern)))
+        return matches
+
+    def categories(self, text: str) -> List[str]:
+        """Distinct matching categories, in declaration order (stops once all are found)"""
+        text = self._prepare(text)
+        found = set()
+        if self._automaton is not None:
+            total = len(self.category_order)
+            for _, (_, categories) in self._automaton.iter(text):
+                found.update(categories)
+                if len(found) == total:
+                    break
+        else:
+            for pattern, category in self.patterns:
+                if category not in found and pattern in text:
+                    found.add(category)
+        return sorted(found, key=self._rank.__getitem__)
+
+    def first(self, text: str) -> Optional[str]:
+        """First category (in declaration order) with a match, or None"""
+        found = self.categories(text)
+        return found[0] if found else None
+
+    def __len__(self) -> int:
+        return len(self.patterns)
@@ -0,0 +1,159 @@
+"""
+Payload normalization before detection.
+Undoes the encodings attackers use to slip past literal rules (URL and
+double-URL, '+' for spaces, HTML entities, \\uXXXX / %uXXXX escapes, base64
+blobs), one layer at a time, with a depth limit and a character budget so a
+hostile payload cannot make decoding expensive.
+"""
+
+import binascii
+import html
+import re
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote_plus
+
+import config
+
+
+# Between the original text and each decoded layer. Not a newline: rules for
+# CR/LF injection must only match newlines that were really in the payload
+SEPARATOR = '\x00'
+
+_UNICODE_ESCAPE = re.compile(r'\\u([0-9a-fA-F]{4})|%u([0-9a-fA-F]{4})|\\x([0-9a-fA-F]{2})')
+_HTML_ENTITY = re.compile(r'&(?:#[0-9]{1,7};?|#[xX][0-9a-fA-F]{1,6};?|[A-Za-z][A-Za-z0-9]{1,31};)')
+# Base64 of ASCII text: every 4-character group starts with A-Z or a-f (the top
+# bit of each byte is 0). Random tokens and words rarely fit, so few candidates
+# reach the (Python-level) decoding callback
+_BASE64_BLOB = re.compile(
+    r'(?<![A-Za-z0-9+/_-])(?:[A-Za-f][A-Za-z0-9+/_-]{3}){%d,}(?:[A-Za-f][A-Za-z0-9+/_-]{1,3}={0,2})?'
+    % (config.NORMALIZE_BASE64_MIN_LENGTH // 4))
+_NOT_TEXT = re.compile(rb'[^\x20-\x7e\t\r\n]')
+
+
+def normalize(text: str, max_depth: int = None, max_chars: int = None) -> str:
+    """
+    Canonical form of text for the detectors: the original followed by each
+    decoded layer that differs from the previous one, SEPARATOR in between
+    (so rules match both the raw and the decoded payload).
+
+    Args:
+        text: Raw input
+        max_depth: Decoding passes (NORMALIZE_MAX_DEPTH); '%252e' needs 2
+        max_chars: Characters all passes together may decode (NORMALIZE_MAX_CHARS);
+                   beyond it the rest of the input is only matched raw
+
+    Returns:
+        text itself when nothing was decoded
+    """
+    layers = decoded_layers(text, max_depth, max_chars)
+    return text + SEPARATOR + layers if layers else text
+
+
+def decoded_layers(text: str, max_depth: int = None, max_chars: int = None) -> str:
+    """Only the decoded layers of text, SEPARATOR between them ('' if nothing decodes)"""
+    max_depth = config.NORMALIZE_MAX_DEPTH if max_depth is None else max_depth
+    budget = config.NORMALIZE_MAX_CHARS if max_chars is None else max_chars
+    layers = []
+    current = text[:budget]
+    for _ in range(max_depth):
+        budget -= len(current)
+        if budget < 0:
+            break
+        decoded = _decode_layer(current)
+        if decoded == current:
+            break
+        layers.append(decoded)
+        current = decoded
+    return SEPARATOR.join(layers)
+
+
+def _decode_layer(text: str) -> str:
+    """One pass of every decoder (each one only runs if its marker is present)"""
+    text = _BASE64_BLOB.sub(_decode_base64, text)
+    if '\\' in text or '%u' in text or '%U' in text:
+        text = _UNICODE_ESCAPE.sub(_decode_escape, text)
+    if '%' in text or '+' in text:
+        text = unquote_plus(text, errors='replace')
+    if '&' in text:
+        # Only things shaped like entities: html.unescape() on a whole form body
+        # ("&field=...&field=...") tries every prefix of every name
+        text = _HTML_ENTITY.sub(_decode_entity, text)
+    return text
+
+
+def _decode_escape(match: re.Match) -> str:
+    return chr(int(next(group for group in match.groups() if group), 16))
+
+
+def _decode_entity(match: re.Match) -> str:
+    return html.unescape(match.group(0))
+
+
+def _decode_base64(match: re.Match) -> str:
+    """Decoded blob if it is readable ASCII text, else the blob untouched (tokens, hashes...)"""
+    blob = match.group(0)
+    if len(blob.rstrip('=')) % 4 == 1:
+        return blob           # No base64 string has that length
+    standard = blob
+    if '-' in blob or '_' in blob:
+        standard = blob.replace('-', '+').replace('_', '/')   # URL-safe alphabet
+    try:
+        raw = binascii.a2b_base64(standard + '==')   # Extra padding is ignored
+    except binascii.Error:
+        return blob
+    if not raw or _NOT_TEXT.search(raw):
+        return blob
+    return raw.decode('ascii')
+
+
+class NormalizedParts:
+    """
+    Parts of one request ('request', 'path', 'headers', 'body'...), each
+    normalized on first access and kept for the rest of the request, so
+    every rule scope and detector reuses the same decoding work.
+
+    When 'sections' names the parts the whole 'request' text is made of, its
+    canonical form reuses their decoded layers instead of decoding it again
+    (and is built from them if no raw 'request' was given).
+    """
+
+    __slots__ = ('raw', 'sections', '_layers', '_values')
+
+    def __init__(self, raw: Dict[str, str], sections: Tuple[str, ...] = ()):
+        self.raw = raw
+        self.sections = sections
+        self._layers = {}
+        self._values = {}
+
+    def source(self, name: str) -> Optional[str]:
+        """Raw text of a part (subclasses build theirs on demand)"""
+        return self.raw.get(name)
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._values.get(name)
+        if value is None:
+            composed = name == 'request' and self.sections
+            raw = self.source(name)
+            if raw is None and composed:
+                raw = '\n'.join(filter(None, (self.source(section) for section in self.sections)))
+            if raw is None:
+                return default
+            if composed:
+                layers = SEPARATOR.join(filter(None, (self.layers(section) for section in self.sections)))
+            else:
+                layers = self.layers(name)
+            value = self._values[name] = raw + SEPARATOR + layers if layers else raw
+        return value
+
+    def layers(self, name: str) -> str:
+        """Decoded layers of one part (cached)"""
+        layers = self._layers.get(name)
+        if layers is None:
+            layers = self._layers[name] = decoded_layers(self.source(name) or '')
+        return layers
+
+    def __getitem__(self, name: str) -> str:
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
@@ -0,0 +1,313 @@
+"""
+Detection rules loaded from a JSON file (DETECTION_RULES_FILE) and hot-reloaded.
+Each detector ('http', 'ssh') gets an immutable Ruleset that is swapped in one
+assignment on reload; every rule keeps its own hit count and match time so slow
+or noisy rules can be pruned from real traffic.
+
+File format:
+    {
+        "http": [
+            {"id": "sqli-union", "category": "sql_injection", "literal": "union select"},
+            {"id": "cmdi-pipe", "category": "command_injection", "literal": "|", "scope": ["query", "body"]},
+            {"id": "sqli-agent", "category": "sql_injection", "literal": "sleep(", "scope": "header:user-agent"},
+            {"id": "xss-handler", "category": "xss", "regex": "on(error|load)\\\\s*="}
+        ],
+        "ssh": [...]
+    }
+
+"scope" is one part or a list of parts (default "request": the whole input).
+Literals are case-insensitive and share one automaton per scope; regexes are
+case-insensitive unless "case_sensitive": true. Input that could not be split
+into parts is checked against every rule. A detector missing from the file
+uses its built-in pattern lists.
+"""
+
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import config
+from .matcher import Match, PatternMatcher
+
+
+# Parts of the input a rule can be restricted to ('request' = the whole text).
+# HTTP also accepts 'header:<name>' and 'form:<field>' for a single header / field.
+SCOPES = {
+    'http': ('request', 'path', 'query', 'headers', 'body', 'form'),
+    'ssh': ('request',),
+}
+SCOPE_PREFIXES = {
+    'http': ('header:', 'form:'),
+}
+
+
+class Rule:
+    """One detection rule plus its counters"""
+
+    __slots__ = ('id', 'category', 'kind', 'pattern', 'scopes', 'regex', 'hits', 'seconds')
+
+    def __init__(self, rule_id: str, category: str, kind: str, pattern: str,
+                 scopes: tuple = ('request',), case_sensitive: bool = False):
+        self.id = rule_id
+        self.category = category
+        self.kind = kind                  # 'literal' or 'regex'
+        self.pattern = pattern
+        self.scopes = scopes
+        self.regex = None
+        if kind == 'regex':
+            self.regex = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        self.hits = 0                     # Requests the rule matched (once per request)
+        self.seconds = 0.0                # Regex rules only: literals share their scope's pass
+
+    @property
+    def key(self) -> tuple:
+        """Identity used to carry counters over a reload (same rule, same numbers)"""
+        return (self.id, self.category, self.kind, self.pattern, self.scopes)
+
+    def stats(self) -> Dict:
+        stats = {'id': self.id, 'category': self.category, 'kind': self.kind,
+                 'scope': ','.join(self.scopes), 'hits': self.hits}
+        if self.regex is not None:
+            stats['ms'] = round(self.seconds * 1000, 3)
+        return stats
+
+
+class _Pass:
+    """The rules that look at one scope: one automaton for the literals plus the regexes"""
+
+    __slots__ = ('scope', 'matcher', 'regexes', 'calls', 'seconds')
+
+    def __init__(self, scope: str, rules: List[Rule]):
+        self.scope = scope
+        literals = [rule for rule in rules if rule.kind == 'literal']
+        self.matcher = PatternMatcher({rule.id: [rule.pattern] for rule in literals}) if literals else None
+        self.regexes = [rule for rule in rules if rule.kind == 'regex']
+        self.calls = 0
+        self.seconds = 0.0
+
+
+class Ruleset:
+    """
+    Compiled rules of one detector. Never modified after construction (only
+    its counters): a reload builds a new one and replaces the reference.
+    """
+
+    def __init__(self, rules: List[Rule], source: str):
+        self.rules = rules
+        self.source = source
+        self.loaded_at = time.time()
+        self._lock = threading.Lock()     # Counters only
+        self.category_order = list(dict.fromkeys(rule.category for rule in rules))
+        self._rank = {category: i for i, category in enumerate(self.category_order)}
+        self._by_id = {rule.id: rule for rule in rules}
+
+        scopes = dict.fromkeys(scope for rule in rules for scope in rule.scopes)
+        self._passes = [_Pass(scope, [rule for rule in rules if scope in rule.scopes]) for scope in scopes]
+        # Unparsed input (a request that could not be read, an SSH command): every
+        # rule looks at the whole text, whatever its scope
+        self._whole = _Pass('*', rules)
+
+    def detect(self, text: str) -> List[str]:
+        """
+        Categories matched by any rule (scopes ignored) in text, in the order
+        they first appear in the file.
+        """
+        return self._run([(self._whole, text)])
+
+    def detect_parts(self, parts) -> List[str]:
+        """
+        Categories matched by each rule on the parts of its scopes only.
+
+        Args:
+            parts: Object with get(scope) -> text or None (e.g. NormalizedParts);
+                   parts are only asked for when some rule needs them
+        """
+        return self._run([(scan, parts.get(scan.scope)) for scan in self._passes])
+
+    def _run(self, work: list) -> List[str]:
+        matched = {}                      # Rule ids, in order (a rule counts once per request)
+        timings = []
+        for scan, value in work:
+            if not value:
+                continue
+            started = time.perf_counter()
+            if scan.matcher is not None:
+                matched.update(dict.fromkeys(scan.matcher.categories(value)))
+            literal_time = time.perf_counter() - started
+            for rule in scan.regexes:
+                started = time.perf_counter()
+                if rule.regex.search(value):
+                    matched[rule.id] = None
+                timings.append((rule, time.perf_counter() - started))
+            if scan.matcher is not None:
+                timings.append((scan, literal_time))
+
+        rules = [self._by_id[rule_id] for rule_id in matched]
+        with self._lock:
+            for rule in rules:
+                rule.hits += 1
+            for target, seconds in timings:
+                if isinstance(target, _Pass):
+                    target.calls += 1
+                target.seconds += seconds
+        return sorted({rule.category for rule in rules}, key=self._rank.__getitem__)
+
+    def find(self, text: str) -> List[Match]:
+        """Occurrences of every rule (scopes ignored) in text: (category, pattern, offset)"""
+        found = []
+        if self._whole.matcher is not None:
+            for match in self._whole.matcher.scan(text):
+                rule = self._by_id[match.category]
+                found.append(Match(rule.category, rule.pattern, match.start))
+        for rule in self._whole.regexes:
+            found.extend(Match(rule.category, m.group(0), m.start()) for m in rule.regex.finditer(text))
+        return sorted(found, key=lambda m: m.start)
+
+    def adopt_counters(self, previous: Optional['Ruleset']) -> None:
+        """Keep the numbers of rules (and scope passes) that did not change across a reload"""
+        if previous is None:
+            return
+        old = {rule.key: rule for rule in previous.rules}
+        for rule in self.rules:
+            if rule.key in old:
+                rule.hits, rule.seconds = old[rule.key].hits, old[rule.key].seconds
+        passes = {scan.scope: scan for scan in previous._passes + [previous._whole]}
+        for scan in self._passes + [self._whole]:
+            if scan.scope in passes:
+                scan.calls, scan.seconds = passes[scan.scope].calls, passes[scan.scope].seconds
+
+    def stats(self) -> Dict:
+        """Per-rule hits and regex time, plus calls and time of each scope's literal pass"""
+        with self._lock:
+            return {
+                'source': self.source,
+                'loaded_at': self.loaded_at,
+                'rules': [rule.stats() for rule in self.rules],
+                'literal_passes': {scan.scope: {'calls': scan.calls, 'ms': round(scan.seconds * 1000, 3)}
+                                   for scan in self._passes + [self._whole]
+                                   if scan.matcher is not None and scan.calls},
+            }
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+def valid_scope(detector: str, scope: str) -> bool:
+    """Is scope known for detector? ('header:x-api-key' and 'form:cmd' count for HTTP)"""
+    return (scope in SCOPES.get(detector, ('request',))
+            or any(scope.startswith(prefix) and len(scope) > len(prefix)
+                   for prefix in SCOPE_PREFIXES.get(detector, ())))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LOADING AND THE ACTIVE RULESETS
+# ═══════════════════════════════════════════════════════════════════════════
+
+_builtin = {}        # detector -> {category: [literals]} (the detectors' class lists)
+_active = {}         # detector -> Ruleset; replaced as a whole on reload
+_reload_lock = threading.Lock()
+
+
+def register_builtin(detector: str, categories: Dict[str, List[str]]) -> None:
+    """Pattern lists a detector falls back to when the rules file does not define it"""
+    _builtin[detector] = categories
+
+
+def builtin_rules(detector: str) -> List[Rule]:
+    """Built-in lists as literal rules on the whole input (ids: category-N)"""
+    return [Rule(f"{category}-{i}", category, 'literal', pattern)
+            for category, patterns in _builtin.get(detector, {}).items()
+            for i, pattern in enumerate(patterns, 1)]
+
+
+def parse_rules(detector: str, entries: list) -> List[Rule]:
+    """
+    Validate and compile the rules of one detector.
+
+    Raises:
+        ValueError: Unknown scope, duplicate id, bad regex or missing fields
+    """
+    rules, seen = [], set()
+    for n, entry in enumerate(entries, 1):
+        rule_id = str(entry.get('id') or f"{detector}-{n}")
+        if rule_id in seen:
+            raise ValueError(f"{detector}: duplicate rule id '{rule_id}'")
+        seen.add(rule_id)
+        kinds = [kind for kind in ('literal', 'regex') if entry.get(kind)]
+        if len(kinds) != 1 or not entry.get('category'):
+            raise ValueError(f"{detector}/{rule_id}: needs a category and exactly one of literal/regex")
+        scopes = entry.get('scope', 'request')
+        # Header and form field names are matched case-insensitively
+        scopes = tuple(scope.lower() if ':' in scope else scope
+                       for scope in ([scopes] if isinstance(scopes, str) else scopes))
+        for scope in scopes:
+            if not valid_scope(detector, scope):
+                raise ValueError(f"{detector}/{rule_id}: unknown scope '{scope}'")
+        try:
+            rules.append(Rule(rule_id, entry['category'], kinds[0], entry[kinds[0]],
+                              scopes, bool(entry.get('case_sensitive'))))
+        except re.error as e:
+            raise ValueError(f"{detector}/{rule_id}: bad regex: {e}")
+    return rules
+
+
+def load_rules(path: str = None) -> Dict[str, Ruleset]:
+    """
+    Build a Ruleset for every registered detector from the rules file.
+
+    Raises:
+        OSError, ValueError: File unreadable or invalid (nothing is swapped)
+    """
+    path = path or config.DETECTION_RULES_FILE
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("rules file must map detector names to rule lists")
+    rulesets = {}
+    for detector in set(_builtin) | set(data):
+        if detector in data:
+            rulesets[detector] = Ruleset(parse_rules(detector, data[detector]), path)
+        else:
+            rulesets[detector] = Ruleset(builtin_rules(detector), 'builtin')
+    return rulesets
+
+
+def ruleset(detector: str) -> Ruleset:
+    """Active Ruleset of a detector (the rules file is read on first use)"""
+    current = _active.get(detector)
+    if current is None:
+        with _reload_lock:
+            if not _active:
+                try:
+                    _active.update(load_rules())
+                except (OSError, ValueError) as e:
+                    # Fail open: the built-in lists keep detection working
+                    print(f"[!] Error loading detection rules: {e}")
+            if detector not in _active:
+                _active[detector] = Ruleset(builtin_rules(detector), 'builtin')
+            current = _active[detector]
+    return current
+
+
+def reload_rules(path: str = None) -> Dict[str, int]:
+    """
+    Re-read the rules file and swap every detector's Ruleset (SIGHUP or
+    POST /api/reload). Requests in flight finish with the old one; on error
+    the exception propagates and the current rules stay.
+
+    Returns:
+        {detector: number of rules}
+    """
+    with _reload_lock:
+        rulesets = load_rules(path)
+        for detector, new in rulesets.items():
+            new.adopt_counters(_active.get(detector))
+            _active[detector] = new
+    return {detector: len(rules) for detector, rules in rulesets.items()}
+
+
+def rule_stats(detector: str) -> Dict:
+    """Counters of a detector's active rules (for /api/stats)"""
+    return ruleset(detector).stats()
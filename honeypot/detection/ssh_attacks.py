@@ -5,11 +5,15 @@ Identifies SSH-based attacks and suspicious behavior.
 
 from typing import List, Dict
 
+from . import rules
+from .matcher import Match
+from .normalizer import normalize
+
 
 class SSHAttackDetector:
     """Detector for SSH-based attacks"""
     
-    # Suspicious commands
+    # Built-in patterns, used when the rules file has no "ssh" section
     SUSPICIOUS_COMMANDS = [
         'wget',
         'curl',
@@ -53,18 +57,20 @@ class SSHAttackDetector:
         Returns:
             List of detected attack types
         """
-        detected = []
-        command_lower = command.lower()
-        
-        # Check for suspicious commands
-        if any(pattern in command_lower for pattern in cls.SUSPICIOUS_COMMANDS):
-            detected.append('suspicious_command')
-        
-        # Check for reconnaissance
-        if any(pattern in command_lower for pattern in cls.RECON_COMMANDS):
-            detected.append('reconnaissance')
+        return rules.ruleset('ssh').detect(normalize(command))
+    
+    @classmethod
+    def find(cls, command: str) -> List[Match]:
+        """
+        Locate every suspicious or recon pattern in an SSH command.
         
-        return detected
+        Args:
+            command: Command executed
+            
+        Returns:
+            Matches (category, pattern, offset) in order of appearance
+        """
+        return rules.ruleset('ssh').find(normalize(command))
     
     @classmethod
     def is_brute_force(cls, auth_attempts: int, threshold: int = 3) -> bool:
@@ -107,3 +113,9 @@ class SSHAttackDetector:
             'reconnaissance': 'low'
         }
         return severity_map.get(attack_type, 'medium')
+
+
+rules.register_builtin('ssh', {
+    'suspicious_command': SSHAttackDetector.SUSPICIOUS_COMMANDS,
+    'reconnaissance': SSHAttackDetector.RECON_COMMANDS,
+})
@@ -0,0 +1,202 @@
+"""
+Per-IP behaviour tracker shared by every service.
+Counts authentication attempts, distinct paths and 404 answers of each source
+IP over a sliding window, so a brute force spread over many connections (or
+services) and a directory scan are seen as a whole. State is bounded: at most
+TRACKER_MAX_IPS addresses, least recently seen evicted first, idle ones expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import config
+from core.logger import HoneypotLogger
+
+
+class _Window:
+    """
+    Event count over the last `buckets` time slots (a ring of counters).
+    Adding an event is O(1); reading the total sums a fixed number of slots.
+    """
+
+    __slots__ = ('counts', 'slots')
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.slots = [-1] * buckets       # Absolute slot each counter belongs to
+
+    def add(self, slot: int, amount: int = 1) -> None:
+        i = slot % len(self.counts)
+        if self.slots[i] != slot:         # Counter left over from an older lap: reuse it
+            self.slots[i] = slot
+            self.counts[i] = 0
+        self.counts[i] += amount
+
+    def total(self, slot: int) -> int:
+        oldest = slot - len(self.counts)
+        return sum(count for count, seen in zip(self.counts, self.slots) if seen > oldest)
+
+
+class _IPState:
+    """Windows of one source IP"""
+
+    __slots__ = ('auth', 'requests', 'not_found', 'new_paths', 'paths', 'services',
+                 'last_seen', 'alerted')
+
+    def __init__(self, buckets: int):
+        self.auth = _Window(buckets)
+        self.requests = _Window(buckets)
+        self.not_found = _Window(buckets)
+        self.new_paths = _Window(buckets)     # Paths not requested earlier in the window
+        self.paths = OrderedDict()            # path -> last slot seen, least recent first
+        self.services = set()                 # Services the auth attempts went to
+        self.last_seen = 0.0
+        self.alerted = {}                     # attack type -> slot of the last alert
+
+
+class BehaviorTracker:
+    """
+    Sliding-window counters per source IP, thread-safe (threads and the asyncio
+    services' blocking pool record events at the same time).
+
+    Every event costs O(1): one dict lookup and move in the LRU, one counter
+    bump. An alert ('brute_force', 'directory_scan') is raised at most once per
+    window and IP, while the IP stays over the threshold.
+
+    With --workers N each process has its own tracker: the kernel spreads an
+    IP's connections over the workers, so thresholds are reached per process.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, window: int = None, buckets: int = None, max_ips: int = None,
+                 max_paths: int = None):
+        self.window = window or config.TRACKER_WINDOW
+        self.buckets = buckets or config.TRACKER_BUCKETS
+        self.slot_seconds = self.window / self.buckets
+        self.max_ips = max_ips or config.TRACKER_MAX_IPS
+        self.max_paths = max_paths or config.TRACKER_MAX_PATHS
+        self._lock = threading.Lock()
+        self._ips = OrderedDict()             # ip -> _IPState, least recently seen first
+        self.counters = {'evicted': 0, 'expired': 0, 'brute_force': 0, 'directory_scan': 0}
+
+    @classmethod
+    def default(cls) -> 'BehaviorTracker':
+        """Process-wide tracker configured from config.py (created on first use)"""
+        tracker = cls._default
+        if tracker is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+                tracker = cls._default
+        return tracker
+
+    def record_auth(self, service: str, ip: str, port: int, now: float = None) -> List[str]:
+        """
+        One authentication attempt (password, Authorization header, login form).
+
+        Returns:
+            Attack types raised by this event (['brute_force'] or [])
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            slot, state = self._state(ip, now)
+            state.auth.add(slot)
+            state.services.add(service)
+            attempts = state.auth.total(slot)
+            alert = None
+            if attempts >= config.BRUTE_FORCE_THRESHOLD and self._should_alert(state, 'brute_force', slot):
+                alert = {
+                    'auth_attempts': attempts,
+                    'window_seconds': self.window,
+                    'services': sorted(state.services),
+                }
+        return self._emit(service, ip, port, 'brute_force', alert)
+
+    def record_request(self, service: str, ip: str, port: int, path: str, not_found: bool,
+                       now: float = None) -> List[str]:
+        """
+        One request for a path (HTTP, RTSP...) and whether it was answered 404.
+
+        Returns:
+            Attack types raised by this event (['directory_scan'] or [])
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            slot, state = self._state(ip, now)
+            state.requests.add(slot)
+            if not_found:
+                state.not_found.add(slot)
+            last = state.paths.get(path)
+            if last is None or last <= slot - self.buckets:
+                state.new_paths.add(slot)
+            state.paths[path] = slot
+            state.paths.move_to_end(path)
+            if len(state.paths) > self.max_paths:
+                state.paths.popitem(last=False)
+
+            alert = None
+            distinct = state.new_paths.total(slot)
+            if distinct >= config.DIRECTORY_SCAN_PATHS:
+                requests = state.requests.total(slot)
+                missing = state.not_found.total(slot)
+                ratio = missing / requests
+                if ratio >= config.DIRECTORY_SCAN_404_RATIO and self._should_alert(state, 'directory_scan', slot):
+                    alert = {
+                        'distinct_paths': distinct,
+                        'requests': requests,
+                        'not_found': missing,
+                        'not_found_ratio': round(ratio, 2),
+                        'window_seconds': self.window,
+                    }
+        return self._emit(service, ip, port, 'directory_scan', alert)
+
+    def _state(self, ip: str, now: float) -> Tuple[int, _IPState]:
+        """Slot for now and the state of ip (created, refreshed or reset). Lock held."""
+        slot = int(now // self.slot_seconds)
+        state = self._ips.get(ip)
+        if state is None or now - state.last_seen > self.window:
+            state = _IPState(self.buckets)    # New, or idle for a whole window: start over
+            self._ips[ip] = state
+        self._ips.move_to_end(ip)
+        state.last_seen = now
+
+        # Drop the least recently seen IPs: over the cap, or idle for a whole window
+        # (only the front is looked at, so this stays O(1) amortized)
+        while len(self._ips) > self.max_ips:
+            self._ips.popitem(last=False)
+            self.counters['evicted'] += 1
+        while self._ips:
+            oldest = next(iter(self._ips.values()))
+            if now - oldest.last_seen <= self.window:
+                break
+            self._ips.popitem(last=False)
+            self.counters['expired'] += 1
+        return slot, state
+
+    def _should_alert(self, state: _IPState, attack_type: str, slot: int) -> bool:
+        """At most one alert per attack type and window. Lock held."""
+        last = state.alerted.get(attack_type)
+        if last is not None and last > slot - self.buckets:
+            return False
+        state.alerted[attack_type] = slot
+        self.counters[attack_type] += 1
+        return True
+
+    def _emit(self, service: str, ip: str, port: int, attack_type: str,
+              details: Optional[Dict]) -> List[str]:
+        """Log an alert (outside the lock: logging does I/O)"""
+        if details is None:
+            return []
+        details['severity'] = 'high' if attack_type == 'brute_force' else 'medium'
+        HoneypotLogger.log_attack(service, ip, port, attack_type, details)
+        return [attack_type]
+
+    def stats(self) -> Dict:
+        """IPs tracked now, evictions and alerts raised (for /api/stats)"""
+        with self._lock:
+            return {'tracked_ips': len(self._ips), 'max_ips': self.max_ips,
+                    'window_seconds': self.window, **self.counters}
@@ -23,52 +23,176 @@ Educational honeypot with modular architecture.
 # Importamos herramientas:
 # 'time': para controlar tiempos y hacer esperas.
 # 'threading': para poder hacer varias cosas a la vez (multitarea).
+# 'argparse': para leer opciones de la línea de comandos (--workers N).
+import os
 import time
+import signal
 import threading
+import argparse
 
 # Importamos nuestros servicios falsos (Honeypot) desde la carpeta 'services'.
 # HTTPService: Se hará pasar por un servidor web.
 # SSHService: Se hará pasar por una terminal remota.
-from services import HTTPService, SSHService
+# AsyncHTTPService: El mismo servidor web, pero sobre asyncio (sin un hilo por cliente).
+from services import HTTPService, AsyncHTTPService, SSHService, RTSPService, AsyncRTSPService
+from services.mux import MuxService
+from services.management_api import ManagementServer
+from responses.endpoint_manager import HTTPEndpoints
+from detection.rules import reload_rules
+from core.supervisor import Supervisor, WorkerSpec
+import config
 
-def start_honeypot():
-    """Función principal que arranca todo el sistema."""
-    
+
+def print_banner():
+    """Cabecera de bienvenida (solo una vez, aunque haya varios procesos)"""
     print("=" * 60)
     print("🐝 Alucard Educational Honeypot")
     print("=" * 60)
     print("[!] EDUCATIONAL USE ONLY - See README for disclaimers")
     print("=" * 60)
-    
+
+
+def _start_in_thread(service) -> list:
+    """Arranca service.start() en un hilo de fondo y lo devuelve en una lista"""
+    threading.Thread(target=service.start, daemon=True).start()
+    return [service]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LANZADORES: cada uno crea UN servicio, lo arranca sin bloquear y lo devuelve.
+# Son funciones de primer nivel para que el supervisor pueda usarlas en
+# procesos hijos (multiprocessing 'spawn' necesita poder importarlas).
+# ═══════════════════════════════════════════════════════════════════════════
+
+def launch_http() -> list:
+    """HTTP Service. Modelo por defecto: asyncio; HONEYPOT_SERVICE_MODE=thread = un hilo por cliente."""
+    http_class = AsyncHTTPService if config.SERVICE_MODE == 'asyncio' else HTTPService
+    return _start_in_thread(http_class())
+
+
+def launch_https() -> list:
+    """HTTPS Service (solo si HONEYPOT_HTTPS=1): mismo servidor web, con TLS y certificado de la persona"""
+    http_class = AsyncHTTPService if config.SERVICE_MODE == 'asyncio' else HTTPService
+    try:
+        return _start_in_thread(http_class(port=config.HTTPS_PORT, use_tls=True))
+    except Exception as e:
+        print(f"[!] HTTPS Service Error: {e}")
+        return []
+
+
+def launch_ssh() -> list:
+    """SSH Service (Paramiko)"""
+    try:
+        return _start_in_thread(SSHService())
+    except Exception as e:
+        print(f"[!] SSH Service Error: {e}")
+        return []
+
+
+def launch_rtsp() -> list:
+    """RTSP Camera Service (solo si HONEYPOT_RTSP=1)"""
+    rtsp_class = AsyncRTSPService if config.SERVICE_MODE == 'asyncio' else RTSPService
+    return _start_in_thread(rtsp_class(port=config.RTSP_PORT))
+
+
+def launch_mux() -> list:
+    """Multiplexor de puertos (solo si HONEYPOT_MUX=1): muchos puertos, un accept, protocolo olfateado"""
+    return _start_in_thread(MuxService())
+
+
+def reload_endpoints() -> dict:
+    """Recarga en caliente de perfiles, profiles.json y rules.json en ESTE proceso"""
+    rules = reload_rules()
+    routes = HTTPEndpoints.reload()
+    print(f"[*] Endpoints recargados: {routes}")
+    print(f"[*] Reglas de detección recargadas: {rules}")
+    return {**routes, 'rules': rules}
+
+
+def request_supervisor_reload() -> str:
+    """Desde el proceso de gestión: el supervisor es el padre, le mandamos SIGHUP"""
+    os.kill(os.getppid(), signal.SIGHUP)
+    return "enviado a todos los procesos"
+
+
+def launch_management(status=None) -> list:
+    """API de gestión (solo localhost). 'status' = salud de los procesos hijos"""
+    management = ManagementServer(port=config.MANAGEMENT_PORT, status=status,
+                                  reload=request_supervisor_reload)
+    management.start()
+    return [management]
+
+
+def enabled_launchers() -> dict:
+    """Servicios de red activos según config.py"""
+    launchers = {'http': launch_http, 'ssh': launch_ssh}
+    if config.HTTPS_ENABLED:
+        launchers['https'] = launch_https
+    if config.RTSP_ENABLED:
+        launchers['rtsp'] = launch_rtsp
+    if config.MUX_ENABLED:
+        launchers['mux'] = launch_mux
+    return launchers
+
+
+def launch_services() -> list:
+    """Todos los servicios de red en ESTE proceso (cada uno en su hilo)."""
     services = []
+    for launcher in enabled_launchers().values():
+        services.extend(launcher())
+    return services
 
-    print("[*] Arrancando servicios...")
+
+def start_honeypot():
+    """Función principal que arranca todo el sistema (un solo proceso)."""
     
-    # 1. HTTP Service
-    http_service = HTTPService()
-    http_thread = threading.Thread(target=http_service.start, daemon=True)
-    http_thread.start()
-    services.append(http_service)
+    print_banner()
+    print("[*] Arrancando servicios...")
     
-    # 2. SSH Service
+    services = launch_services()
+
+    # API de gestión (solo localhost): /api/stats muestra activas, en cola y cortadas
+    management = ManagementServer(port=config.MANAGEMENT_PORT, services=list(services),
+                                  reload=reload_endpoints)
     try:
-        ssh_service = SSHService()
-        ssh_thread = threading.Thread(target=ssh_service.start, daemon=True)
-        ssh_thread.start()
-        services.append(ssh_service)
+        management.start()
+        services.append(management)
     except Exception as e:
-        print(f"[!] SSH Service Error: {e}")
+        print(f"[!] Management API Error: {e}")
 
     print("[*] ¡Servicios iniciados!")
+    print(f"[*] Modo de concurrencia: {config.SERVICE_MODE}")
     print("[*] HTTP: Puerto 8080")
+    if config.HTTPS_ENABLED:
+        print(f"[*] HTTPS: Puerto {config.HTTPS_PORT}")
     print("[*] SSH: Puerto 2222")
     print("[*] Logs: honeypot.log")
+    print(f"[*] Estadísticas: http://127.0.0.1:{config.MANAGEMENT_PORT}/api/stats")
+    print("[*] Recargar perfiles: kill -HUP <pid> o POST /api/reload")
     print("=" * 60)
     print("[*] Presiona Ctrl+C para detener")
     
+    # SIGHUP solo levanta una bandera: la recarga la hace este bucle, nunca
+    # los hilos que atienden a los atacantes (bandera simple, no un Event:
+    # un manejador de señal no debe esperar por un lock)
+    reload_requested = False
+    
+    def on_sighup(signum, frame):
+        nonlocal reload_requested
+        reload_requested = True
+    
+    if hasattr(signal, 'SIGHUP'):  # No existe en Windows
+        signal.signal(signal.SIGHUP, on_sighup)
+    
     try:
         while True:
             time.sleep(1)
+            if reload_requested:
+                reload_requested = False
+                try:
+                    reload_endpoints()
+                except Exception as e:
+                    print(f"[!] Recarga fallida, se mantienen los perfiles actuales: {e}")
             
     except KeyboardInterrupt:
         print("\n[*] Apagando honeypot ordenadamente...")
@@ -77,5 +201,51 @@ def start_honeypot():
                 s.stop()
         print("[*] ¡Honeypot detenido!")
 
+
+def start_supervised(workers: int, isolate: bool):
+    """
+    Modo multiproceso, vigilado por un supervisor (pings de salud + reinicio con backoff).
+    - Sin --isolate: N procesos, cada uno con TODOS los servicios de red.
+    - Con --isolate: cada servicio en SUS PROPIOS procesos (N por servicio) y la API
+      de gestión en otro. Un fallo de Paramiko o una oleada de fuerza bruta SSH
+      (CPU) ya no afecta a la latencia HTTP: cada proceso tiene su propio GIL.
+    El kernel reparte las conexiones entre procesos del mismo puerto (SO_REUSEPORT).
+    """
+    print_banner()
+    mode = "un proceso por servicio" if isolate else "todos los servicios por proceso"
+    print(f"[*] Modo supervisado: {workers} worker(s), {mode} (SO_REUSEPORT)")
+    print(f"[*] Modo de concurrencia: {config.SERVICE_MODE}")
+    
+    supervisor = Supervisor()
+    if isolate:
+        for name, launcher in enabled_launchers().items():
+            for i in range(workers):
+                supervisor.add(WorkerSpec(f"{name}-{i}", launcher))
+    else:
+        for i in range(workers):
+            supervisor.add(WorkerSpec(f"worker-{i}", launch_services))
+    supervisor.add(WorkerSpec("management", launch_management, (supervisor.status,)))
+    
+    print(f"[*] Estadísticas: http://127.0.0.1:{config.MANAGEMENT_PORT}/api/stats")
+    print("[*] Recargar perfiles: kill -HUP <pid> o POST /api/reload")
+    print("[*] Presiona Ctrl+C para detener")
+    supervisor.run()  # Bloquea hasta Ctrl+C / SIGTERM; reinicia procesos caídos
+    print("[*] ¡Honeypot detenido!")
+
+
 if __name__ == "__main__":
-    start_honeypot()
+    parser = argparse.ArgumentParser(description="Alucard Educational Honeypot")
+    parser.add_argument(
+        '--workers', type=int, default=config.WORKERS,
+        help="Procesos por servicio (SO_REUSEPORT). 1 = un solo proceso (por defecto)"
+    )
+    parser.add_argument(
+        '--isolate', action='store_true', default=config.ISOLATE_SERVICES,
+        help="Cada servicio (HTTP, SSH, RTSP, gestión) en su propio proceso supervisado"
+    )
+    args = parser.parse_args()
+    
+    if args.workers > 1 or args.isolate:
+        start_supervised(max(1, args.workers), args.isolate)
+    else:
+        start_honeypot()
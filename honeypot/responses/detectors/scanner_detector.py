@@ -7,6 +7,9 @@ del User-Agent. Devuelve respuestas trampa específicas para cada tipo.
 ═══════════════════════════════════════════════════════════════════════════
 """
 
+from detection.matcher import PatternMatcher
+
+
 class ScannerDetector:
     """
     ┌─────────────────────────────────────────────────────────────────────────┐
@@ -40,6 +43,14 @@ class ScannerDetector:
         'masscan': 'Port Scanner',
         'zap': 'OWASP ZAP Scanner',
     }
+
+    # ┌─────────────────────────────────────────────────────────────────────────┐
+    # │ AUTÓMATA DE FIRMAS                                                      │
+    # ├─────────────────────────────────────────────────────────────────────────┤
+    # │ Todas las firmas compiladas UNA vez (categoría = herramienta): el       │
+    # │ User-Agent se recorre una sola vez, haya 12 firmas o 12.000             │
+    # └─────────────────────────────────────────────────────────────────────────┘
+    MATCHER = PatternMatcher({signature: [signature] for signature in SCANNER_SIGNATURES})
     
     @classmethod
     def detect(cls, user_agent: str) -> str:
@@ -59,8 +70,8 @@ class ScannerDetector:
         if not user_agent:
             return None
         
-        # Convertir a minúsculas para comparación case-insensitive
-        ua_lower = user_agent.lower()
+        # Herramientas cuya firma aparece (el autómata ya ignora mayúsculas)
+        tools = cls.MATCHER.categories(user_agent)
         
         # ┌─────────────────────────────────────────────────────────────────┐
         # │ TRAMPA ESPECIAL 1: SQLMap                                       │
@@ -68,7 +79,7 @@ class ScannerDetector:
         # │ SQLMap busca SQL Injection, le damos un error SQL falso         │
         # │ para que piense que encontró una vulnerabilidad                 │
         # └─────────────────────────────────────────────────────────────────┘
-        if 'sqlmap' in ua_lower:
+        if 'sqlmap' in tools:
             return cls._sqlmap_trap()
         
         # ┌─────────────────────────────────────────────────────────────────┐
@@ -77,9 +88,8 @@ class ScannerDetector:
         # │ Para otros scanners, simulamos un WAF (firewall) bloqueándolos  │
         # │ Esto hace que el atacante piense que hay seguridad activa       │
         # └─────────────────────────────────────────────────────────────────┘
-        for scanner_signature in cls.SCANNER_SIGNATURES:
-            if scanner_signature in ua_lower:
-                return cls._waf_block()
+        if tools:
+            return cls._waf_block()
         
         # No detectamos nada sospechoso
         return None
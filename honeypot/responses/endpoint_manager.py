@@ -17,16 +17,8 @@ ARQUITECTURA:
 # IMPORTS
 # ═══════════════════════════════════════════════════════════════════════════
 
-# Importar todos los perfiles de endpoints
-from .profiles import (
-    GENERIC_ENDPOINTS,
-    WORDPRESS_ENDPOINTS,
-    API_ENDPOINTS,
-    DATABASE_ENDPOINTS,
-    IOT_ENDPOINTS,
-    IOT_TAPO_ENDPOINTS,
-    DEVOPS_ENDPOINTS,
-)
+# Importar todos los perfiles de endpoints (el paquete entero: se puede recargar)
+from . import profiles as profile_modules
 
 # NOTA: COMMON_ENDPOINTS ya no existe como entidad separada
 # Los endpoints comunes (/, /robots.txt, etc.) ahora están integrados
@@ -35,6 +27,131 @@ from .profiles import (
 # Importar detector de scanners
 from .detectors import ScannerDetector
 
+# Constructor de respuestas con headers realistas (para las páginas de error)
+from .utils.http_builder import HTTPResponseBuilder
+
+# Respuestas pre-codificadas a bytes (se preparan una vez, se envían muchas)
+from .utils.prepared_response import PreparedResponse
+
+# Tabla de rutas compilada (exactas + trie de prefijos)
+from .route_table import RouteTable
+
+import importlib
+import json
+import os
+import sys
+import threading
+from functools import lru_cache
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PERFILES (profiles.json): se leen y se compilan UNA vez al arrancar
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Ruta al archivo JSON (subimos un nivel desde responses/)
+PROFILES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles.json')
+
+
+def load_profiles(json_path: str = PROFILES_FILE):
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ CARGAR PALABRAS CLAVE DE CADA PERFIL                                    │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ RETORNA: {perfil: [keywords]} o None si el JSON no se pudo leer         │
+    │          (None = Fail Open: se muestra todo)                            │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    try:
+        with open(json_path, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[!] Error loading profiles.json: {e}")
+        return None
+
+
+def build_route_tables(endpoints: dict, profiles) -> dict:
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ UNA TABLA DE RUTAS POR PERFIL                                           │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ LÓGICA:                                                                  │
+    │   1. 'all' → tabla con TODOS los endpoints                              │
+    │   2. Cada perfil → solo las rutas que contienen alguna de sus keywords  │
+    │      (ej: 'wordpress' → /wp-admin, /wp-login.php, /xmlrpc.php...)       │
+    │                                                                          │
+    │ Así filtrar por perfil no cuesta nada por petición: ya está hecho.      │
+    │ RETORNA: {'all': RouteTable, perfil: RouteTable, ..., None: fallback}   │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    everything = RouteTable(endpoints)
+    tables = {'all': everything}
+    for profile, keywords in (profiles or {}).items():
+        tables[profile] = everything.filtered(
+            lambda path, keywords=tuple(keywords): _path_in_profile(path, keywords)
+        )
+    # Clave None = tabla para un perfil desconocido: todo si profiles.json no
+    # se pudo leer (Fail Open), nada (todo 404) si el perfil no existe
+    tables[None] = everything if profiles is None else RouteTable({})
+    return tables
+
+
+def _path_in_profile(path: str, keywords: tuple) -> bool:
+    """¿Contiene la ruta ALGUNA de las palabras clave del perfil?"""
+    return any(keyword in path for keyword in keywords)
+
+
+def merge_endpoints(profiles) -> dict:
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ DICCIONARIO MAESTRO DE ENDPOINTS                                        │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ Fusiona TODOS los perfiles en un solo diccionario                       │
+    │ Usa el operador ** para "desempaquetar" cada diccionario                │
+    │                                                                          │
+    │ EJEMPLO: {**dict1, **dict2} = {key1: val1, key2: val2, ...}             │
+    │ 'profiles' es el paquete profiles/ (recién importado o recargado)       │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    return {
+        **profiles.GENERIC_ENDPOINTS,     # Servidor básico (incluye common apache_default)
+        **profiles.WORDPRESS_ENDPOINTS,   # WordPress (incluye common corporate)
+        **profiles.API_ENDPOINTS,         # API REST (incluye common apache_default)
+        **profiles.DATABASE_ENDPOINTS,    # Herramientas de BBDD
+        **profiles.IOT_ENDPOINTS,         # Dispositivos IoT (Route TP-Link)
+        **profiles.IOT_TAPO_ENDPOINTS,    # Cámaras Tapo C200
+        **profiles.DEVOPS_ENDPOINTS,      # Fugas de configuración
+        **profiles.LURE_ENDPOINTS,        # Backups / firmware enormes (por trozos)
+    }
+
+
+def _reimport_profiles():
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ VOLVER A IMPORTAR profiles/ DESDE DISCO                                 │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ Se quitan de sys.modules el paquete y TODOS sus submódulos (common/,    │
+    │ iot_helpers...) y se importa de nuevo: así se ejecutan en el orden de   │
+    │ dependencias correcto. Si el código nuevo falla (ej: error de sintaxis) │
+    │ se restauran los módulos viejos y se propaga el error.                  │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    name = profile_modules.__name__
+    old = {key: module for key, module in sys.modules.items()
+           if key == name or key.startswith(name + '.')}
+    for key in old:
+        del sys.modules[key]
+    try:
+        return importlib.import_module(name)
+    except Exception:
+        for key in [k for k in sys.modules if k == name or k.startswith(name + '.')]:
+            del sys.modules[key]
+        sys.modules.update(old)
+        raise
+
+
+# Una recarga (o add_endpoint) a la vez; las lecturas nunca esperan
+_reload_lock = threading.Lock()
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CLASE PRINCIPAL
@@ -53,64 +170,90 @@ class HTTPEndpoints:
     │   3. Filtrar endpoints según el perfil activo                           │
     │   4. Normalizar rutas (quitar parámetros)                               │
     │   5. Buscar y devolver la respuesta apropiada                           │
+    │   6. Recargar perfiles y profiles.json en caliente (reload)             │
     └─────────────────────────────────────────────────────────────────────────┘
     """
     
+    # Todos los perfiles fusionados (ver merge_endpoints)
+    ENDPOINTS = merge_endpoints(profile_modules)
+    
+    # Endpoints añadidos con add_endpoint(): sobreviven a las recargas
+    EXTRA_ENDPOINTS = {}
+    
+    # ┌─────────────────────────────────────────────────────────────────────────┐
+    # │ RESPUESTA POR DEFECTO (404 Not Found)                                   │
+    # ├─────────────────────────────────────────────────────────────────────────┤
+    # │ Se devuelve cuando no encontramos la ruta solicitada                    │
+    # └─────────────────────────────────────────────────────────────────────────┘
+    NOT_FOUND = 'HTTP/1.1 404 Not Found\r\nContent-Type: text/html\r\n\r\n<html><body><h1>404 Not Found</h1><p>The requested URL was not found on this server.</p></body></html>'
+    
     # ┌─────────────────────────────────────────────────────────────────────────┐
-    # │ DICCIONARIO MAESTRO DE ENDPOINTS                                        │
+    # │ TABLAS DE RUTAS COMPILADAS (una por perfil)                             │
     # ├─────────────────────────────────────────────────────────────────────────┤
-    # │ Fusiona TODOS los perfiles en un solo diccionario                       │
-    # │ Usa el operador ** para "desempaquetar" cada diccionario                │
+    # │ Se construyen UNA vez al arrancar a partir de ENDPOINTS y profiles.json:│
+    # │   - respuestas fijas ya en bytes (PreparedResponse, compartidas)        │
+    # │   - trie de segmentos para los prefijos (/api/v1/users/123)             │
+    # │ Los endpoints que son funciones se generan al pedirlos y se cachean    │
+    # │ (LazyResponse: TTL DYNAMIC_RESPONSE_TTL o el de @render_cache)          │
     # │                                                                          │
-    # │ EJEMPLO: {**dict1, **dict2} = {key1: val1, key2: val2, ...}             │
+    # │ ROUTE_TABLES es la ÚNICA referencia que lee el camino caliente: una     │
+    # │ recarga construye el juego nuevo aparte y lo cambia de una asignación   │
     # └─────────────────────────────────────────────────────────────────────────┘
-    ENDPOINTS = {
-        **GENERIC_ENDPOINTS,     # Servidor básico (incluye common apache_default)
-        **WORDPRESS_ENDPOINTS,   # WordPress (incluye common corporate)
-        **API_ENDPOINTS,         # API REST (incluye common apache_default)
-        **DATABASE_ENDPOINTS,    # Herramientas de BBDD
-        **IOT_ENDPOINTS,         # Dispositivos IoT (Route TP-Link)
-        **IOT_TAPO_ENDPOINTS,    # Cámaras Tapo C200
-        **DEVOPS_ENDPOINTS,      # Fugas de configuración
-    }
+    PROFILES = load_profiles()
+    ROUTE_TABLES = build_route_tables(ENDPOINTS, PROFILES)
+    ROUTES = ROUTE_TABLES['all']
+    NOT_FOUND_RESPONSE = PreparedResponse.from_raw(NOT_FOUND)
     
     # ┌─────────────────────────────────────────────────────────────────────────┐
-    # │ RESPUESTA POR DEFECTO (404 Not Found)                                   │
+    # │ PÁGINAS DE ERROR DE PROTOCOLO (400, 408, 413, 431...)                   │
     # ├─────────────────────────────────────────────────────────────────────────┤
-    # │ Se devuelve cuando no encontramos la ruta solicitada                    │
+    # │ Textos idénticos a los de Apache: así el honeypot no se delata cuando   │
+    # │ un escáner manda peticiones rotas, enormes o lentas a propósito         │
     # └─────────────────────────────────────────────────────────────────────────┘
-    NOT_FOUND = 'HTTP/1.1 404 Not Found\r\nContent-Type: text/html\r\n\r\n<html><body><h1>404 Not Found</h1><p>The requested URL was not found on this server.</p></body></html>'
+    ERROR_MESSAGES = {
+        '400': 'Your browser sent a request that this server could not understand.<br />',
+        '408': "Server timeout waiting for the HTTP request from the client.",
+        '413': 'The requested resource does not allow request data with the requested method '
+               'or the amount of data provided in the request exceeds the capacity limit.',
+        '431': 'Your browser sent a request that this server could not understand.<br />'
+               'Size of a request header field exceeds server limit.',
+    }
     
     # ═══════════════════════════════════════════════════════════════════════════
     # MÉTODO PRINCIPAL: get_response()
     # ═══════════════════════════════════════════════════════════════════════════
     
     @classmethod
-    def get_response(cls, path: str, user_agent: str = None) -> str:
+    def get_response(cls, path: str, user_agent: str = None) -> PreparedResponse:
         """
         ┌─────────────────────────────────────────────────────────────────────────┐
         │ MÉTODO PRINCIPAL: El Camarero del Honeypot                              │
         ├─────────────────────────────────────────────────────────────────────────┤
         │ QUÉ HACE: Decide qué respuesta HTTP enviar al atacante                  │
         │ PASOS:                                                                   │
-        │   1. Verifica si la ruta está permitida por el perfil activo            │
+        │   1. Ruta fuera del perfil activo → 404 (ANTES que nada: la trampa de   │
+        │      escáneres tampoco sale en rutas que la persona no sirve)          │
         │   2. Detecta herramientas de hacking (SQLMap, Nmap, etc.)               │
         │   3. Normaliza la ruta (quita parámetros)                               │
-        │   4. Busca la respuesta correspondiente                                 │
+        │   4. Busca la respuesta correspondiente en esa tabla                    │
         │   5. Si no encuentra nada, devuelve 404                                 │
+        │                                                                          │
+        │ RETORNA: PreparedResponse (bytes listos para enviar)                    │
         └─────────────────────────────────────────────────────────────────────────┘
         """
-        import config
-        profile = getattr(config, 'HONEYPOT_PROFILE', 'all')
-        
         # ┌─────────────────────────────────────────────────────────────────────┐
         # │ PASO 0: Filtrado por Perfil                                         │
         # ├─────────────────────────────────────────────────────────────────────┤
-        # │ Verifica si esta ruta está permitida en el perfil actual            │
-        # │ Ejemplo: Si perfil='wordpress', solo muestra rutas de WordPress     │
+        # │ La tabla del perfil actual solo contiene sus rutas                  │
+        # │ Ejemplo: Si perfil='wordpress', solo hay rutas de WordPress         │
+        # │ Una ruta ajena al perfil da 404 aunque la pida SQLMap: si no, toda  │
+        # │ persona enseñaría la trampa genérica de escáneres                   │
         # └─────────────────────────────────────────────────────────────────────┘
+        import config
+        profile = getattr(config, 'HONEYPOT_PROFILE', 'all')
         if not cls._is_path_allowed(path, profile):
-             return cls.NOT_FOUND
+            return cls.NOT_FOUND_RESPONSE
+        routes = cls.routes(profile)
 
         # ┌─────────────────────────────────────────────────────────────────────┐
         # │ PASO 1: Detección de Herramientas de Hacking                        │
@@ -120,7 +263,7 @@ class HTTPEndpoints:
         # └─────────────────────────────────────────────────────────────────────┘
         scanner_response = ScannerDetector.detect(user_agent)
         if scanner_response:
-            return scanner_response
+            return _prepare_fixed(scanner_response)
 
         # ┌─────────────────────────────────────────────────────────────────────┐
         # │ PASO 2: Normalización de la Ruta                                    │
@@ -133,22 +276,104 @@ class HTTPEndpoints:
         # ┌─────────────────────────────────────────────────────────────────────┐
         # │ PASO 3: Búsqueda de Respuesta                                       │
         # ├─────────────────────────────────────────────────────────────────────┤
-        # │ Busca la respuesta en el diccionario ENDPOINTS                      │
+        # │ Busca la ruta registrada en el diccionario ENDPOINTS                │
         # │ Primero intenta coincidencia exacta, luego pattern matching         │
         # └─────────────────────────────────────────────────────────────────────┘
-        response = cls._find_matching_endpoint(clean_path)
+        endpoint = cls._find_matching_endpoint(clean_path, routes)
         
         # ┌─────────────────────────────────────────────────────────────────────┐
         # │ PASO 4: Respuesta Final                                             │
         # ├─────────────────────────────────────────────────────────────────────┤
         # │ Si encontramos algo, lo devolvemos. Si no, 404 Not Found            │
         # └─────────────────────────────────────────────────────────────────────┘
-        return response if response else cls.NOT_FOUND
+        if endpoint is None:
+            return cls.NOT_FOUND_RESPONSE
+        return routes.response(endpoint)
+    
+    @classmethod
+    def get_error_response(cls, status: str) -> PreparedResponse:
+        """
+        ┌─────────────────────────────────────────────────────────────────────────┐
+        │ RESPUESTA DE ERROR DE PROTOCOLO                                         │
+        ├─────────────────────────────────────────────────────────────────────────┤
+        │ QUÉ HACE: Página de error estilo Apache para peticiones que no se       │
+        │           pudieron leer (mal formadas, demasiado grandes o lentas)      │
+        │                                                                          │
+        │ EJEMPLO: "408 Request Timeout" → página "Request Timeout" de Apache     │
+        └─────────────────────────────────────────────────────────────────────────┘
+        """
+        return _prepare_error(status, cls.ERROR_MESSAGES.get(status.split(' ', 1)[0], cls.ERROR_MESSAGES['400']))
     
     # ═══════════════════════════════════════════════════════════════════════════
     # MÉTODOS AUXILIARES (Fragmentación del código)
     # ═══════════════════════════════════════════════════════════════════════════
     
+    @classmethod
+    def routes(cls, profile: str = None) -> RouteTable:
+        """
+        ┌─────────────────────────────────────────────────────────────────────────┐
+        │ TABLA DE RUTAS DE UN PERFIL (por defecto, el activo en config)          │
+        ├─────────────────────────────────────────────────────────────────────────┤
+        │ Un acceso a diccionario. Si profiles.json no se pudo leer se usa la     │
+        │ tabla completa (Fail Open); un perfil que no existe no tiene rutas      │
+        └─────────────────────────────────────────────────────────────────────────┘
+        """
+        if profile is None:
+            import config
+            profile = getattr(config, 'HONEYPOT_PROFILE', 'all')
+        # Una sola lectura de ROUTE_TABLES: aunque llegue una recarga, esta
+        # petición termina entera con el juego de tablas que vio al empezar
+        tables = cls.ROUTE_TABLES
+        return tables.get(profile, tables[None])
+    
+    @classmethod
+    def _is_path_allowed(cls, path: str, profile: str) -> bool:
+        """
+        ┌─────────────────────────────────────────────────────────────────────────┐
+        │ FILTRO DE PERFILES (sobre la ruta tal cual llega, como siempre)         │
+        ├─────────────────────────────────────────────────────────────────────────┤
+        │   1. Perfil 'all' o profiles.json ilegible → permitir TODO (Fail Open)  │
+        │   2. Alguna keyword del perfil en la ruta → permitir                    │
+        │   3. Si no (o el perfil no existe) → bloquear (404)                     │
+        │ Las keywords ya están en memoria (PROFILES): no se lee ningún fichero   │
+        └─────────────────────────────────────────────────────────────────────────┘
+        """
+        profiles = cls.PROFILES
+        if profile == 'all' or profiles is None:
+            return True
+        return _path_in_profile(path, profiles.get(profile, ()))
+
+    @classmethod
+    def reload(cls) -> dict:
+        """
+        ┌─────────────────────────────────────────────────────────────────────────┐
+        │ RECARGA EN CALIENTE (SIGHUP o POST /api/reload)                         │
+        ├─────────────────────────────────────────────────────────────────────────┤
+        │ PASOS (fuera del camino caliente, las peticiones siguen sirviéndose):   │
+        │   1. Volver a importar profiles/ (personas editadas en disco)           │
+        │   2. Volver a leer profiles.json                                        │
+        │   3. Construir TODAS las tablas nuevas (bytes preparados incluidos)     │
+        │   4. Cambiarlas de golpe: una asignación de ROUTE_TABLES                │
+        │                                                                          │
+        │ Las peticiones en curso terminan con la tabla vieja. Si el código       │
+        │ nuevo falla, se lanza la excepción y se sigue con las tablas actuales.  │
+        │ RETORNA: {perfil: número de rutas} del juego nuevo                      │
+        └─────────────────────────────────────────────────────────────────────────┘
+        """
+        global profile_modules
+        with _reload_lock:
+            modules = _reimport_profiles()
+            endpoints = {**merge_endpoints(modules), **cls.EXTRA_ENDPOINTS}
+            profiles = load_profiles()
+            tables = build_route_tables(endpoints, profiles)
+
+            profile_modules = modules
+            cls.ENDPOINTS = endpoints
+            cls.PROFILES = profiles
+            cls.ROUTES = tables['all']
+            cls.ROUTE_TABLES = tables   # ← el cambio que ven las peticiones nuevas
+        return {profile: len(table) for profile, table in tables.items() if profile is not None}
+    
     @staticmethod
     def _normalize_path(path: str) -> str:
         """
@@ -172,34 +397,26 @@ class HTTPEndpoints:
         return clean_path
     
     @classmethod
-    def _find_matching_endpoint(cls, clean_path: str) -> str:
+    def _find_matching_endpoint(cls, clean_path: str, routes: RouteTable = None) -> str:
         """
         ┌─────────────────────────────────────────────────────────────────────────┐
         │ BUSCADOR DE ENDPOINTS                                                   │
         ├─────────────────────────────────────────────────────────────────────────┤
-        │ QUÉ HACE: Busca la respuesta HTTP correspondiente a la ruta             │
+        │ QUÉ HACE: Busca el endpoint registrado que corresponde a la ruta        │
         │ ESTRATEGIA:                                                              │
         │   1. Coincidencia EXACTA: /admin → /admin                               │
-        │   2. Pattern Matching: /api/v1/users/123 → /api/v1/users               │
+        │   2. Prefijo más largo: /api/v1/users/123 → /api/v1/users              │
         │                                                                          │
-        │ RETORNA: Respuesta HTTP si encuentra, None si no encuentra              │
+        │ RETORNA: La clave de ENDPOINTS si encuentra, None si no encuentra       │
         └─────────────────────────────────────────────────────────────────────────┘
         """
-        # ESTRATEGIA 1: Coincidencia Exacta
+        # ESTRATEGIA 1: Coincidencia Exacta (un acceso a diccionario)
         # Ejemplo: Si pide "/admin", buscamos exactamente "/admin"
-        if clean_path in cls.ENDPOINTS:
-            return cls.ENDPOINTS[clean_path]
-        
-        # ESTRATEGIA 2: Pattern Matching (para APIs con IDs)
+        #
+        # ESTRATEGIA 2: Prefijo más largo (para APIs con IDs), en el trie
         # Ejemplo: /api/v1/users/123 coincide con /api/v1/users
-        # Útil para APIs RESTful donde hay IDs dinámicos
-        for endpoint_pattern, response in cls.ENDPOINTS.items():
-            # Si la ruta solicitada empieza con el patrón del endpoint
-            if clean_path.startswith(endpoint_pattern + '/'):
-                return response
-        
-        # No encontramos nada
-        return None
+        # Cuesta lo mismo con 50 endpoints que con 5000: solo depende de la ruta
+        return (routes or cls.routes()).match(clean_path)
     
     # ═══════════════════════════════════════════════════════════════════════════
     # MÉTODOS AUXILIARES (Compatibilidad)
@@ -215,7 +432,15 @@ class HTTPEndpoints:
         │ Útil para testing o personalización dinámica                            │
         └─────────────────────────────────────────────────────────────────────────┘
         """
-        cls.ENDPOINTS[path] = response
+        with _reload_lock:
+            cls.EXTRA_ENDPOINTS[path] = response
+            cls.ENDPOINTS[path] = response
+            cls.ROUTES.add(path, response)
+            # También en la tabla de cada perfil al que pertenezca la ruta
+            shared = cls.ROUTES.prepared.get(path) or cls.ROUTES.lazy.get(path)
+            for profile, keywords in (cls.PROFILES or {}).items():
+                if _path_in_profile(path, tuple(keywords)):
+                    cls.ROUTE_TABLES[profile].add(path, response, shared)
     
     @classmethod
     def get_all_paths(cls) -> list:
@@ -224,59 +449,33 @@ class HTTPEndpoints:
         │ LISTAR TODOS LOS ENDPOINTS ACTIVOS                                      │
         ├─────────────────────────────────────────────────────────────────────────┤
         │ Devuelve lista de rutas disponibles según el perfil activo              │
-        │ Útil para debugging y logging                                           │
+        │ (la misma tabla que usa get_response). Útil para debugging y logging    │
         └─────────────────────────────────────────────────────────────────────────┘
         """
-        import config
-        profile = getattr(config, 'HONEYPOT_PROFILE', 'all')
-        return [p for p in cls.ENDPOINTS.keys() if cls._is_path_allowed(p, profile)]
+        return cls.routes().paths()
 
-    @staticmethod
-    def _is_path_allowed(path: str, profile: str) -> bool:
-        """
-        ┌─────────────────────────────────────────────────────────────────────────┐
-        │ FILTRO DE PERFILES                                                      │
-        ├─────────────────────────────────────────────────────────────────────────┤
-        │ Define qué rutas están activas para cada perfil de honeypot             │
-        │                                                                          │
-        │ LÓGICA:                                                                  │
-        │   1. Si perfil='all' → Permitir TODO                                    │
-        │   2. Si es ruta común → Siempre permitir                                │
-        │   3. Si coincide con keywords del perfil → Permitir                     │
-        │   4. Si no coincide → Bloquear (404)                                    │
-        └─────────────────────────────────────────────────────────────────────────┘
-        """
-        
-        # PERFIL 'ALL' (Cazamos todo)
-        if profile == 'all':
-            return True
 
-        # NOTA: Ya no verificamos COMMON_PATHS porque los endpoints comunes
-        # ahora están integrados en cada perfil. Cada perfil incluye sus propios
-        # endpoints comunes (/, /robots.txt, /favicon.ico, etc.)
+# ═══════════════════════════════════════════════════════════════════════════
+# CACHÉS DE RESPUESTAS FIJAS QUE NO VIENEN DE ENDPOINTS
+# ═══════════════════════════════════════════════════════════════════════════
 
-        # 1. Cargar perfiles desde profiles.json
-        import json
-        import os
-        
-        # Ruta al archivo JSON (subimos un nivel desde responses/)
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        json_path = os.path.join(base_dir, 'profiles.json')
-        
-        try:
-            with open(json_path, 'r') as f:
-                profiles = json.load(f)
-        except Exception as e:
-            # Fallback seguro si falla el JSON
-            print(f"[!] Error loading profiles.json: {e}")
-            return True  # Fail Open (mostrar todo si hay error)
-
-        # 3. Verificar si la ruta pertenece al perfil activo
-        # Buscamos si ALGUNA de las palabras clave del perfil está en la ruta
-        keywords = profiles.get(profile, [])
-        for keyword in keywords:
-            if keyword in path:
-                return True
-                
-        # 4. Si no encaja, ocultar (return False)
-        return False
+@lru_cache(maxsize=32)
+def _prepare_fixed(raw: str) -> PreparedResponse:
+    """Trampas del ScannerDetector (siempre el mismo texto): se preparan una vez"""
+    return PreparedResponse.from_raw(raw)
+
+
+@lru_cache(maxsize=16)
+def _prepare_error(status: str, message: str) -> PreparedResponse:
+    """Página de error estilo Apache (400, 408, 431...), preparada una vez por status"""
+    reason = status.partition(' ')[2]
+    body = (
+        '<!DOCTYPE HTML PUBLIC "-//IETF//DTD HTML 2.0//EN">\n'
+        f'<html><head>\n<title>{status}</title>\n</head><body>\n'
+        f'<h1>{reason}</h1>\n<p>{message}\n</p>\n'
+        f'<hr>\n<address>{HTTPResponseBuilder.SERVER_NAME} Server</address>\n'
+        '</body></html>\n'
+    )
+    return PreparedResponse.from_raw(
+        HTTPResponseBuilder.build_response(status, "text/html; charset=iso-8859-1", body)
+    )
@@ -8,6 +8,7 @@ Cada archivo representa un perfil diferente:
 - database.py: Herramientas de BBDD
 - iot.py: Dispositivos IoT
 - devops.py: Fugas de configuración
+- lures.py: Ficheros señuelo enormes (backups, firmware) enviados por trozos
 
 NOTA: Los endpoints comunes (/, /robots.txt, /favicon.ico, etc.) ahora están
 integrados en cada perfil usando el sistema de common profiles (common/).
@@ -20,6 +21,7 @@ from .database import DATABASE_ENDPOINTS
 from .iot import IOT_ENDPOINTS
 from .iot_tapo import IOT_TAPO_ENDPOINTS
 from .devops import DEVOPS_ENDPOINTS
+from .lures import LURE_ENDPOINTS
 
 __all__ = [
     'GENERIC_ENDPOINTS',
@@ -29,4 +31,5 @@ __all__ = [
     'IOT_ENDPOINTS',
     'IOT_TAPO_ENDPOINTS',
     'DEVOPS_ENDPOINTS',
+    'LURE_ENDPOINTS',
 ]
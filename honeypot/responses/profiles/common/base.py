@@ -79,12 +79,13 @@ def get_favicon_response():
     # PASO 2: Decodificar a bytes
     # EXPLICACIÓN PYTHON:
     # - base64.b64decode() convierte string base64 a bytes
-    # - .decode('latin1') convierte bytes a string (necesario para HTTP)
-    favicon_bytes = base64.b64decode(favicon_b64).decode('latin1')
+    # - Los dejamos COMO BYTES: convertirlos a texto y luego a UTF-8 cambiaría
+    #   cada byte >= 0x80 por dos bytes y el navegador recibiría un ICO roto
+    favicon_bytes = base64.b64decode(favicon_b64)
     
-    # PASO 3: Construir respuesta HTTP
+    # PASO 3: Construir respuesta HTTP (camino binario: la respuesta es bytes)
     # NOTA: cache_age=86400 = 24 horas (navegador cachea el favicon)
-    return HTTPResponseBuilder.build_response(
+    return HTTPResponseBuilder.build_binary(
         "200 OK",
         "image/x-icon",
         favicon_bytes,
@@ -4,10 +4,14 @@ PERFIL DEVOPS - Fugas de Configuración
 ═══════════════════════════════════════════════════════════════════════════
 Simula archivos de configuración expuestos accidentalmente.
 Atrae ataques que buscan .env, docker-compose.yml, etc.
+Son ficheros estáticos servidos por Apache: llevan ETag, como los de verdad.
 ═══════════════════════════════════════════════════════════════════════════
 """
 
-DEVOPS_ENDPOINTS = {
+from ..utils.prepared_response import with_content_etag
+
+
+DEVOPS_ENDPOINTS = with_content_etag({
     # ┌─────────────────────────────────────────────────────────────────────────┐
     # │ RUTA: /.env (Archivo de Variables de Entorno)                           │
     # ├─────────────────────────────────────────────────────────────────────────┤
@@ -23,4 +27,4 @@ DEVOPS_ENDPOINTS = {
     # │ TRAMPA: Revela "arquitectura" falsa del sistema                         │
     # └─────────────────────────────────────────────────────────────────────────┘
     '/docker-compose.yml': 'HTTP/1.1 200 OK\r\nContent-Type: text/yaml\r\n\r\nversion: "3"\nservices:\n  db:\n    image: mysql',
-}
+})
@@ -18,7 +18,7 @@ CONTENIDO:
 # ═══════════════════════════════════════════════════════════════════════════
 import random
 import hashlib
-from datetime import datetime
+from core.clock import Clock
 from ..utils.dynamic_content import DynamicContentGenerator
 
 
@@ -147,7 +147,8 @@ def build_tplink_headers(content_type="text/html", include_auth=False):
     # HEADER 2: Date (fecha actual en formato HTTP)
     # FORMATO: "Day, DD Mon YYYY HH:MM:SS GMT"
     # Ejemplo: "Sat, 14 Dec 2024 02:00:00 GMT"
-    date_header = f"Date: {datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')}"
+    # Clock la formatea como mucho una vez por segundo para todo el honeypot
+    date_header = f"Date: {Clock.http_date()}"
     
     # HEADER 3: Content-Type
     content_type_header = f"Content-Type: {content_type}"
@@ -322,17 +323,15 @@ def get_tplink_favicon():
     ┌─────────────────────────────────────────────────────────────────────────┐
     │ GENERAR FAVICON ESPECÍFICO DE TP-LINK                                   │
     ├─────────────────────────────────────────────────────────────────────────┤
-    │ RETORNA: Respuesta HTTP completa con favicon ICO                        │
+    │ RETORNA: Respuesta HTTP completa (bytes) con el favicon                 │
     │                                                                          │
     │ DISEÑO: Favicon 16x16 con colores TP-Link                               │
     │         - Fondo azul (#00A0E9)                                          │
     │         - Letras "TP" en blanco                                         │
     │                                                                          │
-    │ NOTA: Usamos SVG convertido a ICO para simplicidad                      │
+    │ NOTA: Usamos SVG (image/svg+xml) para simplicidad                       │
     └─────────────────────────────────────────────────────────────────────────┘
     """
-    import base64
-    
     # SVG: Favicon simple con "TP"
     svg_favicon = '''<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 16 16">
   <!-- Fondo azul TP-Link -->
@@ -343,24 +342,21 @@ def get_tplink_favicon():
         fill="white" text-anchor="middle">TP</text>
 </svg>'''
     
-    # CODIFICAR: SVG a base64
-    favicon_base64 = base64.b64encode(svg_favicon.encode('utf-8')).decode('utf-8')
-    
-    # CONVERTIR: Base64 a bytes para la respuesta
+    # CONVERTIR: SVG a bytes (se envían tal cual, sin pasar por base64 ni data: URI)
     # NOTA: En producción real, esto sería un archivo .ico
-    # Para el honeypot, SVG embebido es suficiente
-    favicon_data = f"data:image/svg+xml;base64,{favicon_base64}"
+    # Para el honeypot, un SVG servido como imagen es suficiente
+    favicon_data = svg_favicon.encode('utf-8')
     
-    # CONSTRUIR: Respuesta HTTP con favicon
-    # NOTA: Usamos image/x-icon como content-type para compatibilidad
-    response = f'''HTTP/1.1 200 OK\r
+    # CONSTRUIR: Respuesta HTTP con favicon (camino binario: cabeceras + bytes)
+    head = f'''HTTP/1.1 200 OK\r
 Server: TP-LINK Router WR841N\r
-Content-Type: image/x-icon\r
+Content-Type: image/svg+xml\r
 Cache-Control: public, max-age=86400\r
 Connection: close\r
 Content-Length: {len(favicon_data)}\r
 \r
-{favicon_data}'''
+'''
+    response = head.encode('latin-1') + favicon_data
     
     return response
 
@@ -18,6 +18,7 @@ CONTENIDO:
 # ═══════════════════════════════════════════════════════════════════════════
 from .iot_helpers import build_tplink_response, get_device_info
 from ..utils.dynamic_content import DynamicContentGenerator
+from ..utils.lazy_response import render_cache
 import random
 
 
@@ -148,6 +149,7 @@ def get_reboot_page():
 # SYSTEM STATISTICS - /userRpm/SystemStatisticRpm.htm
 # ═══════════════════════════════════════════════════════════════════════════
 
+@render_cache(ttl=10)  # Contadores "vivos": cambian cada pocos segundos
 def get_statistics_page():
     """Página de estadísticas del sistema"""
     # Generar estadísticas falsas pero realistas
@@ -239,6 +241,7 @@ def get_statistics_page():
 # SYSTEM LOG - /userRpm/SystemLogRpm.htm
 # ═══════════════════════════════════════════════════════════════════════════
 
+@render_cache(ttl=10)  # Las horas del log avanzan con el reloj
 def get_system_log():
     """Página de logs del sistema"""
     # Generar logs falsos pero realistas
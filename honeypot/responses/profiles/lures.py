@@ -0,0 +1,202 @@
+"""
+═══════════════════════════════════════════════════════════════════════════
+PERFIL LURES - Ficheros Señuelo Enormes (backups, volcados, firmware)
+═══════════════════════════════════════════════════════════════════════════
+Rutas que TODO escáner prueba porque, si existen, son un tesoro:
+- /backup.sql          → volcado MySQL de ~300 MB
+- /db.tar.gz           → backup comprimido de ~460 MB
+- /firmware.bin        → imagen de firmware de ~250 MB
+- /actuator/heapdump   → heap dump de Spring Boot de ~500 MB
+
+OBJETIVO:
+✅ Medir cuánto se descarga un atacante (se registra al terminar)
+✅ Hacerle perder tiempo (envío con ritmo limitado, LURE_RATE)
+✅ Coste para nosotros: UN trozo en memoria, nada en disco
+
+El contenido es pseudoaleatorio pero DETERMINISTA (semilla = ruta + nº de
+trozo): dos descargas dan los mismos bytes y las descargas por partes
+(Range) encajan como en un servidor de verdad.
+═══════════════════════════════════════════════════════════════════════════
+"""
+
+# ═══════════════════════════════════════════════════════════════════════════
+# IMPORTS
+# ═══════════════════════════════════════════════════════════════════════════
+import random
+import struct
+
+from ..utils.streamed_response import StreamedResponse
+import config
+
+
+MB = 1024 * 1024
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# GENERADORES DE CONTENIDO (trozo n → bytes)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def binary_content(seed: str, header: bytes, chunk_size: int):
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ FICHERO BINARIO: cabecera real ("magic") + bytes pseudoaleatorios       │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ La cabecera hace que 'file' / binwalk lo reconozcan; el resto parece    │
+    │ datos comprimidos o cifrados (no se puede distinguir de uno real a ojo) │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    def content(index: int) -> bytes:
+        data = random.Random(f"{seed}:{index}").randbytes(chunk_size)
+        if index == 0:
+            data = header + data[len(header):]
+        return data
+    return content
+
+
+# Tablas y datos del volcado SQL falso
+_FIRST_NAMES = ('james', 'maria', 'david', 'laura', 'carlos', 'anna', 'pedro', 'lucia',
+                'john', 'elena', 'miguel', 'sofia', 'daniel', 'paula', 'jorge', 'marta')
+_LAST_NAMES = ('garcia', 'smith', 'lopez', 'martin', 'brown', 'sanchez', 'perez', 'jones',
+               'gomez', 'diaz', 'wilson', 'moreno', 'alvarez', 'taylor', 'romero', 'navarro')
+_DOMAINS = ('gmail.com', 'hotmail.com', 'yahoo.com', 'outlook.com', 'company.local')
+
+_SQL_HEADER = """-- MySQL dump 10.13  Distrib 5.7.42, for Linux (x86_64)
+--
+-- Host: localhost    Database: production
+-- ------------------------------------------------------
+-- Server version\t5.7.42-0ubuntu0.18.04.1
+
+/*!40101 SET @OLD_CHARACTER_SET_CLIENT=@@CHARACTER_SET_CLIENT */;
+/*!40101 SET NAMES utf8 */;
+/*!40014 SET @OLD_UNIQUE_CHECKS=@@UNIQUE_CHECKS, UNIQUE_CHECKS=0 */;
+
+--
+-- Table structure for table `users`
+--
+
+DROP TABLE IF EXISTS `users`;
+CREATE TABLE `users` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `username` varchar(64) NOT NULL,
+  `email` varchar(128) NOT NULL,
+  `password` varchar(255) NOT NULL,
+  `role` varchar(16) NOT NULL DEFAULT 'user',
+  `created_at` datetime NOT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8;
+
+LOCK TABLES `users` WRITE;
+"""
+
+
+# Alfabeto base64 de bcrypt: $2y$10$ + 22 de sal + 31 de hash = 60 caracteres
+_BCRYPT_ALPHABET = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def _bcrypt_hash(rng: random.Random) -> str:
+    """
+    Hash bcrypt falso pero bien formado: el último carácter de la sal (2 bits
+    útiles) y del hash (4 bits) solo puede ser uno de los que produce bcrypt
+    """
+    salt = ''.join(rng.choice(_BCRYPT_ALPHABET) for _ in range(21)) + rng.choice(_BCRYPT_ALPHABET[::16])
+    digest = ''.join(rng.choice(_BCRYPT_ALPHABET) for _ in range(30)) + rng.choice(_BCRYPT_ALPHABET[::4])
+    return f"$2y$10${salt}{digest}"
+
+
+def _user_row(row_id: int, rng: random.Random) -> str:
+    """Un INSERT de usuario falso"""
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    return (
+        f"INSERT INTO `users` VALUES ({row_id},'{first}.{last}{rng.randint(1, 99)}',"
+        f"'{first}.{last}@{rng.choice(_DOMAINS)}',"
+        f"'{_bcrypt_hash(rng)}',"
+        f"'{'admin' if rng.random() < 0.01 else 'user'}',"
+        f"'20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+        f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}');\n"
+    )
+
+
+# Fila más larga posible: nombres y dominio más largos, id de 10 cifras, 'admin'
+_LONGEST_NAME = f"{max(_FIRST_NAMES, key=len)}.{max(_LAST_NAMES, key=len)}"
+_MAX_ROW_LENGTH = len(
+    f"INSERT INTO `users` VALUES ({10 ** 10 - 1},'{_LONGEST_NAME}99',"
+    f"'{_LONGEST_NAME}@{max(_DOMAINS, key=len)}','{'x' * 60}','admin','2024-12-28 23:59:59');\n"
+)
+
+
+def sql_dump_content(seed: str, chunk_size: int):
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ VOLCADO MySQL: cabecera de mysqldump + INSERTs de usuarios falsos       │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ Cada trozo mide EXACTAMENTE chunk_size y termina en salto de línea: el  │
+    │ hueco que sobra se rellena con un comentario SQL, así ninguna línea     │
+    │ queda cortada entre dos trozos.                                         │
+    │ Todos los trozos llevan el MISMO número de filas (las que caben en el   │
+    │ peor caso): el id es un contador continuo (trozo × filas + n) aunque    │
+    │ cada trozo se genere por separado (descargas por partes con Range)      │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    rows_per_chunk = (chunk_size - len(_SQL_HEADER) - 4) // _MAX_ROW_LENGTH
+
+    def content(index: int) -> bytes:
+        rng = random.Random(f"{seed}:{index}")
+        first_id = index * rows_per_chunk + 1
+        parts = [_SQL_HEADER] if index == 0 else []
+        parts.extend(_user_row(row_id, rng) for row_id in range(first_id, first_id + rows_per_chunk))
+        used = sum(map(len, parts))
+        # Relleno: "--" + espacios + "\n" (un comentario SQL vacío)
+        parts.append("--" + " " * (chunk_size - used - 3) + "\n")
+        return "".join(parts).encode('ascii')
+    return content
+
+
+def _lure(content_type: str, size: int, content_factory, *args) -> StreamedResponse:
+    """Fichero señuelo con el tamaño de trozo configurado"""
+    chunk_size = config.LURE_CHUNK_SIZE
+    return StreamedResponse.file(content_type, size, content_factory(*args, chunk_size), chunk_size)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ENDPOINTS SEÑUELO
+# ═══════════════════════════════════════════════════════════════════════════
+
+LURE_ENDPOINTS = {
+    # ┌─────────────────────────────────────────────────────────────────────────┐
+    # │ RUTA: /backup.sql (Volcado de Base de Datos)                            │
+    # ├─────────────────────────────────────────────────────────────────────────┤
+    # │ QUÉ ES: mysqldump olvidado en la raíz web                               │
+    # │ TRAMPA: ~300 MB de usuarios y hashes bcrypt falsos                      │
+    # └─────────────────────────────────────────────────────────────────────────┘
+    '/backup.sql': _lure('application/sql', 312 * MB + 41_337, sql_dump_content, '/backup.sql'),
+
+    # ┌─────────────────────────────────────────────────────────────────────────┐
+    # │ RUTA: /db.tar.gz (Backup Comprimido)                                    │
+    # ├─────────────────────────────────────────────────────────────────────────┤
+    # │ QUÉ ES: Copia de la base de datos empaquetada                           │
+    # │ TRAMPA: Cabecera gzip válida; el resto no se descomprime nunca          │
+    # └─────────────────────────────────────────────────────────────────────────┘
+    '/db.tar.gz': _lure('application/x-gzip', 487 * MB + 9_021, binary_content, '/db.tar.gz',
+                        b"\x1f\x8b\x08\x00\x26\x71\xc6\x67\x00\x03"),
+
+    # ┌─────────────────────────────────────────────────────────────────────────┐
+    # │ RUTA: /firmware.bin (Imagen de Firmware)                                │
+    # ├─────────────────────────────────────────────────────────────────────────┤
+    # │ QUÉ ES: Imagen de actualización del router/cámara                       │
+    # │ TRAMPA: Cabecera uImage (U-Boot) real; binwalk la reconoce              │
+    # └─────────────────────────────────────────────────────────────────────────┘
+    '/firmware.bin': _lure('application/octet-stream', 256 * MB - 4_096, binary_content, '/firmware.bin',
+                           struct.pack('>IIIIIIIBBBB', 0x27051956, 0x5D3A1C2E, 0x67C670E6,
+                                       256 * MB - 4_160, 0x80002000, 0x801D8F40, 0x3FA2B6C1,
+                                       5, 5, 2, 3) + b"MIPS OpenWrt Linux-4.14.221".ljust(32, b"\x00")),
+
+    # ┌─────────────────────────────────────────────────────────────────────────┐
+    # │ RUTA: /actuator/heapdump (Spring Boot Actuator)                         │
+    # ├─────────────────────────────────────────────────────────────────────────┤
+    # │ QUÉ ES: Volcado de memoria de la JVM (suele contener secretos)          │
+    # │ TRAMPA: Cabecera HPROF válida ("JAVA PROFILE 1.0.2")                    │
+    # └─────────────────────────────────────────────────────────────────────────┘
+    '/actuator/heapdump': _lure('application/octet-stream', 512 * MB + 77_104, binary_content,
+                                '/actuator/heapdump',
+                                b"JAVA PROFILE 1.0.2\x00" + struct.pack('>IQ', 8, 1741058262000)),
+}
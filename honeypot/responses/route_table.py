@@ -0,0 +1,153 @@
+"""
+═══════════════════════════════════════════════════════════════════════════
+ROUTE TABLE - Tabla de Rutas Compilada (dict + trie por segmentos)
+═══════════════════════════════════════════════════════════════════════════
+Compila el diccionario de endpoints UNA vez al arrancar:
+- Coincidencia exacta: un acceso a diccionario
+- Coincidencia por prefijo: un trie de segmentos ('/api/v1/users' →
+  '' → 'api' → 'v1' → 'users'), recorrido en O(longitud de la ruta)
+
+POR QUÉ: la mayoría del tráfico de escáneres son 404. Antes cada 404
+recorría TODA la tabla con startswith(); ahora el coste no depende del
+número de endpoints.
+═══════════════════════════════════════════════════════════════════════════
+"""
+
+from typing import Callable, Optional
+
+from .utils.prepared_response import PreparedResponse
+from .utils.lazy_response import LazyResponse
+
+
+class _Node:
+    """Nodo del trie: hijos por segmento + endpoint que termina aquí (si hay)"""
+
+    __slots__ = ('children', 'endpoint')
+
+    def __init__(self):
+        self.children = {}
+        self.endpoint = None
+
+
+class RouteTable:
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ TABLA DE RUTAS DE UN PERFIL                                             │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ QUÉ GUARDA:                                                              │
+    │   - endpoints: {ruta: respuesta} tal cual vienen de los perfiles        │
+    │   - prepared: {ruta: PreparedResponse} de las respuestas fijas          │
+    │   - lazy: {ruta: LazyResponse} de las que son funciones (con caché)     │
+    │   - trie de segmentos para la búsqueda por prefijo                      │
+    │                                                                          │
+    │ SEMÁNTICA DEL PREFIJO:                                                   │
+    │   '/api/v1/users' atiende '/api/v1/users/123' (igual que el antiguo     │
+    │   startswith(patrón + '/')). Si varios patrones encajan, gana el MÁS    │
+    │   LARGO: '/api/v1/users/admin/7' → '/api/v1/users/admin' antes que      │
+    │   '/api/v1/users'.                                                       │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+
+    def __init__(self, endpoints: dict):
+        self.endpoints = {}
+        self.prepared = {}
+        self.lazy = {}
+        self._root = _Node()
+        for path, response in endpoints.items():
+            self.add(path, response)
+
+    def add(self, path: str, response, shared=None) -> None:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ REGISTRAR UNA RUTA                                                  │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ PASOS:                                                               │
+        │   1. Guardarla en el diccionario de exactas                         │
+        │   2. Fija → prepararla a bytes ya (y sus versiones gzip/deflate)    │
+        │      Función → envolverla en LazyResponse (se genera al pedirla)    │
+        │   3. Colgarla del trie, segmento a segmento                         │
+        │                                                                      │
+        │ 'shared' = PreparedResponse / LazyResponse de otra tabla: se        │
+        │ reutiliza (mismos bytes, misma caché) en lugar de crear otro        │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        self.endpoints[path] = response
+        if callable(response):
+            self.prepared.pop(path, None)
+            self.lazy[path] = shared if isinstance(shared, LazyResponse) else LazyResponse(response)
+        else:
+            self.lazy.pop(path, None)
+            self.prepared[path] = shared or PreparedResponse.from_raw(response).precompress()
+
+        node = self._root
+        for segment in path.split('/'):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _Node()
+            node = child
+        node.endpoint = path
+
+    def match(self, clean_path: str) -> Optional[str]:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ BUSCAR LA RUTA REGISTRADA PARA UNA PETICIÓN                         │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ ESTRATEGIA:                                                          │
+        │   1. Coincidencia EXACTA: un acceso a diccionario                   │
+        │   2. Prefijo MÁS LARGO: bajamos por el trie segmento a segmento     │
+        │      y recordamos el último endpoint que quedó atrás                │
+        │                                                                      │
+        │ RETORNA: La ruta registrada (clave de endpoints) o None             │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if clean_path in self.endpoints:
+            return clean_path
+
+        segments = clean_path.split('/')
+        node = self._root
+        best = None
+        # El último segmento nunca cierra un prefijo: eso sería coincidencia exacta
+        for segment in segments[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.endpoint is not None:
+                best = node.endpoint
+        return best
+
+    def response(self, endpoint: str) -> PreparedResponse:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ RESPUESTA PREPARADA DE UNA RUTA REGISTRADA (la que devolvió match) │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Fija → un acceso a diccionario                                      │
+        │ Función → su caché (se genera solo si caducó o es la primera vez)   │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        prepared = self.prepared.get(endpoint)
+        if prepared is None:
+            prepared = self.lazy[endpoint].get()
+        return prepared
+
+    def filtered(self, keep: Callable[[str], bool]) -> 'RouteTable':
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ SUB-TABLA (ej: solo las rutas de un perfil)                         │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Nueva tabla con las rutas para las que keep(ruta) es True.          │
+        │ Comparte los bytes ya preparados y las cachés de las funciones:     │
+        │ no se vuelve a codificar ni a generar nada                          │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        table = RouteTable({})
+        for path, response in self.endpoints.items():
+            if keep(path):
+                table.add(path, response, self.prepared.get(path) or self.lazy.get(path))
+        return table
+
+    def paths(self) -> list:
+        """Rutas registradas (en el orden de los perfiles)"""
+        return list(self.endpoints)
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
@@ -5,5 +5,9 @@ Utils package - Utilidades para construcción de respuestas HTTP.
 from .http_builder import HTTPResponseBuilder
 from .dynamic_content import DynamicContentGenerator
 from .access_logger import AccessLogger
+from .prepared_response import PreparedResponse
+from .lazy_response import LazyResponse, render_cache
+from .streamed_response import StreamedResponse
 
-__all__ = ['HTTPResponseBuilder', 'DynamicContentGenerator', 'AccessLogger']
+__all__ = ['HTTPResponseBuilder', 'DynamicContentGenerator', 'AccessLogger', 'PreparedResponse',
+           'LazyResponse', 'render_cache', 'StreamedResponse']
@@ -12,9 +12,10 @@ MEJORA CRÍTICA #1: Headers HTTP Completos
 ═══════════════════════════════════════════════════════════════════════════
 """
 
-import datetime
 import hashlib
 
+from core.clock import Clock
+
 
 class HTTPResponseBuilder:
     """
@@ -57,12 +58,57 @@ class HTTPResponseBuilder:
         │ RETORNA: String con respuesta HTTP completa                         │
         └─────────────────────────────────────────────────────────────────────┘
         """
+        # Todo el trabajo común (Date, ETag, Content-Length...) está en _build_head.
+        # Importante: Usar bytes, no caracteres (UTF-8) para ETag y Content-Length
+        head = cls._build_head(status_code, content_type, body.encode('utf-8'),
+                               extra_headers, cache_age)
+        
+        # ┌─────────────────────────────────────────────────────────────────┐
+        # │ PASO 6: Ensamblar respuesta completa                            │
+        # ├─────────────────────────────────────────────────────────────────┤
+        # │ Formato HTTP: Headers + \r\n\r\n + Body                         │
+        # └─────────────────────────────────────────────────────────────────┘
+        response = head + "\r\n\r\n" + body
+        
+        return response
+    
+    @classmethod
+    def build_binary(cls, status_code: str, content_type: str, body: bytes,
+                     extra_headers: list = None, cache_age: int = None) -> bytes:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ CONSTRUIR RESPUESTA BINARIA (imágenes, favicon, ficheros)           │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Igual que build_response, pero el body son BYTES y la respuesta     │
+        │ también. Así los bytes de una imagen llegan intactos al cliente.    │
+        │                                                                      │
+        │ POR QUÉ: pasar una imagen a str (latin1) y luego a UTF-8 cambia     │
+        │   cada byte >= 0x80 por dos bytes → favicon corrupto                │
+        │                                                                      │
+        │ RETORNA: bytes con la respuesta HTTP completa                       │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        head = cls._build_head(status_code, content_type, body, extra_headers, cache_age)
+        return head.encode('latin-1') + b"\r\n\r\n" + body
+    
+    @classmethod
+    def _build_head(cls, status_code: str, content_type: str, body: bytes,
+                    extra_headers: list = None, cache_age: int = None) -> str:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ CABECERAS COMUNES (línea de estado + headers, sin el \r\n\r\n)      │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Recibe el body YA en bytes: ETag y Content-Length se calculan       │
+        │ sobre lo que de verdad viaja por el cable                           │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
         # ┌─────────────────────────────────────────────────────────────────┐
         # │ PASO 1: Generar timestamp actual (RFC 7231 format)              │
         # ├─────────────────────────────────────────────────────────────────┤
         # │ Formato: "Thu, 13 Dec 2025 07:58:21 GMT"                        │
+        # │ Clock la formatea como mucho una vez por segundo                │
         # └─────────────────────────────────────────────────────────────────┘
-        timestamp = datetime.datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+        timestamp = Clock.http_date()
         
         # ┌─────────────────────────────────────────────────────────────────┐
         # │ PASO 2: Generar ETag (hash MD5 del contenido)                   │
@@ -70,14 +116,12 @@ class HTTPResponseBuilder:
         # │ ETag permite caching en navegadores                             │
         # │ Ejemplo: "a1b2c3d4e5f6g7h8"                                     │
         # └─────────────────────────────────────────────────────────────────┘
-        etag = hashlib.md5(body.encode('utf-8')).hexdigest()[:16]
+        etag = hashlib.md5(body).hexdigest()[:16]
         
         # ┌─────────────────────────────────────────────────────────────────┐
-        # │ PASO 3: Calcular Content-Length exacto                          │
-        # ├─────────────────────────────────────────────────────────────────┤
-        # │ Importante: Usar bytes, no caracteres (UTF-8)                   │
+        # │ PASO 3: Calcular Content-Length exacto (en bytes)               │
         # └─────────────────────────────────────────────────────────────────┘
-        content_length = len(body.encode('utf-8'))
+        content_length = len(body)
         
         # ┌─────────────────────────────────────────────────────────────────┐
         # │ PASO 4: Construir headers base                                  │
@@ -100,14 +144,7 @@ class HTTPResponseBuilder:
         if extra_headers:
             headers.extend(extra_headers)
         
-        # ┌─────────────────────────────────────────────────────────────────┐
-        # │ PASO 6: Ensamblar respuesta completa                            │
-        # ├─────────────────────────────────────────────────────────────────┤
-        # │ Formato HTTP: Headers + \r\n\r\n + Body                         │
-        # └─────────────────────────────────────────────────────────────────┘
-        response = "\r\n".join(headers) + "\r\n\r\n" + body
-        
-        return response
+        return "\r\n".join(headers)
     
     @classmethod
     def build_html(cls, title: str, body_html: str, status_code: str = "200 OK") -> str:
@@ -0,0 +1,108 @@
+"""
+═══════════════════════════════════════════════════════════════════════════
+LAZY RESPONSE - Endpoints Dinámicos Generados Bajo Demanda y Cacheados
+═══════════════════════════════════════════════════════════════════════════
+Algunos endpoints de los perfiles son FUNCIONES (get_login_page,
+get_luci_exploit, lambdas de robots.txt...), no textos fijos. Generarlas en
+cada visita significa rehacer páginas HTML enteras una y otra vez.
+
+SOLUCIÓN:
+- La función se llama la PRIMERA vez que alguien pide la ruta (lazy)
+- El resultado se guarda ya en bytes (PreparedResponse)
+- Se vuelve a generar cuando caduca (TTL) o si cambia su clave (persona)
+
+Así una página IoT muy visitada cuesta un acceso a diccionario, pero los
+datos "vivos" (uptime, estadísticas, logs) siguen cambiando con el tiempo.
+═══════════════════════════════════════════════════════════════════════════
+"""
+
+import time
+from typing import Callable, Optional
+
+from .prepared_response import PreparedResponse
+
+
+# Máximo de variantes (claves) por endpoint: una clave mal elegida no debe
+# poder llenar la memoria
+_MAX_VARIANTS = 64
+
+
+def render_cache(ttl: Optional[float] = None, key: Optional[Callable] = None):
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ DECORADOR: CÓMO CACHEAR UN ENDPOINT DINÁMICO                            │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ PARÁMETROS:                                                              │
+    │   ttl: Segundos que vale una generación (None = DYNAMIC_RESPONSE_TTL,   │
+    │        0 = generar en CADA visita)                                      │
+    │   key: Función sin argumentos que devuelve la variante actual           │
+    │        (ej: la persona activa). Una caché por valor distinto            │
+    │                                                                          │
+    │ EJEMPLO:                                                                 │
+    │   @render_cache(ttl=10)                                                 │
+    │   def get_statistics_page(): ...   # contadores "vivos" cada 10s        │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+    def decorator(render: Callable) -> Callable:
+        render.render_ttl = ttl
+        render.render_key = key
+        return render
+    return decorator
+
+
+class LazyResponse:
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ ENDPOINT DINÁMICO CON CACHÉ                                             │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ QUÉ GUARDA:                                                              │
+    │   - render: la función del perfil                                       │
+    │   - ttl / key: leídos del decorador @render_cache (o por defecto)       │
+    │   - caché: {clave: (caduca_en, PreparedResponse)}                       │
+    │                                                                          │
+    │ HILOS: dos peticiones que lleguen a la vez con la caché vacía pueden    │
+    │        generar las dos; gana la última. Nunca se bloquea a nadie        │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+
+    __slots__ = ('render', 'ttl', 'key', '_cache')
+
+    def __init__(self, render: Callable, ttl: Optional[float] = None):
+        self.render = render
+        if ttl is None:
+            ttl = getattr(render, 'render_ttl', None)
+        if ttl is None:
+            import config
+            ttl = getattr(config, 'DYNAMIC_RESPONSE_TTL', 60)
+        self.ttl = ttl
+        self.key = getattr(render, 'render_key', None)
+        self._cache = {}
+
+    def get(self) -> PreparedResponse:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ RESPUESTA ACTUAL DEL ENDPOINT                                       │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ 1. Caché vigente para la clave actual → se devuelve tal cual        │
+        │ 2. Si no → se genera, se prepara a bytes (y gzip/deflate) y se      │
+        │    guarda ttl segundos                                              │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        variant = self.key() if self.key is not None else None
+        now = time.monotonic()
+        entry = self._cache.get(variant)
+        if entry is not None and now < entry[0]:
+            return entry[1]
+
+        prepared = PreparedResponse.from_raw(self.render())
+        if self.ttl > 0:
+            # Comprimir solo lo que se va a reutilizar: con ttl=0 no se comprime
+            prepared = prepared.precompress()
+            if variant not in self._cache and len(self._cache) >= _MAX_VARIANTS:
+                self._cache.clear()
+            self._cache[variant] = (now + self.ttl, prepared)
+        return prepared
+
+    def invalidate(self) -> None:
+        """Olvida todas las generaciones (la próxima visita vuelve a generar)"""
+        self._cache.clear()
@@ -0,0 +1,406 @@
+"""
+═══════════════════════════════════════════════════════════════════════════
+PREPARED RESPONSE - Respuestas HTTP Pre-codificadas
+═══════════════════════════════════════════════════════════════════════════
+Convierte una respuesta de perfil (str o bytes "HTTP/1.1 ...") en bytes UNA
+sola vez. En cada petición solo se añaden las cabeceras de conexión
+(Connection / Keep-Alive) y se envía todo sin volver a codificar ni copiar
+el cuerpo.
+
+POR QUÉ:
+- Antes cada visita hacía .encode('utf-8') de la página completa
+- Con keep-alive hay que garantizar un Content-Length exacto
+- Las imágenes (favicon) tienen que viajar como bytes, sin pasar por texto
+
+LA CABECERA Date: se quita al preparar (si no, quedaría congelada con la
+hora a la que se importó el perfil) y se pone en cada envío, en su misma
+posición, con la hora del reloj compartido (core/clock.py).
+
+COMPRESIÓN: las páginas de texto grandes se comprimen (gzip y deflate) UNA
+vez, al construir la tabla de rutas, y se guardan junto a la versión sin
+comprimir. Cada petición solo ELIGE variante según su Accept-Encoding.
+
+GET CONDICIONAL: ETag y Last-Modified se leen una vez al preparar (los
+perfiles que imitan ficheros estáticos de Apache piden con
+with_content_etag() uno calculado sobre el cuerpo; el resto de personas se
+envía tal cual). Si el cliente ya tiene esa versión (If-None-Match /
+If-Modified-Since) se le contesta "304 Not Modified" sin cuerpo, con una
+cabecera también preparada.
+═══════════════════════════════════════════════════════════════════════════
+"""
+
+import gzip
+import hashlib
+import zlib
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+from core.clock import Clock
+import config
+
+
+# Cabeceras que dependen de la CONEXIÓN, no del contenido: se quitan al
+# preparar y se ponen en cada envío (o se recalculan, como Content-Length)
+_HOP_BY_HOP = ('connection', 'keep-alive', 'content-length')
+
+_CLOSE_TAIL = b"Connection: close\r\n\r\n"
+
+# Codificaciones que precalculamos, en orden de preferencia a igualdad de q.
+# mtime=0: mismo contenido → mismos bytes comprimidos (y mismo ETag después)
+_CODECS = (
+    ('gzip', lambda body: gzip.compress(body, 9, mtime=0)),
+    ('deflate', lambda body: zlib.compress(body, 9)),
+)
+
+# Tipos de contenido que merece la pena comprimir (las imágenes ya lo están)
+_COMPRESSIBLE = ('text/', 'json', 'xml', 'javascript', 'svg')
+
+# Cabeceras que se repiten en un 304 (RFC 7232 §4.1, como hace Apache)
+_NOT_MODIFIED_HEADERS = ('server', 'etag', 'last-modified', 'cache-control',
+                         'expires', 'vary', 'content-location')
+
+
+class PreparedResponse:
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ RESPUESTA HTTP LISTA PARA ENVIAR                                        │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ QUÉ GUARDA:                                                              │
+    │   - status: "200 OK", "404 Not Found"...                                │
+    │   - head: bytes de la línea de estado + cabeceras + Content-Length      │
+    │           (partido en dos si la persona manda Date: antes / después)    │
+    │   - body: bytes del cuerpo (tal cual, sin copias)                       │
+    │   - close: True si la persona SIEMPRE cierra (ej: router TP-Link)       │
+    │   - encoded: {'gzip': PreparedResponse, 'deflate': ...} (precompress)   │
+    │   - etag / last_modified: validadores (GET condicional → 304)           │
+    │                                                                          │
+    │ ENVÍO: buffers() devuelve [head, (Date, resto de head), cola de         │
+    │        conexión, body]: la capa de red los manda juntos (sendmsg /      │
+    │        writelines) sin concatenarlos                                    │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+
+    __slots__ = ('status', 'headers', 'body', 'head', 'head_after_date', 'close',
+                 'date_at', 'encoded', 'etag', 'last_modified', '_mtime', '_not_modified')
+
+    # El cuerpo va entero en 'body'. StreamedResponse (True) lo genera por trozos
+    streamed = False
+
+    def __init__(self, status: str, headers: list, body: bytes, close: bool = False,
+                 date_at: int = None, content_length: int = None):
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ PARÁMETROS:                                                          │
+        │   status: "200 OK", etc.                                            │
+        │   headers: Lista de "Nombre: valor" (sin Connection/Content-Length/ │
+        │            Date)                                                    │
+        │   body: Cuerpo en bytes                                             │
+        │   close: La persona cierra la conexión tras cada respuesta          │
+        │   date_at: Posición de Date: entre las cabeceras (None = sin Date)  │
+        │   content_length: Tamaño anunciado si no es len(body) (streaming)   │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.close = close
+        self.date_at = date_at
+        self.encoded = None
+        self._not_modified = None
+
+        # Validadores: se leen UNA vez aquí, no en cada petición
+        self.etag = None
+        self.last_modified = None
+        for line in headers:
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            if name == 'etag':
+                self.etag = value.strip()
+            elif name == 'last-modified':
+                self.last_modified = value.strip()
+        self._mtime = _parse_http_date(self.last_modified) if self.last_modified else None
+
+        lines = [f"HTTP/1.1 {status}"] + headers
+        # Un 304 no lleva cuerpo ni Content-Length (el tamaño sería el del 200)
+        if not status.startswith('304'):
+            lines.append(f"Content-Length: {len(body) if content_length is None else content_length}")
+        if date_at is None:
+            self.head = _encode_lines(lines)
+            self.head_after_date = None
+        else:
+            self.head = _encode_lines(lines[:date_at + 1])
+            self.head_after_date = _encode_lines(lines[date_at + 1:])
+
+    @classmethod
+    def from_raw(cls, raw, content_etag: bool = False) -> 'PreparedResponse':
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ PREPARAR UNA RESPUESTA DE PERFIL (str o bytes)                      │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ PASOS:                                                               │
+        │   1. Separar cabeceras y cuerpo por el primer \r\n\r\n              │
+        │   2. Cuerpo str → UTF-8 (una sola vez); cuerpo bytes → intacto      │
+        │   3. Quitar Connection / Keep-Alive / Content-Length                │
+        │   4. Recordar si la persona pedía "Connection: close"               │
+        │   5. Quitar Date: y recordar dónde iba (se rellena en cada envío)   │
+        │   6. content_etag: un 200 sin ETag recibe uno (MD5 del cuerpo, como │
+        │      HTTPResponseBuilder). Solo si el servidor imitado lo manda:    │
+        │      una cabecera que el dispositivo real no envía lo delata        │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if isinstance(raw, PreparedResponse):
+            return raw  # Ya preparada (incluye StreamedResponse)
+
+        if isinstance(raw, (bytes, bytearray)):
+            head, _, body = bytes(raw).partition(b"\r\n\r\n")
+            head = head.decode('latin-1')
+        else:
+            head, _, text = raw.partition("\r\n\r\n")
+            body = text.encode('utf-8')
+
+        lines = head.split("\r\n")
+        status_parts = lines[0].split(' ', 1)
+        status = status_parts[1] if len(status_parts) > 1 else "200 OK"
+
+        headers = []
+        close = False
+        date_at = None
+        has_etag = False
+        for line in lines[1:]:
+            if not line:
+                continue
+            name = line.split(':', 1)[0].strip().lower()
+            if name == 'etag':
+                has_etag = True
+            if name in _HOP_BY_HOP:
+                if name == 'connection' and 'close' in line.lower():
+                    close = True
+                continue
+            if name == 'date':
+                date_at = len(headers)
+                continue
+            headers.append(line)
+
+        if content_etag and not has_etag and status.startswith('200'):
+            headers.append(f'ETag: "{hashlib.md5(body).hexdigest()[:16]}"')
+
+        return cls(status, headers, body, close, date_at)
+
+    def precompress(self) -> 'PreparedResponse':
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ PRECALCULAR LAS VERSIONES COMPRIMIDAS (una vez, al preparar)        │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Solo si:                                                             │
+        │   - la compresión está activa (HTTP_COMPRESSION)                    │
+        │   - el cuerpo es texto y mide al menos HTTP_COMPRESSION_MIN_SIZE    │
+        │   - la persona no lo mandaba ya comprimido (Content-Encoding)       │
+        │   - comprimido ocupa MENOS que sin comprimir                        │
+        │                                                                      │
+        │ RETORNA: la respuesta sin comprimir (con "Vary: Accept-Encoding" si │
+        │          hay variantes) con sus variantes en .encoded               │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if self.encoded is not None:
+            return self  # Ya estaba hecho (respuesta compartida entre tablas)
+        self.encoded = {}
+        if not config.HTTP_COMPRESSION or len(self.body) < config.HTTP_COMPRESSION_MIN_SIZE:
+            return self
+        content_type = ''
+        for line in self.headers:
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            if name == 'content-encoding':
+                return self
+            if name == 'content-type':
+                content_type = value.lower()
+        if not any(kind in content_type for kind in _COMPRESSIBLE):
+            return self
+
+        headers = self.headers + ["Vary: Accept-Encoding"]
+        encoded = {}
+        for coding, compress in _CODECS:
+            data = compress(self.body)
+            if len(data) < len(self.body):
+                # Cada representación tiene su propio ETag ("abc" → "abc-gzip", como Apache)
+                variant_headers = [_variant_etag(line, coding) for line in headers]
+                encoded[coding] = PreparedResponse(
+                    self.status, variant_headers + [f"Content-Encoding: {coding}"], data, self.close, self.date_at
+                )
+        if not encoded:
+            return self
+        identity = PreparedResponse(self.status, headers, self.body, self.close, self.date_at)
+        identity.encoded = encoded
+        for variant in encoded.values():
+            variant.encoded = {}
+        return identity
+
+    def negotiate(self, accept_encoding: str) -> 'PreparedResponse':
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ ELEGIR VARIANTE SEGÚN Accept-Encoding                               │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ EJEMPLOS:                                                            │
+        │   "gzip, deflate, br"     → gzip                                    │
+        │   "deflate;q=1, gzip;q=0.5" → deflate                               │
+        │   "gzip;q=0" / sin cabecera → sin comprimir                         │
+        │                                                                      │
+        │ Coste: un acceso a diccionario (la cabecera se analiza una vez por  │
+        │ valor distinto y se cachea: los clientes repiten siempre la misma)  │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if not self.encoded or not accept_encoding:
+            return self
+        for coding in _accepted_codings(accept_encoding):
+            variant = self.encoded.get(coding)
+            if variant is not None:
+                return variant
+        return self
+
+    def is_not_modified(self, if_none_match: str, if_modified_since: str) -> bool:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ ¿EL CLIENTE YA TIENE ESTA VERSIÓN? (RFC 7232 §6)                    │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │   1. Solo respuestas 200 con validador                              │
+        │   2. If-None-Match manda (si viene, If-Modified-Since se ignora):   │
+        │      alguno de sus ETags coincide (comparación débil) o es '*'      │
+        │   3. If-Modified-Since: nuestro Last-Modified no es posterior       │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if not self.status.startswith('200'):
+            return False
+        if if_none_match is not None:
+            if self.etag is None:
+                return False
+            return _etag_matches(if_none_match, _weak(self.etag))
+        if if_modified_since is not None and self._mtime is not None:
+            if if_modified_since == self.last_modified:
+                return True  # Lo normal: el cliente devuelve la fecha tal cual
+            since = _parse_http_date(if_modified_since)
+            return since is not None and self._mtime <= since
+        return False
+
+    def not_modified(self) -> 'PreparedResponse':
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ RESPUESTA 304 DE ESTA REPRESENTACIÓN (se prepara una vez)           │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Sin cuerpo. Conserva Server, ETag, Last-Modified, Cache-Control,    │
+        │ Expires, Vary y la Date en su sitio                                 │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if self._not_modified is None:
+            kept = []
+            date_at = None
+            for index, line in enumerate(self.headers):
+                if index == self.date_at:
+                    date_at = len(kept)
+                if line.partition(':')[0].strip().lower() in _NOT_MODIFIED_HEADERS:
+                    kept.append(line)
+            if self.date_at is not None and date_at is None:
+                date_at = len(kept)
+            self._not_modified = PreparedResponse("304 Not Modified", kept, b"", self.close, date_at)
+        return self._not_modified
+
+    def buffers(self, keep_alive: bool, timeout: int = 5, remaining: int = 0,
+                include_body: bool = True) -> list:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ TROZOS A ENVIAR PARA ESTA PETICIÓN                                  │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ PARÁMETROS:                                                          │
+        │   keep_alive: ¿Se queda abierta la conexión?                        │
+        │   timeout / remaining: valores de "Keep-Alive: timeout=5, max=99"   │
+        │   include_body: False para HEAD (mismas cabeceras, sin cuerpo)      │
+        │                                                                      │
+        │ RETORNA: [head, (Date, resto), cola de conexión, body]              │
+        │          (bytes ya preparados; Date sale del reloj compartido)      │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if keep_alive and not self.close:
+            tail = b"Connection: keep-alive\r\nKeep-Alive: timeout=%d, max=%d\r\n\r\n" % (timeout, remaining)
+        else:
+            tail = _CLOSE_TAIL
+        if self.head_after_date is None:
+            buffers = [self.head, tail]
+        else:
+            buffers = [self.head, Clock.date_header(), self.head_after_date, tail]
+        if include_body and self.body:
+            buffers.append(self.body)
+        return buffers
+
+
+def with_content_etag(endpoints: dict) -> dict:
+    """
+    Respuestas fijas de un perfil preparadas con ETag del contenido (para
+    perfiles que imitan ficheros estáticos servidos por Apache, que SÍ lo
+    manda). Las funciones (respuestas dinámicas) se dejan como están.
+    """
+    return {path: PreparedResponse.from_raw(raw, content_etag=True) if isinstance(raw, (str, bytes)) else raw
+            for path, raw in endpoints.items()}
+
+
+@lru_cache(maxsize=256)
+def _accepted_codings(accept_encoding: str) -> tuple:
+    """
+    Codificaciones que precalculamos y que el cliente acepta, de más a menos
+    preferida (q más alta primero; a igualdad, el orden de _CODECS).
+    '*' cuenta para cualquiera que el cliente no nombre; q=0 = prohibida.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(','):
+        coding, _, params = item.partition(';')
+        q = 1.0
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    wildcard = weights.get('*', 0.0)
+    ranked = []
+    for order, (coding, _) in enumerate(_CODECS):
+        q = weights.get(coding, wildcard)
+        if q > 0:
+            ranked.append((-q, order, coding))
+    return tuple(coding for _, _, coding in sorted(ranked))
+
+
+def _variant_etag(line: str, coding: str) -> str:
+    """'ETag: "abc"' → 'ETag: "abc-gzip"' (el resto de cabeceras, igual)"""
+    name, _, value = line.partition(':')
+    value = value.strip()
+    if name.strip().lower() != 'etag' or not value.endswith('"'):
+        return line
+    return f'{name}: {value[:-1]}-{coding}"'
+
+
+def _weak(etag: str) -> str:
+    """Comparación débil: W/"abc" y "abc" son el mismo validador"""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+@lru_cache(maxsize=256)
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """¿Alguno de los ETags de If-None-Match es el nuestro (o '*')?"""
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or _weak(candidate) == etag:
+            return True
+    return False
+
+
+@lru_cache(maxsize=256)
+def _parse_http_date(value: str):
+    """'Sat, 14 Dec 2024 02:00:00 GMT' → segundos epoch (None si no es una fecha)"""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _encode_lines(lines: list) -> bytes:
+    """Líneas de cabecera → bytes, cada una terminada en \r\n"""
+    return "".join(line + "\r\n" for line in lines).encode('utf-8')
@@ -0,0 +1,158 @@
+"""
+═══════════════════════════════════════════════════════════════════════════
+STREAMED RESPONSE - Ficheros Señuelo Enormes Generados Trozo a Trozo
+═══════════════════════════════════════════════════════════════════════════
+Un volcado de base de datos o un firmware de cientos de MB no se puede
+guardar como texto en un diccionario. Aquí solo se guarda una FUNCIÓN que
+genera el trozo N del fichero:
+- Determinista: el trozo N es siempre igual (mismo fichero en cada descarga,
+  las descargas por partes encajan)
+- Solo hay UN trozo en memoria a la vez, mida lo que mida el "fichero"
+- Range: "bytes=1000-" → 206 con solo esa parte (para reanudar descargas)
+
+La capa de red (http_service.py) envía los trozos con un ritmo máximo
+(LURE_RATE): el atacante tarda en descargarlo y medimos cuánto se lleva.
+═══════════════════════════════════════════════════════════════════════════
+"""
+
+from typing import Callable, Iterator, Optional
+
+from .prepared_response import PreparedResponse
+
+
+class StreamedResponse(PreparedResponse):
+    """
+    ┌─────────────────────────────────────────────────────────────────────────┐
+    │ RESPUESTA CON CUERPO GENERADO BAJO DEMANDA                              │
+    ├─────────────────────────────────────────────────────────────────────────┤
+    │ QUÉ GUARDA:                                                              │
+    │   - size: tamaño TOTAL del fichero falso                                │
+    │   - content(n): función que devuelve el trozo n (chunk_size bytes)      │
+    │   - start / end: bytes a enviar (todo, o la parte pedida con Range)     │
+    │                                                                          │
+    │ Cabeceras, Date, ETag y 304 funcionan igual que en PreparedResponse;    │
+    │ 'body' está vacío y los bytes salen de chunks()                         │
+    └─────────────────────────────────────────────────────────────────────────┘
+    """
+
+    __slots__ = ('size', 'content', 'chunk_size', 'start', 'end')
+
+    streamed = True
+
+    def __init__(self, status: str, headers: list, size: int, content: Callable[[int], bytes],
+                 chunk_size: int = 64 * 1024, start: int = 0, end: Optional[int] = None,
+                 date_at: Optional[int] = None):
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ PARÁMETROS:                                                          │
+        │   status / headers: como PreparedResponse (sin Content-Length)      │
+        │   size: Tamaño total del fichero falso en bytes                     │
+        │   content: content(n) → trozo n, EXACTAMENTE chunk_size bytes       │
+        │   start / end: Primer y último byte a enviar (incluidos)            │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        self.size = size
+        self.content = content
+        self.chunk_size = chunk_size
+        self.start = start
+        self.end = size - 1 if end is None else end
+        super().__init__(status, headers, b"", False, date_at,
+                         content_length=self.end - self.start + 1)
+
+    @classmethod
+    def file(cls, content_type: str, size: int, content: Callable[[int], bytes],
+             chunk_size: int = 64 * 1024, extra_headers: list = None) -> 'StreamedResponse':
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ ATAJO: fichero descargable estilo Apache                            │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ 200 OK + Server, Date, Last-Modified, ETag (tamaño-semilla, como    │
+        │ Apache: tamaño y fecha) y Accept-Ranges: bytes                      │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        from .http_builder import HTTPResponseBuilder
+        headers = [
+            f"Server: {HTTPResponseBuilder.SERVER_NAME}",
+            "Last-Modified: Tue, 04 Mar 2025 03:17:42 GMT",
+            f'ETag: "{size:x}-62f7c3a1e5b80"',
+            "Accept-Ranges: bytes",
+            f"Content-Type: {content_type}",
+        ] + (extra_headers or [])
+        return cls("200 OK", headers, size, content, chunk_size, date_at=0)
+
+    def for_range(self, range_header: Optional[str]) -> PreparedResponse:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ APLICAR LA CABECERA Range (RFC 7233)                                │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │   Sin Range / mal escrita / varios rangos → el fichero entero (200) │
+        │   "bytes=100-199", "bytes=100-", "bytes=-500" → 206 Partial Content │
+        │   Empieza después del final → 416 Range Not Satisfiable             │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        if not range_header or self.start != 0 or self.end != self.size - 1:
+            return self
+        parsed = _parse_range(range_header, self.size)
+        if parsed is None:
+            return self
+        if parsed is _UNSATISFIABLE:
+            headers = [h for h in self.headers if not h.lower().startswith('content-type')]
+            return PreparedResponse("416 Range Not Satisfiable",
+                                    headers + [f"Content-Range: bytes */{self.size}"],
+                                    b"", False, self.date_at)
+        start, end = parsed
+        return StreamedResponse(
+            "206 Partial Content",
+            self.headers + [f"Content-Range: bytes {start}-{end}/{self.size}"],
+            self.size, self.content, self.chunk_size, start, end, self.date_at
+        )
+
+    def chunks(self) -> Iterator[memoryview]:
+        """
+        ┌─────────────────────────────────────────────────────────────────────┐
+        │ GENERAR LOS BYTES start..end, UN TROZO CADA VEZ                     │
+        ├─────────────────────────────────────────────────────────────────────┤
+        │ Se recorta el primer y el último trozo para respetar el Range.      │
+        │ memoryview: recortar no copia el trozo                              │
+        └─────────────────────────────────────────────────────────────────────┘
+        """
+        size = self.chunk_size
+        first, last = self.start // size, self.end // size
+        for index in range(first, last + 1):
+            data = memoryview(self.content(index))
+            low = self.start - index * size if index == first else 0
+            high = self.end - index * size + 1 if index == last else size
+            yield data[low:high]
+
+
+# Marca para "el rango pedido no existe en el fichero" (→ 416)
+_UNSATISFIABLE = object()
+
+
+def _parse_range(header: str, size: int):
+    """
+    "bytes=a-b" → (a, b) recortado al tamaño; None si no se entiende o pide
+    varios rangos (se ignora y se envía todo, lo permite el RFC);
+    _UNSATISFIABLE si empieza fuera del fichero.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:                       # "-500": los últimos 500 bytes
+            suffix = int(last)
+            if suffix <= 0:
+                return _UNSATISFIABLE
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start > end and last:
+        return None
+    if start >= size:
+        return _UNSATISFIABLE
+    return start, min(end, size - 1)
@@ -1,3 +1,3 @@
-from .http_service import HTTPService
+from .http_service import HTTPService, AsyncHTTPService
 from .ssh_service import SSHService
-from .rtsp_service import RTSPService
+from .rtsp_service import RTSPService, AsyncRTSPService
@@ -0,0 +1,170 @@
+"""
+Admission control for honeypot services.
+Decides whether an accepted connection is served, queued, shed or tarpitted,
+and keeps the counters needed to size a node.
+"""
+
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import config
+
+
+# Decisiones posibles para una conexión recién aceptada
+ADMIT = 'admit'      # Hay un trabajador libre: se atiende ya
+QUEUE = 'queue'      # Todos ocupados, pero cabe en la cola de espera
+SHED = 'shed'        # Sobrecarga: se corta con RST (sin gastar nada más)
+TARPIT = 'tarpit'    # Sobrecarga: se deja colgada sin responder (ralentiza al bot)
+
+OVERLOAD_POLICIES = ('queue', 'shed', 'tarpit')
+
+
+class AdmissionController:
+    """
+    Contabilidad de conexiones de UN servicio.
+    Es thread-safe: la usan tanto el bucle de accept (hilos) como el event loop (asyncio).
+    """
+
+    def __init__(self, max_workers: int = None, max_queued: int = None,
+                 max_per_ip: int = None, policy: str = None, tarpit_max: int = None):
+        self.max_workers = max_workers or config.MAX_WORKERS
+        self.max_queued = config.MAX_QUEUED if max_queued is None else max_queued
+        self.max_per_ip = max_per_ip or config.MAX_CONNECTIONS_PER_IP
+        self.policy = (policy or config.OVERLOAD_POLICY).lower()
+        self.tarpit_max = config.TARPIT_MAX if tarpit_max is None else tarpit_max
+        if self.policy not in OVERLOAD_POLICIES:
+            print(f"[!] Política de sobrecarga desconocida '{self.policy}', usando 'shed'")
+            self.policy = 'shed'
+
+        self._lock = threading.Lock()
+        self._per_ip = {}             # ip -> conexiones activas + en cola
+        self.active = 0               # Handlers ejecutándose ahora mismo
+        self.waiting = 0              # Conexiones en cola esperando trabajador
+        self.tarpit_active = 0        # Conexiones retenidas en el tarpit
+        self.counters = {
+            'accepted': 0,            # Total admitidas (directas + encoladas)
+            'queued': 0,              # Total que tuvieron que esperar en cola
+            'shed': 0,                # Total cortadas con RST
+            'tarpitted': 0,           # Total enviadas al tarpit
+            'per_ip_limited': 0,      # De las anteriores, cuántas por superar el tope por IP
+        }
+
+    def admit(self, ip: str, limit_per_ip: bool = True) -> str:
+        """
+        Decide qué hacer con una conexión nueva de 'ip' y actualiza los contadores.
+        limit_per_ip=False: la IP es un balanceador (todos los clientes la comparten),
+        se cuenta pero no se le aplica el tope por IP.
+        """
+        with self._lock:
+            if limit_per_ip and self._per_ip.get(ip, 0) >= self.max_per_ip:
+                self.counters['per_ip_limited'] += 1
+                return self._overload_locked()
+
+            if self.active + self.waiting < self.max_workers:
+                self.active += 1
+                decision = ADMIT
+            elif self.policy == 'queue' and self.waiting < self.max_queued:
+                self.waiting += 1
+                self.counters['queued'] += 1
+                decision = QUEUE
+            else:
+                return self._overload_locked()
+
+            self._per_ip[ip] = self._per_ip.get(ip, 0) + 1
+            self.counters['accepted'] += 1
+            return decision
+
+    def _overload_locked(self) -> str:
+        """Sobrecarga: tarpit si la política lo pide y queda hueco, si no RST"""
+        if self.policy == 'tarpit' and self.tarpit_active < self.tarpit_max:
+            self.tarpit_active += 1
+            self.counters['tarpitted'] += 1
+            return TARPIT
+        self.counters['shed'] += 1
+        return SHED
+
+    def dequeued(self) -> None:
+        """Una conexión en cola pasa a ser atendida por un trabajador"""
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+
+    def release(self, ip: str) -> None:
+        """El handler terminó: libera el hueco global y el de la IP"""
+        with self._lock:
+            self.active -= 1
+            remaining = self._per_ip.get(ip, 1) - 1
+            if remaining > 0:
+                self._per_ip[ip] = remaining
+            else:
+                self._per_ip.pop(ip, None)
+
+    def release_tarpit(self) -> None:
+        """Una conexión sale del tarpit"""
+        with self._lock:
+            self.tarpit_active -= 1
+
+    def snapshot(self) -> dict:
+        """Foto de los contadores (para la API de gestión / dimensionar nodos)"""
+        with self._lock:
+            return {
+                'policy': self.policy,
+                'max_workers': self.max_workers,
+                'max_queued': self.max_queued,
+                'max_per_ip': self.max_per_ip,
+                'active': self.active,
+                'waiting': self.waiting,
+                'tarpit_active': self.tarpit_active,
+                'tracked_ips': len(self._per_ip),
+                **self.counters,
+            }
+
+
+def reset_connection(sock: socket.socket) -> None:
+    """Cierra con RST (SO_LINGER=0): no hay FIN ni TIME_WAIT, coste mínimo"""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    except OSError:
+        pass
+    try:
+        sock.close()
+    except OSError:
+        pass
+
+
+class Tarpit:
+    """
+    Retiene sockets sin leerlos ni responder hasta que vence su plazo.
+    Un único hilo para todos (modo hilos); en asyncio basta con un asyncio.sleep.
+    """
+
+    def __init__(self, controller: AdmissionController, hold_seconds: int = None):
+        self.controller = controller
+        self.hold_seconds = hold_seconds or config.TARPIT_SECONDS
+        self._held = deque()          # (deadline, socket) en orden de llegada
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def hold(self, sock: socket.socket) -> None:
+        """Mete un socket en el tarpit"""
+        with self._lock:
+            self._held.append((time.monotonic() + self.hold_seconds, sock))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._reaper, daemon=True)
+                self._thread.start()
+
+    def _reaper(self) -> None:
+        """Cierra los sockets cuyo plazo venció (todos tienen el mismo plazo: FIFO)"""
+        while True:
+            time.sleep(1)
+            now = time.monotonic()
+            while True:
+                with self._lock:
+                    if not self._held or self._held[0][0] > now:
+                        break
+                    _, sock = self._held.popleft()
+                reset_connection(sock)
+                self.controller.release_tarpit()
@@ -0,0 +1,250 @@
+"""
+Asyncio-based service core for the honeypot.
+Same contract as BaseService, but every connection is a coroutine on a
+single event loop instead of an OS thread.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import socket
+import struct
+from abc import abstractmethod
+
+from .base import BaseService
+from .admission import QUEUE, SHED, TARPIT, reset_connection
+from . import proxy_protocol
+import config
+
+
+# Variante asíncrona de BaseService.
+# En el modelo clásico cada cliente cuesta un hilo (con su propia pila de memoria).
+# Aquí cada cliente es una corrutina: miles de conexiones lentas o inactivas
+# caben en un único hilo con un bucle de eventos (event loop).
+class AsyncBaseService(BaseService):
+    """Clase base asíncrona: un event loop atiende todas las conexiones"""
+
+    def __init__(self, host: str, port: int, service_name: str):
+        super().__init__(host, port, service_name)
+        self._loop = None             # El event loop donde vive el servicio
+        self._stopped = None          # asyncio.Event que despierta al servidor para apagarse
+        self._executor = None         # Pool ACOTADO para trabajo bloqueante (logs, geolocalización)
+        self._waiters = collections.deque()  # Futuros de conexiones en cola (política 'queue')
+        self._tasks = set()           # Conexiones aceptadas a mano (modo PROXY_PROTOCOL)
+
+    def start(self) -> None:
+        """Arranca el event loop (bloquea el hilo que lo llame, igual que BaseService.start)"""
+        _raise_nofile_limit()
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            print(f"[!] {self.service_name} error crítico: {e}")
+        finally:
+            self.stop()
+
+    async def _serve(self) -> None:
+        """Crea el servidor asyncio y espera hasta que alguien llame a stop()"""
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.ASYNC_BLOCKING_WORKERS,
+            thread_name_prefix=f"{self.service_name}-blocking"
+        )
+
+        if config.PROXY_PROTOCOL:
+            # La cabecera PROXY llega ANTES que el protocolo (y que el ClientHello en
+            # TLS): se acepta a mano para leerla del socket crudo (ver _on_proxied)
+            listener = _listen(self.host, self.port)
+            accepting = self._loop.create_task(self._accept_proxied(listener))
+            close = lambda: (accepting.cancel(), listener.close())
+        else:
+            server = await asyncio.start_server(
+                self._on_client,
+                self.host,
+                self.port,
+                backlog=config.SOCKET_BACKLOG,
+                reuse_address=True,
+                reuse_port=config.SOCKET_REUSEPORT or None,
+                # TLS: el event loop hace el handshake sin bloquear (nunca frena el accept)
+                ssl=self.tls_context,
+                ssl_handshake_timeout=config.TLS_HANDSHAKE_TIMEOUT if self.tls_context else None
+            )
+            close = server.close
+        self.running = True
+        print(f"[*] {self.service_name} (asyncio) escuchando en {self.host}:{self.port}")
+
+        try:
+            await self._stopped.wait()
+        finally:
+            close()
+            self._executor.shutdown(wait=False)
+
+    async def _accept_proxied(self, listener: socket.socket) -> None:
+        """Bucle de accept (modo PROXY_PROTOCOL): una tarea por conexión"""
+        while True:
+            try:
+                client_socket, peer = await self._loop.sock_accept(listener)
+            except OSError as e:
+                if self.running:
+                    print(f"[!] {self.service_name} error al aceptar conexión: {e}")
+                await asyncio.sleep(1)  # Ej: sin descriptores libres (EMFILE): no girar en vacío
+                continue
+            task = self._loop.create_task(self._on_proxied(client_socket, peer))
+            self._tasks.add(task)  # El loop solo guarda referencias débiles a las tareas
+            task.add_done_callback(self._tasks.discard)
+
+    async def _on_proxied(self, client_socket: socket.socket, peer: tuple) -> None:
+        """
+        Igual que BaseService._client_address: la cabecera PROXY de un balanceador
+        de confianza se consume del socket con loop.sock_recv, sin búfer de por
+        medio, y lo que viene detrás (HTTP, ClientHello...) queda intacto en el
+        kernel. Solo entonces se monta el stream (con su handshake TLS, como hace
+        start_server antes de llamar a _on_client).
+        """
+        address = peer
+        try:
+            if proxy_protocol.is_trusted_proxy(peer[0]):
+                address = await proxy_protocol.read_header_async(self._loop, client_socket) or peer
+            reader, writer = await self._open_streams(client_socket)
+        except proxy_protocol.ProxyProtocolError as e:
+            print(f"[!] {self.service_name} cabecera PROXY inválida desde {peer[0]}: {e}")
+            reset_connection(client_socket)
+            return
+        except (OSError, asyncio.TimeoutError):
+            client_socket.close()  # Handshake fallido (ej: HTTP plano contra el puerto HTTPS)
+            return
+        await self._on_client(reader, writer, address)
+
+    async def _open_streams(self, client_socket: socket.socket) -> tuple:
+        """(reader, writer) sobre un socket aceptado, con TLS si el servicio lo usa"""
+        reader = asyncio.StreamReader()
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport, _ = await self._loop.connect_accepted_socket(
+            lambda: protocol, client_socket, ssl=self.tls_context,
+            ssl_handshake_timeout=config.TLS_HANDSHAKE_TIMEOUT if self.tls_context else None
+        )
+        return reader, asyncio.StreamWriter(transport, protocol, reader, self._loop)
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         address: tuple = None) -> None:
+        """
+        Envoltorio común: control de admisión, handler del servicio y cierre SIEMPRE.
+        'address': la de la cabecera PROXY (None = la del socket)
+        """
+        peer = writer.get_extra_info('peername')
+        ip = peer[0]
+        
+        # Mismo portero que el modelo de hilos (AdmissionController)
+        decision = self.admission.admit(ip, not proxy_protocol.is_trusted_proxy(ip))
+        if decision == SHED:
+            _abort_with_rst(writer)
+            return
+        if decision == TARPIT:
+            # En asyncio el tarpit es gratis: una corrutina dormida sin leer nada
+            try:
+                await asyncio.sleep(config.TARPIT_SECONDS)
+            finally:
+                self.admission.release_tarpit()
+                _abort_with_rst(writer)
+            return
+        
+        try:
+            if decision == QUEUE:
+                await self._wait_for_slot()
+            await self.handle_client(reader, writer, address or peer)
+        except Exception as e:
+            print(f"[!] {self.service_name} error en handler: {e}")
+        finally:
+            self.admission.release(ip)
+            self._wake_next_waiter()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+    
+    async def _wait_for_slot(self) -> None:
+        """Espera en la cola hasta que un handler termine y nos ceda su hueco"""
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._wake_next_waiter()  # Nos dieron el hueco pero nos vamos: pasarlo
+            raise
+        finally:
+            self.admission.dequeued()
+    
+    def _wake_next_waiter(self) -> None:
+        """Despierta a la siguiente conexión en cola (si la hay)"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def run_blocking(self, func, *args):
+        """
+        Ejecuta una función BLOQUEANTE (logging, geolocalización...) en el pool acotado.
+        Así el event loop nunca se congela esperando a disco o a red.
+        """
+        return await self._loop.run_in_executor(self._executor, func, *args)
+
+    def stop(self) -> None:
+        """Apaga el servicio (se puede llamar desde cualquier hilo)"""
+        self.running = False
+        loop, stopped = self._loop, self._stopped
+        if loop is not None and stopped is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(stopped.set)
+            except RuntimeError:
+                pass  # El loop ya se cerró
+
+    @abstractmethod
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            address: tuple) -> None:
+        """
+        Manejar la conexión con un cliente (versión corrutina).
+        'address' es la dirección REAL del cliente (la de la cabecera PROXY si
+        la conexión viene de un balanceador; si no, la del socket).
+        """
+        pass
+
+
+def _abort_with_rst(writer: asyncio.StreamWriter) -> None:
+    """Corta la conexión con RST (SO_LINGER=0) sin pasar por el cierre ordenado"""
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+    writer.transport.abort()
+
+
+def _listen(host: str, port: int) -> socket.socket:
+    """Socket de escucha no bloqueante (mismas opciones que BaseService.start)"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if config.SOCKET_REUSEPORT:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        listener.bind((host, port))
+        listener.listen(config.SOCKET_BACKLOG)
+        listener.setblocking(False)
+    except OSError:
+        listener.close()
+        raise
+    return listener
+
+
+def _raise_nofile_limit() -> None:
+    """Sube el límite de descriptores abiertos al máximo permitido (10k+ sockets)"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass  # Windows o sin permisos: seguimos con el límite actual
@@ -4,9 +4,14 @@ Provides common interface and socket management.
 """
 
 import socket
+import queue
 import threading
 from abc import ABC, abstractmethod
 
+from .admission import AdmissionController, Tarpit, reset_connection, ADMIT, QUEUE, TARPIT
+from . import proxy_protocol
+import config
+
 
 # Definimos una 'Clase Abstracta' (ABC).
 # Esto no es un servicio real, es una PLANTILLA.
@@ -25,6 +30,11 @@ class BaseService(ABC):
         self.service_name = service_name # Nombre para los logs (ej: "HTTP Honeypot")
         self.server_socket = None     # Aquí guardaremos el "teléfono" (socket) cuando lo creemos
         self.running = False          # Semáforo para saber si debemos seguir funcionando
+        # El "portero": decide quién entra, quién espera y a quién se echa (ver admission.py)
+        self.admission = AdmissionController()
+        self._tarpit = Tarpit(self.admission)
+        self._work_queue = None       # Cola de conexiones pendientes para el pool de trabajadores
+        self.tls_context = None       # SSLContext compartido si el servicio habla TLS (HTTPS)
     
     def start(self) -> None:
         """Función para ARRANCAR el servicio y ponerse a escuchar"""
@@ -38,16 +48,26 @@ class BaseService(ABC):
         # Evita el error "Address already in use" si reinicias rápido.
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         
+        # Modo multiproceso (--workers N): varios procesos escuchan en el MISMO puerto.
+        # SO_REUSEPORT hace que el kernel reparta las conexiones entre ellos.
+        if config.SOCKET_REUSEPORT:
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        
         try:
             # 2. BIND (Asignar número)
             # Decimos "Este teléfono responde en esta IP y este Puerto".
             self.server_socket.bind((self.host, self.port))
             
             # 3. LISTEN (Esperar llamadas)
-            # Empezamos a escuchar. El '5' es la cola de espera máxima.
-            self.server_socket.listen(5)
+            # Empezamos a escuchar. SOCKET_BACKLOG es la cola del kernel (config.py).
+            self.server_socket.listen(config.SOCKET_BACKLOG)
             self.running = True
             
+            # 3b. CONTRATAR LA PLANTILLA (Pool de trabajadores)
+            # Antes: un hilo NUEVO por cada llamada (miles de hilos en un escaneo masivo).
+            # Ahora: un número FIJO de trabajadores que cogen llamadas de una cola.
+            self._start_workers()
+            
             print(f"[*] {self.service_name} escuchando en {self.host}:{self.port}")
             
             # 4. BUCLE DE ATENCIÓN
@@ -60,14 +80,9 @@ class BaseService(ABC):
                     # address: La IP:Puerto de quien llama.
                     client_socket, address = self.server_socket.accept()
                     
-                    # 5. DELEGAR (Multitarea)
-                    # Si atendiéramos al cliente aquí, bloquearíamos la puerta.
-                    # En lugar de eso, contratamos a un trabajador (hilo) para que lo atienda.
-                    threading.Thread(
-                        target=self.handle_client,      # Ve a ejecutar esta función
-                        args=(client_socket, address),  # Con estos datos
-                        daemon=True                     # Muere si el jefe muere
-                    ).start()
+                    # 5. DELEGAR (Control de admisión)
+                    # El portero decide: atender, encolar, cortar (RST) o tarpit.
+                    self._dispatch(client_socket, address)
                     
                 except Exception as e:
                     if self.running:
@@ -79,9 +94,72 @@ class BaseService(ABC):
             # Si algo falla gravemente, nos aseguramos de cerrar todo.
             self.stop()
     
+    def _start_workers(self) -> None:
+        """Arranca MAX_WORKERS hilos que atienden conexiones sacadas de la cola"""
+        self._work_queue = queue.Queue()
+        for i in range(self.admission.max_workers):
+            threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.service_name}-worker-{i}",
+                daemon=True                     # Mueren si el jefe muere
+            ).start()
+    
+    def _dispatch(self, client_socket: socket.socket, address: tuple) -> None:
+        """Aplica la política de admisión a una conexión recién aceptada"""
+        decision = self.admission.admit(address[0], not proxy_protocol.is_trusted_proxy(address[0]))
+        if decision in (ADMIT, QUEUE):
+            self._work_queue.put((client_socket, address, decision == QUEUE))
+        elif decision == TARPIT:
+            self._tarpit.hold(client_socket)
+        else:
+            reset_connection(client_socket)
+    
+    def _worker_loop(self) -> None:
+        """Bucle de un trabajador: coge una conexión, la atiende, repite"""
+        while True:
+            item = self._work_queue.get()
+            if item is None:
+                return  # Señal de apagado
+            client_socket, address, was_queued = item
+            if was_queued:
+                self.admission.dequeued()
+            try:
+                client_address = self._client_address(client_socket, address)
+                if client_address is not None:
+                    self.handle_client(client_socket, client_address)
+            except Exception as e:
+                print(f"[!] {self.service_name} error en handler: {e}")
+            finally:
+                self.admission.release(address[0])
+    
+    def _client_address(self, client_socket: socket.socket, address: tuple):
+        """
+        Dirección REAL del cliente. Detrás de un balanceador (TRUSTED_PROXIES) con
+        PROXY_PROTOCOL, la conexión empieza con una cabecera PROXY que la trae;
+        se consume aquí (en el trabajador) y el handler ve el resto intacto.
+        Cabecera ausente o rota → None (se cuelga: no sabemos de quién es).
+        """
+        if not (config.PROXY_PROTOCOL and proxy_protocol.is_trusted_proxy(address[0])):
+            return address
+        try:
+            return proxy_protocol.read_header(client_socket) or address
+        except (proxy_protocol.ProxyProtocolError, OSError) as e:
+            print(f"[!] {self.service_name} cabecera PROXY inválida desde {address[0]}: {e}")
+            reset_connection(client_socket)
+            return None
+    
+    def get_stats(self) -> dict:
+        """Contadores de admisión (activas, en cola, cortadas...) para dimensionar nodos"""
+        return {'service': self.service_name, 'port': self.port, **self.admission.snapshot()}
+    
     def stop(self) -> None:
         """Función para APAGAR el servicio"""
+        was_running = self.running
         self.running = False
+        if was_running and self._work_queue is not None:
+            # Una 'píldora' (None) por trabajador para que terminen
+            for _ in range(self.admission.max_workers):
+                self._work_queue.put(None)
         if self.server_socket:
             try:
                 # Colgamos el teléfono principal.
@@ -0,0 +1,344 @@
+"""
+Incremental HTTP/1.1 request reader for the honeypot.
+It does no I/O: the service feeds it the bytes it reads (from a socket or an
+asyncio stream) and gets complete requests back, so the thread and asyncio
+versions of HTTPService share exactly the same framing rules.
+"""
+
+import time
+from typing import Callable, List, Optional, Tuple
+
+import config
+
+
+# Fases del lector
+_HEAD = 'head'                # Esperando la línea de petición + cabeceras
+_BODY = 'body'                # Cuerpo con Content-Length
+_CHUNK_SIZE = 'chunk_size'    # Chunked: línea con el tamaño (hex) del siguiente trozo
+_CHUNK_DATA = 'chunk_data'    # Chunked: datos del trozo
+_CHUNK_END = 'chunk_end'      # Chunked: CRLF que cierra cada trozo
+_TRAILERS = 'trailers'        # Chunked: cabeceras finales tras el trozo de tamaño 0
+
+_MAX_LINE = 1024              # Tope para una línea de tamaño de chunk
+
+
+class HTTPRequestError(Exception):
+    """
+    La petición no se puede leer (mal formada, demasiado grande o demasiado lenta).
+    Lleva el status con el que respondería un servidor real.
+    """
+
+    def __init__(self, status: str, reason: str):
+        super().__init__(reason)
+        self.status = status      # Ej: "400 Bad Request"
+        self.reason = reason      # Explicación para el log
+
+
+class HTTPRequest:
+    """Una petición HTTP completa tal y como llegó por el cable"""
+
+    def __init__(self, method: str, target: str, version: str,
+                 header_list: List[Tuple[str, str]], head: bytes):
+        self.method = method
+        self.target = target                  # Ruta tal cual (con ?query)
+        self.version = version
+        self.header_list = header_list        # [(nombre, valor)] en el orden recibido
+        self.headers = dict(header_list)      # Acceso cómodo (si se repite, gana la última)
+        self.head = head                      # Bytes de la línea de petición + cabeceras
+        self.body = bytearray()               # Cuerpo capturado (ya sin chunked)
+        self.body_length = 0                  # Bytes de cuerpo recibidos en total
+        self.body_truncated = False           # True si superó HTTP_MAX_BODY_SIZE
+        self.chunked = False
+        self.upload = None                    # {'sha256', 'size', 'stored'} si el cuerpo se guardó en disco
+
+    def get_header(self, name: str, default: str = None) -> Optional[str]:
+        """Cabecera sin distinguir mayúsculas ('content-length' == 'Content-Length')"""
+        name = name.lower()
+        for key, value in reversed(self.header_list):
+            if key.lower() == name:
+                return value
+        return default
+
+    @property
+    def keep_alive(self) -> bool:
+        """¿Quiere el cliente mantener la conexión abierta tras la respuesta?"""
+        connection = (self.get_header('Connection') or '').lower()
+        if self.version.upper() == 'HTTP/1.1':
+            return 'close' not in connection          # HTTP/1.1: persistente por defecto
+        return 'keep-alive' in connection             # HTTP/1.0: solo si lo pide
+
+    def text(self) -> str:
+        """Petición completa como texto (cabeceras + cuerpo capturado) para detección y logs"""
+        return (self.head + b'\r\n\r\n' + self.body).decode('utf-8', errors='ignore')
+
+
+class HTTPRequestReader:
+    """
+    Lector incremental de peticiones HTTP/1.1.
+
+    Uso:
+        reader.feed(datos_del_socket)
+        request = reader.next_request()   # None = faltan bytes
+
+    Respeta Content-Length y Transfer-Encoding: chunked, y pone topes a todo:
+    tamaño de cabeceras, número de cabeceras, cuerpo guardado en memoria y
+    tiempo para completar cada fase (contra clientes tipo Slowloris).
+
+    Con 'capture' (ver core/upload_store.py), los cuerpos de más de
+    UPLOAD_CAPTURE_THRESHOLD bytes se pasan ENTEROS, según llegan, a una
+    captura que los hashea y los guarda en disco.
+    """
+
+    def __init__(self, max_header_size: int = None, max_headers: int = None,
+                 max_body_size: int = None, capture: Callable = None):
+        self.max_header_size = max_header_size or config.HTTP_MAX_HEADER_SIZE
+        self.max_headers = max_headers or config.HTTP_MAX_HEADERS
+        self.max_body_size = config.HTTP_MAX_BODY_SIZE if max_body_size is None else max_body_size
+        self.capture = capture        # Función que abre una captura nueva (o None)
+        self._capture = None          # Captura del cuerpo en curso
+
+        self._buffer = bytearray()
+        self._scanned = 0             # Hasta dónde ya buscamos el fin de cabeceras
+        self._state = _HEAD
+        self._request = None          # Petición a medio leer
+        self._remaining = 0           # Bytes pendientes del cuerpo / del chunk actual
+        self._deadline = None         # Límite (monotonic) para terminar la fase actual
+
+    # ─── Entrada ──────────────────────────────────────────────────────────
+
+    def feed(self, data: bytes) -> None:
+        """Añade bytes recibidos del cliente"""
+        if self._deadline is None:
+            self._deadline = time.monotonic() + config.HTTP_HEADER_TIMEOUT
+        self._buffer += data
+
+    def has_partial(self) -> bool:
+        """¿Hay una petición empezada y sin terminar?"""
+        return self._state != _HEAD or bool(self._buffer.strip(b'\r\n'))
+
+    def partial(self) -> bytes:
+        """Lo recibido de la petición incompleta (para registrarlo aunque falle)"""
+        if self._request is None:
+            return bytes(self._buffer[:self.max_header_size])
+        return self._request.head + b'\r\n\r\n' + bytes(self._request.body)
+
+    def close(self) -> None:
+        """Fin de la conexión: un cuerpo a medio capturar se descarta"""
+        if self._capture is not None:
+            self._capture.abort()
+            self._capture = None
+
+    def time_left(self) -> Optional[float]:
+        """Segundos para completar la fase actual (None = aún no empezó ninguna petición)"""
+        if self._deadline is None:
+            return None
+        left = self._deadline - time.monotonic()
+        if left <= 0:
+            phase = 'cabeceras' if self._state == _HEAD else 'cuerpo'
+            raise HTTPRequestError("408 Request Timeout", f"plazo agotado leyendo {phase}")
+        return left
+
+    # ─── Salida ───────────────────────────────────────────────────────────
+
+    def next_request(self) -> Optional[HTTPRequest]:
+        """Devuelve la siguiente petición completa, o None si faltan bytes"""
+        while True:
+            if self._state == _HEAD:
+                if not self._read_head():
+                    return None
+            elif self._state == _BODY:
+                self._take_body(self._remaining)
+                if self._remaining:
+                    return None
+                return self._finish()
+            elif self._state == _CHUNK_SIZE:
+                line = self._read_line()
+                if line is None:
+                    return None
+                self._start_chunk(line)
+            elif self._state == _CHUNK_DATA:
+                self._take_body(self._remaining)
+                if self._remaining:
+                    return None
+                self._state = _CHUNK_END
+            elif self._state == _CHUNK_END:
+                line = self._read_line()
+                if line is None:
+                    return None
+                if line:
+                    raise HTTPRequestError("400 Bad Request", "falta CRLF tras un chunk")
+                self._state = _CHUNK_SIZE
+            elif self._state == _TRAILERS:
+                line = self._read_line()
+                if line is None:
+                    return None
+                if not line:
+                    return self._finish()
+
+    # ─── Cabeceras ────────────────────────────────────────────────────────
+
+    def _read_head(self) -> bool:
+        """Intenta leer línea de petición + cabeceras. False = faltan bytes"""
+        # Líneas vacías antes de la petición (restos de la anterior): se ignoran
+        while self._buffer[:2] == b'\r\n' or self._buffer[:1] == b'\n':
+            del self._buffer[:2 if self._buffer[:2] == b'\r\n' else 1]
+            self._scanned = 0
+
+        # Buscamos el final de las cabeceras solo en lo nuevo (sin re-escanear todo)
+        start = max(0, self._scanned - 3)
+        end, sep = self._buffer.find(b'\r\n\r\n', start), 4
+        lf_end = self._buffer.find(b'\n\n', start)
+        if lf_end != -1 and (end == -1 or lf_end < end):
+            end, sep = lf_end, 2      # Clientes que solo mandan \n (scripts caseros)
+
+        if end == -1:
+            self._scanned = len(self._buffer)
+            if len(self._buffer) > self.max_header_size:
+                raise HTTPRequestError("431 Request Header Fields Too Large",
+                                       f"cabeceras de más de {self.max_header_size} bytes")
+            self._reject_garbage()
+            return False
+        if end > self.max_header_size:
+            raise HTTPRequestError("431 Request Header Fields Too Large",
+                                   f"cabeceras de más de {self.max_header_size} bytes")
+
+        head = bytes(self._buffer[:end])
+        del self._buffer[:end + sep]
+        self._scanned = 0
+        self._request = self._parse_head(head)
+        self._start_body()
+        return True
+
+    def _reject_garbage(self) -> None:
+        """Si la primera línea ya llegó y no parece HTTP, no esperamos más"""
+        newline = self._buffer.find(b'\n')
+        if newline != -1 and not _looks_like_request_line(bytes(self._buffer[:newline])):
+            raise HTTPRequestError("400 Bad Request", "la primera línea no es una petición HTTP")
+
+    def _parse_head(self, head: bytes) -> HTTPRequest:
+        """Separa línea de petición y cabeceras (tolerante, como el parser original)"""
+        lines = head.decode('latin-1').replace('\r\n', '\n').split('\n')
+        request_line = lines[0]
+        if not _looks_like_request_line(request_line.encode('latin-1')):
+            raise HTTPRequestError("400 Bad Request", "la primera línea no es una petición HTTP")
+
+        parts = request_line.split(' ')
+        method = parts[0]
+        target = parts[1] if len(parts) > 1 and parts[1] else '/'
+        version = parts[2] if len(parts) > 2 else 'HTTP/0.9'
+
+        header_list = []
+        for line in lines[1:]:
+            if ':' not in line:
+                continue          # Basura entre cabeceras: la ignoramos como antes
+            if len(header_list) >= self.max_headers:
+                raise HTTPRequestError("431 Request Header Fields Too Large",
+                                       f"más de {self.max_headers} cabeceras")
+            key, value = line.split(':', 1)
+            header_list.append((key.strip(), value.strip()))
+
+        return HTTPRequest(method, target, version, header_list, head)
+
+    # ─── Cuerpo ───────────────────────────────────────────────────────────
+
+    def _start_body(self) -> None:
+        """Decide cómo viene el cuerpo (chunked, Content-Length o nada)"""
+        request = self._request
+        transfer_encoding = request.get_header('Transfer-Encoding')
+        lengths = {value for key, value in request.header_list if key.lower() == 'content-length'}
+
+        if transfer_encoding is not None:
+            # Con los dos, manda Transfer-Encoding (RFC 7230 3.3.3) y Content-Length se ignora
+            codings = [c.strip().lower() for c in transfer_encoding.split(',')]
+            if codings[-1] != 'chunked':
+                raise HTTPRequestError("400 Bad Request",
+                                       f"Transfer-Encoding no soportado: {transfer_encoding}")
+            request.chunked = True
+            self._state = _CHUNK_SIZE
+        elif lengths:
+            if len(lengths) > 1:
+                raise HTTPRequestError("400 Bad Request", "varios Content-Length distintos")
+            value = lengths.pop()
+            if not value.isdigit():
+                raise HTTPRequestError("400 Bad Request", f"Content-Length inválido: {value[:32]}")
+            self._remaining = int(value)
+            self._state = _BODY
+        else:
+            self._state = _BODY
+            self._remaining = 0
+            return
+
+        # Nueva fase, nuevo plazo: el cuerpo puede tardar más que las cabeceras
+        self._deadline = time.monotonic() + config.HTTP_BODY_TIMEOUT
+
+    def _take_body(self, wanted: int) -> None:
+        """Consume hasta 'wanted' bytes de cuerpo; guarda solo hasta el tope"""
+        take = min(wanted, len(self._buffer))
+        if not take:
+            return
+        request = self._request
+        if self._capture is None and self.capture is not None:
+            self._maybe_start_capture(request, take)
+        if self._capture is not None:
+            self._capture.write(self._buffer[:take])
+        room = self.max_body_size - len(request.body)
+        if room > 0:
+            request.body += self._buffer[:min(take, room)]
+        if take > room:
+            request.body_truncated = True     # El resto se lee y se descarta
+        del self._buffer[:take]
+        request.body_length += take
+        self._remaining -= take
+
+    def _maybe_start_capture(self, request: HTTPRequest, take: int) -> None:
+        """
+        Al pasar de UPLOAD_CAPTURE_THRESHOLD se abre la captura y se le da lo ya
+        recibido (aún está entero en memoria: el umbral es menor que el tope).
+        """
+        if (request.body_length + take > config.UPLOAD_CAPTURE_THRESHOLD
+                and len(request.body) == request.body_length):
+            self._capture = self.capture()
+            if request.body:
+                self._capture.write(request.body)
+
+    def _read_line(self) -> Optional[str]:
+        """Lee una línea corta (tamaño de chunk / trailer). None = falta el salto de línea"""
+        newline = self._buffer.find(b'\n')
+        if newline == -1:
+            if len(self._buffer) > _MAX_LINE:
+                raise HTTPRequestError("400 Bad Request", "línea de chunk demasiado larga")
+            return None
+        if newline > _MAX_LINE:
+            raise HTTPRequestError("400 Bad Request", "línea de chunk demasiado larga")
+        line = bytes(self._buffer[:newline]).rstrip(b'\r').decode('latin-1')
+        del self._buffer[:newline + 1]
+        return line
+
+    def _start_chunk(self, line: str) -> None:
+        """Interpreta '1a3f;extension=x' como tamaño del siguiente trozo"""
+        size = line.split(';', 1)[0].strip()
+        try:
+            self._remaining = int(size, 16)
+        except ValueError:
+            raise HTTPRequestError("400 Bad Request", f"tamaño de chunk inválido: {size[:32]}")
+        if self._remaining < 0:
+            raise HTTPRequestError("400 Bad Request", f"tamaño de chunk inválido: {size[:32]}")
+        self._state = _CHUNK_DATA if self._remaining else _TRAILERS
+
+    def _finish(self) -> HTTPRequest:
+        """Petición completa: se entrega y el lector queda listo para la siguiente"""
+        request = self._request
+        if self._capture is not None:
+            request.upload = self._capture.finish()
+            self._capture = None
+        self._request = None
+        self._state = _HEAD
+        self._remaining = 0
+        self._deadline = (time.monotonic() + config.HTTP_HEADER_TIMEOUT) if self._buffer else None
+        return request
+
+
+def _looks_like_request_line(line: bytes) -> bool:
+    """'GET /x HTTP/1.1' sí; un ClientHello TLS o ruido binario no"""
+    method = line.split(b' ', 1)[0]
+    return 0 < len(method) <= 32 and method.replace(b'-', b'').replace(b'_', b'').isalpha()
@@ -3,16 +3,36 @@ HTTP honeypot service.
 Handles HTTP requests and detects web attacks.
 """
 
+import re
+import ssl
 import socket
+import asyncio
+import threading
+import time
 
-# Importamos la plantilla maestra (BaseService)
+# Importamos la plantilla maestra (BaseService) y su variante asíncrona
 from .base import BaseService
+from .async_base import AsyncBaseService
+# Lector incremental de peticiones (cabeceras, Content-Length, chunked, límites)
+from .http_reader import HTTPRequest, HTTPRequestReader, HTTPRequestError
+# Certificado de la persona y SSLContext compartido (modo HTTPS)
+from . import tls
+# Balanceadores de confianza (X-Forwarded-For)
+from .proxy_protocol import is_trusted_proxy, forwarded_client
 # Importamos el 'Chivato' (Logger) para guardar lo que pase
 from core.logger import HoneypotLogger
+# Almacén de cuerpos grandes (webshells, droppers) por hash SHA-256
+from core.upload_store import UploadStore, capture_factory
 # Importamos el detector de ataques (el guardia de seguridad)
 from detection.http_attacks import HTTPAttackDetector
-# Importamos las respuestas falsas (para engañar al atacante)
+from detection.rules import reload_rules, rule_stats
+# Contadores por IP entre conexiones y servicios (fuerza bruta, escaneo de directorios)
+from detection.tracker import BehaviorTracker
+# Huella del cliente por la forma de la petición (orden de cabeceras, versión...)
+from detection.fingerprint import fingerprint_request, fingerprint_stats
+# Importamos las respuestas falsas (para engañar al atacante), ya en bytes
 from responses.endpoint_manager import HTTPEndpoints
+from responses.utils.prepared_response import PreparedResponse
 import config
 
 
@@ -22,8 +42,8 @@ import config
 class HTTPService(BaseService):
     """Servicio Honeypot para simular un servidor Web (HTTP)"""
     
-    def __init__(self, host: str = None, port: int = None):
-        """Inicializamos el servicio web"""
+    def __init__(self, host: str = None, port: int = None, use_tls: bool = False):
+        """Inicializamos el servicio web (use_tls=True: HTTPS con el certificado de la persona)"""
         import os
         # Si no nos dan IP/Puerto, usamos los de config.py
         host = host or config.HTTP_HOST
@@ -32,7 +52,25 @@ class HTTPService(BaseService):
         
         # SUPER: Llamamos al constructor del padre (BaseService).
         # Es como decir: "Papá, inicializa la parte aburrida de los sockets por mí".
-        super().__init__(host, port, "HTTP Honeypot")
+        super().__init__(host, port, "HTTPS Honeypot" if use_tls else "HTTP Honeypot")
+        
+        # HTTPS: UN SSLContext para todas las conexiones (certificado cargado una vez,
+        # sesiones reanudables). Si no hay certificado ni forma de crearlo, RuntimeError.
+        if use_tls:
+            self.tls_context = tls.server_context()
+        self.scheme = 'https' if use_tls else 'http'
+        
+        # Contadores de revalidación (GET condicional): cuánto tráfico repetido
+        # se ahorra el cuerpo con un 304. Con lock: varios hilos los suman a la vez.
+        self._cache_lock = threading.Lock()
+        self.cache_counters = {'conditional': 0, 'not_modified': 0}
+        # Handshakes TLS: completos vs reanudados (los reanudados no firman nada)
+        self.tls_counters = {'tls_handshakes': 0, 'tls_resumed': 0}
+        # Descargas de señuelos en curso (por IP) y cuántas se cortaron por el tope.
+        # En modo hilos cada una ocupa un trabajador hasta LURE_MAX_SECONDS.
+        self._lure_lock = threading.Lock()
+        self._lure_streams = {}
+        self.lure_counters = {'lure_streams': 0, 'lure_capped': 0}
     
     # ESTO ES LO IMPORTANTE.
     # BaseService nos obligaba a implementar 'handle_client'. Aquí está.
@@ -46,90 +84,520 @@ class HTTPService(BaseService):
             client_socket: El teléfono privado con el visitante.
             address: Su (IP, Puerto).
         """
+        # El lector junta los trozos que llegan por TCP hasta tener la petición ENTERA
+        # (cabeceras + cuerpo), por grande que sea o por muchos paquetes que ocupe.
+        # Lo que sobre (peticiones "en tubería" / pipelining) se queda para la siguiente vuelta.
+        if self.tls_context is not None:
+            client_socket = self._tls_handshake(client_socket)
+            if client_socket is None:
+                return
+        
+        reader = HTTPRequestReader(capture=capture_factory())
+        served = 0
         try:
-            # 1. RECIBIR DATOS (OÍR)
-            # recv(BUFFER_SIZE): Escuchamos lo que nos dicen.
-            # decode('utf-8'): Convertimos los sonidos (bytes) a palabras (texto).
-            # errors='ignore': Si dicen algo raro que no entendemos, lo ignoramos para no explotar.
-            data = client_socket.recv(config.BUFFER_SIZE).decode('utf-8', errors='ignore')
-            
-            if not data:
-                return # Si no dicen nada, colgamos.
-            
-            # 2. ENTENDER LA PETICIÓN
-            # Analizamos qué piden (ej: "GET /admin/login.php")
-            # Y AHORA TAMBIÉN: Quiénes son (Headers) y Qué traen (Body)
-            method, path, headers, body = self._parse_request(data)
-            
-            # 3. DETECTAR ATAQUES (ANALIZAR)
-            # Le pasamos el texto al experto en seguridad.
-            detected_attacks = HTTPAttackDetector.detect(data)
-            
-            # Extraemos el User-Agent (o ponemos 'Unknown' si no lo envían)
-            user_agent = headers.get('User-Agent', 'Unknown')
-            
-            # 4. REGISTRAR TODO (CHIVARSE)
-            # Guardamos todo en el log: quién, qué pidió, y qué ataques detectamos.
-            HoneypotLogger.log_connection(
-                service='HTTP',
-                ip=address[0],
-                port=address[1],
-                data=data[:config.LOG_DATA_MAX_LENGTH], 
-                extra={
-                    'method': method,
-                    'path': path,
-                    'user_agent': user_agent,
-                    'all_headers': headers, # ¡NUEVO! Todas las cabeceras
-                    'payload_body': body[:1024], # ¡NUEVO! El cuerpo (limitado)
-                    'attacks_detected': detected_attacks
-                }
-            )
-            
-            # 5. RESPONDER (HABLAR)
-            # Buscamos qué respuesta falsa darle según lo que pidió.
-            # LE PASAMOS EL USER-AGENT para que el camarero sepa si darle el "menú trampa".
-            response = HTTPEndpoints.get_response(path, user_agent)
-            # encode('utf-8'): Convertimos nuestro texto a bytes para enviarlo por el cable.
-            client_socket.send(response.encode('utf-8'))
+            # KEEP-ALIVE: gobuster o nikto piden cientos de rutas; si colgamos tras cada
+            # respuesta, reconectan cada vez (TCP handshake + accept por ruta).
+            while True:
+                keep_alive = False
+                try:
+                    # 1. RECIBIR DATOS (OÍR)
+                    # La primera petición puede tardar SOCKET_TIMEOUT; entre peticiones
+                    # de la misma conexión solo esperamos HTTP_KEEPALIVE_TIMEOUT.
+                    idle_timeout = config.HTTP_KEEPALIVE_TIMEOUT if served else config.SOCKET_TIMEOUT
+                    request = self._read_request(client_socket, reader, idle_timeout)
+                    if request is None:
+                        return # Si no dicen nada (más), colgamos.
+                    served += 1
+                    # Detrás de un proxy de confianza, el cliente real va en X-Forwarded-For
+                    client = _forwarded_address(request, address)
+                    
+                    # 2-5. ENTENDER, DETECTAR, REGISTRAR Y PREPARAR RESPUESTA
+                    # Cada petición de la conexión tiene su propia detección y su propio log.
+                    response = self._process_request(request, client, served)
+                    keep_alive = _keeps_alive(request, response, served)
+                    buffers = _response_buffers(request, response, keep_alive, served)
+                    stream = _body_stream(request, response)
+                except HTTPRequestError as error:
+                    # Petición rota, gigante o lenta: la registramos igual y respondemos como Apache
+                    response = self._process_bad_request(reader, error, address)
+                    buffers = response.buffers(keep_alive=False)
+                    stream = None
+                
+                # La respuesta ya son bytes: cabeceras + cuerpo salen juntos, sin re-codificar
+                _send_buffers(client_socket, buffers)
+                # Ficheros señuelo: el cuerpo se genera y se envía trozo a trozo, con ritmo
+                if stream is not None and not self._send_stream(client_socket, request, stream, client):
+                    return  # Descarga cortada: la conexión ya no sirve para más peticiones
+                if not keep_alive:
+                    return
             
         except Exception as e:
             print(f"[!] Error en HTTP handler: {e}")
         finally:
             # 6. COLGAR (LIMPIEZA)
+            reader.close()
             try:
                 client_socket.close()
             except:
                 pass
     
-    def _parse_request(self, data: str) -> tuple:
+    def _tls_handshake(self, client_socket: socket.socket):
+        """
+        HTTPS: el handshake lo hace el TRABAJADOR, no el hilo que acepta conexiones
+        (un cliente lento negociando no frena a los demás). Devuelve el socket
+        cifrado, o None si no hubo handshake (ej: HTTP plano contra el puerto HTTPS).
+        """
+        try:
+            client_socket.settimeout(config.TLS_HANDSHAKE_TIMEOUT)
+            tls_socket = self.tls_context.wrap_socket(client_socket, server_side=True)
+        except OSError:  # ssl.SSLError incluido
+            try:
+                client_socket.close()
+            except OSError:
+                pass
+            return None
+        self._count_handshake(tls_socket.session_reused)
+        return tls_socket
+    
+    def _count_handshake(self, resumed: bool) -> None:
+        """Suma un handshake TLS terminado (y si se reanudó una sesión anterior)"""
+        with self._cache_lock:
+            self.tls_counters['tls_handshakes'] += 1
+            if resumed:
+                self.tls_counters['tls_resumed'] += 1
+    
+    def _read_request(self, client_socket: socket.socket, reader: HTTPRequestReader,
+                      idle_timeout: float = None):
+        """
+        Lee del socket hasta completar una petición (o hasta que se acabe el plazo).
+        Devuelve None si el cliente no llegó a decir nada en 'idle_timeout' segundos.
+        """
+        while True:
+            request = reader.next_request()
+            if request is not None:
+                return request
+            
+            # Cada fase (cabeceras / cuerpo) tiene su plazo: un cliente que manda
+            # un byte cada 29 segundos no nos retiene para siempre.
+            client_socket.settimeout(_read_timeout(reader, idle_timeout))
+            try:
+                chunk = client_socket.recv(config.BUFFER_SIZE)
+            except socket.timeout:
+                chunk = None
+            
+            if not chunk:
+                # Silencio o cuelgue: solo es un error si dejó una petición a medias
+                if not reader.has_partial():
+                    return None
+                if chunk is None:
+                    raise HTTPRequestError("408 Request Timeout", "el cliente dejó de enviar datos")
+                raise HTTPRequestError("400 Bad Request", "conexión cerrada a mitad de la petición")
+            reader.feed(chunk)
+    
+    def _process_request(self, request: HTTPRequest, address: tuple, sequence: int = 1) -> PreparedResponse:
         """
-        Analiza la petición HTTP completa.
-        Extrae Método, Ruta, Cabeceras (Headers) y Cuerpo (Body).
+        Toda la lógica HTTP que NO depende del transporte (hilos o asyncio).
+        Recibe la petición ya leída y devuelve la respuesta a enviar.
+        'sequence' es su número dentro de la conexión (keep-alive).
         """
-        headers = {}
-        body = ""
+        # 2. ENTENDER LA PETICIÓN
+        # El lector ya separó qué piden (ej: "GET /admin/login.php"),
+        # quiénes son (Headers) y qué traen (Body, ya sin trocear si venía chunked).
+        data = request.text()
+        body = request.body.decode('utf-8', errors='ignore')
         
-        # Separar cabeceras y cuerpo
-        parts = data.split('\r\n\r\n', 1)
-        header_part = parts[0]
-        body = parts[1] if len(parts) > 1 else ""
+        # 3. DETECTAR ATAQUES (ANALIZAR)
+        # Le pasamos la petición YA TROCEADA al experto en seguridad: cada regla
+        # de rules.json mira solo su parte (query, ruta, una cabecera, un campo
+        # del formulario...), no el texto entero con todas las cabeceras.
+        detected_attacks = HTTPAttackDetector.detect_request(request, body)
         
-        lines = header_part.split('\r\n')
+        # Extraemos el User-Agent (o ponemos 'Unknown' si no lo envían)
+        user_agent = request.headers.get('User-Agent', 'Unknown')
         
-        # 1. Request Line
-        if not lines:
-            return 'UNKNOWN', '/', headers, body
-            
-        request_line = lines[0]
-        req_parts = request_line.split(' ')
-        method = req_parts[0] if len(req_parts) > 0 else 'UNKNOWN'
-        path = req_parts[1] if len(req_parts) > 1 else '/'
+        # Buscamos qué respuesta falsa darle según lo que pidió.
+        # LE PASAMOS EL USER-AGENT para que el camarero sepa si darle el "menú trampa".
+        response = HTTPEndpoints.get_response(request.target, user_agent)
+        
+        # 3b. MIRAR EL HISTORIAL DE LA IP (no solo esta petición)
+        # Un bot que prueba contraseñas abriendo una conexión por intento, o que
+        # recorre cientos de rutas que no existen, solo se ve sumando peticiones.
+        tracker = BehaviorTracker.default()
+        if _is_login_attempt(request, body):
+            detected_attacks += tracker.record_auth('HTTP', address[0], address[1])
+        detected_attacks += tracker.record_request('HTTP', address[0], address[1],
+                                                   request.target.split('?', 1)[0],
+                                                   response.status.startswith('404'))
+        
+        # 4. REGISTRAR TODO (CHIVARSE)
+        # Guardamos todo en el log: quién, qué pidió, y qué ataques detectamos.
+        HoneypotLogger.log_connection(
+            service='HTTP',
+            ip=address[0],
+            port=address[1],
+            data=data[:config.LOG_DATA_MAX_LENGTH], 
+            extra={
+                'method': request.method,
+                'path': request.target,
+                'user_agent': user_agent,
+                'all_headers': request.headers, # Todas las cabeceras
+                # El cuerpo (limitado); si era grande está en el almacén y basta su hash
+                'payload_body': '' if request.upload else body[:config.LOG_BODY_MAX_LENGTH],
+                'body_length': request.body_length, # Tamaño REAL del cuerpo recibido
+                'upload': request.upload,           # {'sha256', 'size', 'stored'} o None
+                'body_truncated': request.body_truncated,
+                'chunked': request.chunked,
+                'connection_request': sequence, # 1ª, 2ª... petición de la misma conexión
+                'scheme': self.scheme,          # 'http' o 'https'
+                # {'ja4h', 'tool', 'spoofed_user_agent'}: el User-Agent se falsifica, la forma no
+                'fingerprint': fingerprint_request(request, user_agent),
+                'attacks_detected': detected_attacks
+            }
+        )
         
-        # 2. Extract Headers
-        for line in lines[1:]:
-            if not line: break
-            if ':' in line:
-                key, value = line.split(':', 1)
-                headers[key.strip()] = value.strip()
+        # 5. RESPONDER (HABLAR)
+        return self._select_representation(request, response)
+    
+    def _select_representation(self, request: HTTPRequest, response: PreparedResponse) -> PreparedResponse:
+        """
+        Elige entre bytes YA preparados (aquí no se comprime ni se calcula nada):
+        - gzip/deflate/sin comprimir según Accept-Encoding
+        - "304 Not Modified" si el cliente ya tiene esa versión (If-None-Match /
+          If-Modified-Since): crawlers y escáneres que revalidan no se llevan el cuerpo otra vez
+        """
+        response = response.negotiate(request.get_header('Accept-Encoding'))
+        if_none_match = request.get_header('If-None-Match')
+        if_modified_since = request.get_header('If-Modified-Since')
+        if if_none_match is not None or if_modified_since is not None:
+            not_modified = (request.method.upper() in ('GET', 'HEAD')
+                            and response.is_not_modified(if_none_match, if_modified_since))
+            with self._cache_lock:
+                self.cache_counters['conditional'] += 1
+                if not_modified:
+                    self.cache_counters['not_modified'] += 1
+            if not_modified:
+                return response.not_modified()
+        
+        # Ficheros señuelo: "Range: bytes=1000-" → 206 con solo esa parte (reanudar descargas)
+        if response.streamed:
+            response = response.for_range(request.get_header('Range'))
+        return response
+    
+    def _send_stream(self, client_socket: socket.socket, request: HTTPRequest,
+                     response: PreparedResponse, address: tuple) -> bool:
+        """
+        Envía el cuerpo de un fichero señuelo trozo a trozo (solo uno en memoria),
+        a LURE_RATE bytes/s como mucho. Al terminar (o si el atacante corta) se
+        registra cuánto se llevó. Devuelve True si se envió entero.
+        Por encima de LURE_MAX_STREAMS (o LURE_MAX_STREAMS_PER_IP) solo sale el
+        primer trozo y se corta: nadie retiene el pool de trabajadores 15 minutos.
+        """
+        sent = 0
+        started = time.monotonic()
+        completed = False
+        paced = self._start_lure(address[0])
+        try:
+            for chunk in response.chunks():
+                _send_buffers(client_socket, [chunk])
+                sent += len(chunk)
+                if not paced:
+                    break  # Por encima del tope: descarga "cortada" tras el primer trozo
+                delay = _pace(sent, started)
+                if delay is None:
+                    break  # Demasiado tiempo: cortamos (como un servidor que se cansa)
+                if delay:
+                    time.sleep(delay)
+            else:
+                completed = True
+        except OSError:
+            pass  # El atacante canceló la descarga
+        finally:
+            if paced:
+                self._end_lure(address[0])
+            self._log_download(request, response, address, sent, time.monotonic() - started,
+                               completed, paced)
+        return completed
+    
+    def _start_lure(self, ip: str) -> bool:
+        """¿Cabe otra descarga con ritmo (del servicio y de esta IP)? Si cabe, la cuenta"""
+        with self._lure_lock:
+            active = sum(self._lure_streams.values())
+            if (active >= config.LURE_MAX_STREAMS
+                    or self._lure_streams.get(ip, 0) >= config.LURE_MAX_STREAMS_PER_IP):
+                self.lure_counters['lure_capped'] += 1
+                return False
+            self._lure_streams[ip] = self._lure_streams.get(ip, 0) + 1
+            self.lure_counters['lure_streams'] += 1
+            return True
+    
+    def _end_lure(self, ip: str) -> None:
+        """Libera el hueco de una descarga con ritmo"""
+        with self._lure_lock:
+            remaining = self._lure_streams.get(ip, 0) - 1
+            if remaining > 0:
+                self._lure_streams[ip] = remaining
+            else:
+                self._lure_streams.pop(ip, None)
+    
+    def _log_download(self, request: HTTPRequest, response: PreparedResponse, address: tuple,
+                      sent: int, seconds: float, completed: bool, paced: bool = True) -> None:
+        """Registro de una descarga de fichero señuelo: cuánto, cuánto tiempo y si acabó"""
+        HoneypotLogger.log_connection(
+            service='HTTP',
+            ip=address[0],
+            port=address[1],
+            data=f"Lure download: {request.target}",
+            extra={
+                'lure_path': request.target,
+                'status': response.status,
+                'range': f"{response.start}-{response.end}/{response.size}",
+                'bytes_sent': sent,
+                'bytes_expected': response.end - response.start + 1,
+                'seconds': round(seconds, 1),
+                'completed': completed,
+                'capped': not paced,   # Cortada por el tope de descargas simultáneas
+            }
+        )
+    
+    def get_stats(self) -> dict:
+        """Contadores de admisión + revalidaciones (condicionales y 304) + handshakes TLS"""
+        with self._cache_lock:
+            stats = {**super().get_stats(), **self.cache_counters, **self.lure_counters}
+            if self.tls_context is not None:
+                stats.update(self.tls_counters)
+        if config.UPLOAD_CAPTURE_ENABLED:
+            stats['uploads'] = UploadStore.default().stats()
+        stats['rules'] = rule_stats('http')
+        stats['tracker'] = BehaviorTracker.default().stats()
+        stats['fingerprints'] = fingerprint_stats()
+        return stats
+    
+    def _process_bad_request(self, reader: HTTPRequestReader, error: HTTPRequestError, address: tuple) -> PreparedResponse:
+        """
+        Petición que no se pudo leer entera. Un escáner que manda basura o un
+        Slowloris también son información: se analiza y registra lo que llegó.
+        """
+        data = reader.partial().decode('utf-8', errors='ignore')
+        HoneypotLogger.log_connection(
+            service='HTTP',
+            ip=address[0],
+            port=address[1],
+            data=data[:config.LOG_DATA_MAX_LENGTH],
+            extra={
+                'error': error.reason,
+                'status': error.status,
+                'attacks_detected': HTTPAttackDetector.detect(data)
+            }
+        )
+        return HTTPEndpoints.get_error_response(error.status)
+
+    # RECARGA EN CALIENTE (SIGHUP o POST /api/reload).
+    # Vuelve a leer las personas, profiles.json y rules.json y cambia las tablas de
+    # rutas y las reglas de detección de golpe.
+    # Las conexiones abiertas NO se cortan: la petición en curso acaba con la tabla vieja.
+    def reload(self) -> dict:
+        """Recarga endpoints y reglas de este proceso. Devuelve {perfil: número de rutas, 'rules': {...}}"""
+        rules = reload_rules()        # Primero: un rules.json con errores no cambia nada
+        return {**HTTPEndpoints.reload(), 'rules': rules}
+
+
+# Versión asyncio del mismo servicio.
+# Hereda TODA la lógica HTTP de HTTPService (_process_request, _process_bad_request)
+# y el bucle de eventos de AsyncBaseService. Solo cambia cómo se lee y se escribe.
+# ORDEN de herencia: HTTPService primero para que su __init__ (puerto, host) se use.
+class AsyncHTTPService(HTTPService, AsyncBaseService):
+    """Servicio Web sobre asyncio: una corrutina por visitante en lugar de un hilo"""
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            address: tuple) -> None:
+        """Misma conversación HTTP que HTTPService.handle_client, pero sin bloquear"""
+        if self.tls_context is not None:
+            # El event loop ya terminó el handshake antes de llamarnos
+            self._count_handshake(writer.get_extra_info('ssl_object').session_reused)
+        request_reader = HTTPRequestReader(capture=capture_factory())
+        served = 0
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    idle_timeout = config.HTTP_KEEPALIVE_TIMEOUT if served else config.SOCKET_TIMEOUT
+                    request = await self._read_request_async(reader, request_reader, idle_timeout)
+                    if request is None:
+                        return
+                    served += 1
+                    client = _forwarded_address(request, address)
+                    # Detección + log (con geolocalización por red) son bloqueantes: al pool acotado.
+                    response = await self.run_blocking(self._process_request, request, client, served)
+                    keep_alive = _keeps_alive(request, response, served)
+                    buffers = _response_buffers(request, response, keep_alive, served)
+                    stream = _body_stream(request, response)
+                except HTTPRequestError as error:
+                    response = await self.run_blocking(self._process_bad_request, request_reader, error, address)
+                    buffers = response.buffers(keep_alive=False)
+                    stream = None
                 
-        return method, path, headers, body
+                # Las respuestas salen en el mismo orden que llegaron las peticiones
+                writer.writelines(buffers)
+                await writer.drain()
+                if stream is not None and not await self._send_stream_async(writer, request, stream, client):
+                    return
+                if not keep_alive:
+                    return
+        except Exception as e:
+            print(f"[!] Error en HTTP handler (asyncio): {e}")
+        finally:
+            request_reader.close()
+    
+    async def _send_stream_async(self, writer: asyncio.StreamWriter, request: HTTPRequest,
+                                 response: PreparedResponse, address: tuple) -> bool:
+        """Igual que _send_stream: drain() espera a que el cliente lea, sleep() marca el ritmo"""
+        sent = 0
+        started = time.monotonic()
+        completed = False
+        paced = self._start_lure(address[0])
+        try:
+            for chunk in response.chunks():
+                writer.write(chunk)
+                await writer.drain()
+                sent += len(chunk)
+                if not paced:
+                    break
+                delay = _pace(sent, started)
+                if delay is None:
+                    break
+                if delay:
+                    await asyncio.sleep(delay)
+            else:
+                completed = True
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if paced:
+                self._end_lure(address[0])
+            await self.run_blocking(self._log_download, request, response, address,
+                                    sent, time.monotonic() - started, completed, paced)
+        return completed
+    
+    async def _read_request_async(self, reader: asyncio.StreamReader, request_reader: HTTPRequestReader,
+                                  idle_timeout: float = None):
+        """Igual que _read_request, pero esperando los datos sin bloquear el event loop"""
+        while True:
+            request = request_reader.next_request()
+            if request is not None:
+                return request
+            
+            try:
+                chunk = await asyncio.wait_for(
+                    reader.read(config.BUFFER_SIZE),
+                    _read_timeout(request_reader, idle_timeout)
+                )
+            except asyncio.TimeoutError:
+                chunk = None
+            
+            if not chunk:
+                if not request_reader.has_partial():
+                    return None  # Cliente que no (volvió a) hablar: cerramos sin más
+                if chunk is None:
+                    raise HTTPRequestError("408 Request Timeout", "el cliente dejó de enviar datos")
+                raise HTTPRequestError("400 Bad Request", "conexión cerrada a mitad de la petición")
+            request_reader.feed(chunk)
+
+
+def _read_timeout(reader: HTTPRequestReader, idle_timeout: float = None) -> float:
+    """
+    Cuánto esperar al siguiente trozo: el plazo que le queda a la petición en curso
+    o, si aún no empezó ninguna, el tiempo de inactividad permitido.
+    """
+    time_left = reader.time_left()
+    if time_left is None:
+        time_left = idle_timeout or config.SOCKET_TIMEOUT
+    return min(time_left, config.SOCKET_TIMEOUT)
+
+
+def _forwarded_address(request: HTTPRequest, address: tuple) -> tuple:
+    """
+    (ip, puerto) del cliente real. Solo si la conexión viene de un proxy de
+    confianza (TRUSTED_PROXIES) se cree su X-Forwarded-For; a cualquier otro
+    se le ignora (un atacante puede mandar la cabecera que quiera).
+    """
+    if not is_trusted_proxy(address[0]):
+        return address
+    forwarded_for = request.get_header('X-Forwarded-For')
+    client_ip = forwarded_client(forwarded_for) if forwarded_for else None
+    return (client_ip, address[1]) if client_ip else address
+
+
+# Campo de contraseña en un formulario o JSON: password=..., "passwd": ..., user_pwd=...
+_PASSWORD_FIELD = re.compile(r'(?<![a-z])(?:pass(?:word|wd)?|pwd)\w*["\']?\s*[=:]', re.IGNORECASE)
+
+
+def _is_login_attempt(request: HTTPRequest, body: str) -> bool:
+    """¿Trae credenciales? Cabecera Authorization (Basic, Bearer...) o un POST con contraseña"""
+    if request.get_header('Authorization') is not None:
+        return True
+    return request.method.upper() == 'POST' and _PASSWORD_FIELD.search(body[:4096]) is not None
+
+
+def _keeps_alive(request: HTTPRequest, response: PreparedResponse, served: int) -> bool:
+    """¿Seguimos con la conexión abierta tras esta respuesta?"""
+    return (request.keep_alive
+            and not response.close     # Personas que siempre cuelgan (ej: router TP-Link)
+            and served < config.HTTP_KEEPALIVE_MAX_REQUESTS)
+
+
+def _response_buffers(request: HTTPRequest, response: PreparedResponse, keep_alive: bool, served: int) -> list:
+    """
+    Trozos (bytes) a enviar. Con keep-alive el cliente solo sabe dónde acaba cada
+    respuesta por su Content-Length (ya calculado al preparar), y la cabecera
+    Connection dice la verdad: 'keep-alive' (con timeout/max, como Apache) o 'close'.
+    A un HEAD se le mandan las mismas cabeceras pero sin cuerpo.
+    """
+    return response.buffers(
+        keep_alive,
+        timeout=config.HTTP_KEEPALIVE_TIMEOUT,
+        remaining=config.HTTP_KEEPALIVE_MAX_REQUESTS - served,
+        include_body=request.method.upper() != 'HEAD'
+    )
+
+
+def _body_stream(request: HTTPRequest, response: PreparedResponse):
+    """La respuesta, si su cuerpo se envía por trozos aparte (fichero señuelo y no es HEAD)"""
+    if response.streamed and request.method.upper() != 'HEAD':
+        return response
+    return None
+
+
+def _pace(sent: int, started: float):
+    """
+    Segundos a esperar antes del siguiente trozo para no pasar de LURE_RATE bytes/s.
+    None = la descarga ya duró LURE_MAX_SECONDS y hay que cortarla.
+    """
+    elapsed = time.monotonic() - started
+    if elapsed > config.LURE_MAX_SECONDS:
+        return None
+    if not config.LURE_RATE:
+        return 0
+    return max(0.0, sent / config.LURE_RATE - elapsed)
+
+
+def _send_buffers(client_socket: socket.socket, buffers: list) -> None:
+    """
+    Envía varios trozos como si fueran uno, SIN concatenarlos (sendmsg = writev).
+    Mandarlos con varios send() seguidos activaría el algoritmo de Nagle y el
+    cuerpo podría esperar al ACK de las cabeceras (~40 ms de retraso).
+    """
+    if isinstance(client_socket, ssl.SSLSocket) or not hasattr(client_socket, 'sendmsg'):
+        # TLS (cifra lo que le demos: no hay sendmsg) o Windows: un solo sendall
+        client_socket.sendall(buffers[0] if len(buffers) == 1 else b''.join(buffers))
+        return
+    views = [memoryview(buffer) for buffer in buffers if buffer]
+    while views:
+        sent = client_socket.sendmsg(views)
+        # sendmsg puede enviar solo una parte: descartamos lo ya enviado
+        while sent:
+            if sent >= len(views[0]):
+                sent -= len(views[0])
+                views.pop(0)
+            else:
+                views[0] = views[0][sent:]
+                sent = 0
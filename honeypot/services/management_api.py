@@ -17,6 +17,9 @@ class ManagementHandler(http.server.SimpleHTTPRequestHandler):
         if path == "/api/status":
             self.send_json({"status": "active", "module": "ManagementAPI"})
             
+        elif path == "/api/stats":
+            self.handle_stats()
+            
         elif path == "/logs/list":
             self.handle_list_logs()
             
@@ -26,12 +29,42 @@ class ManagementHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self.send_error(404, "Not Found")
             
-    def send_json(self, data):
-        self.send_response(200)
+    def do_POST(self):
+        if urlparse(self.path).path == "/api/reload":
+            self.handle_reload()
+        else:
+            self.send_error(404, "Not Found")
+            
+    def send_json(self, data, status=200):
+        self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.end_headers()
         self.wfile.write(json.dumps(data, indent=4).encode())
         
+    def handle_stats(self):
+        """Admission counters (active, queued, shed, tarpitted) for every service"""
+        services = getattr(self.server, 'services', None) or []
+        stats = {s.service_name: s.get_stats() for s in services if hasattr(s, 'get_stats')}
+        # Supervised mode: services live in other processes, their health pings
+        # (pid, restarts, counters) arrive through the supervisor's status dict.
+        status = getattr(self.server, 'status', None)
+        if status is not None:
+            stats['processes'] = dict(status)
+        self.send_json(stats)
+        
+    def handle_reload(self):
+        """Hot-reloads endpoint profiles and profiles.json (same as SIGHUP)"""
+        reload = getattr(self.server, 'reload', None)
+        if reload is None:
+            self.send_error(501, "Reload not available")
+            return
+        try:
+            result = reload()
+        except Exception as e:
+            self.send_json({"status": "error", "error": str(e)}, status=500)
+            return
+        self.send_json({"status": "reloaded", "result": result})
+        
     def handle_list_logs(self):
         """Lists available log dates and files"""
         bg_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
@@ -76,16 +109,26 @@ class ManagementHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
 
+class _ReusableTCPServer(socketserver.TCPServer):
+    # Lets a restarted management process bind again while the old socket is in TIME_WAIT
+    allow_reuse_address = True
+
 class ManagementServer:
-    def __init__(self, port=5000):
+    def __init__(self, port=5000, services=None, status=None, reload=None):
         self.port = port
+        self.services = services if services is not None else []
+        self.status = status
+        self.reload_callback = reload  # Callable behind POST /api/reload (None = disabled)
         self.httpd = None
         self.thread = None
         self.running = False
         
     def start(self):
         self.running = True
-        self.httpd = socketserver.TCPServer(("127.0.0.1", self.port), ManagementHandler)
+        self.httpd = _ReusableTCPServer(("127.0.0.1", self.port), ManagementHandler)
+        self.httpd.services = self.services  # Handlers read it via self.server.services
+        self.httpd.status = self.status
+        self.httpd.reload = self.reload_callback
         self.thread = threading.Thread(target=self.httpd.serve_forever)
         self.thread.daemon = True
         self.thread.start()
@@ -0,0 +1,280 @@
+"""
+Protocol-sniffing port multiplexer.
+One accept loop for many ports: each connection is classified from its first
+bytes (HTTP, TLS, SSH, RTSP) and handed to the existing service handler.
+"""
+
+import socket
+import selectors
+import threading
+import time
+
+from .base import BaseService
+from .http_service import HTTPService
+from .ssh_service import SSHService, paramiko
+from .rtsp_service import RTSPService
+from core.logger import HoneypotLogger
+import config
+
+
+# Métodos con los que empieza una petición de texto (HTTP, WebDAV, RTSP)
+_REQUEST_METHODS = (
+    b'GET ', b'POST ', b'HEAD ', b'PUT ', b'DELETE ', b'OPTIONS ', b'PATCH ', b'TRACE ',
+    b'CONNECT ', b'PROPFIND ', b'DESCRIBE ', b'SETUP ', b'PLAY ', b'PAUSE ', b'TEARDOWN ',
+    b'ANNOUNCE ', b'RECORD ', b'GET_PARAMETER ', b'SET_PARAMETER ',
+)
+# Métodos que SOLO existen en RTSP (OPTIONS también, pero lo comparte con HTTP)
+_RTSP_ONLY_METHODS = (
+    b'DESCRIBE ', b'SETUP ', b'PLAY ', b'PAUSE ', b'TEARDOWN ', b'ANNOUNCE ', b'RECORD ',
+)
+
+
+def sniff_protocol(first_bytes: bytes) -> str:
+    """
+    Clasifica una conexión por sus primeros bytes (sin consumirlos).
+
+    Returns:
+        'ssh', 'tls', 'rtsp', 'http' o 'unknown'
+    """
+    if first_bytes.startswith(b'SSH-'):
+        return 'ssh'
+    # Registro TLS de tipo handshake (0x16) con versión 3.x: un ClientHello
+    if len(first_bytes) >= 2 and first_bytes[0] == 0x16 and first_bytes[1] == 0x03:
+        return 'tls'
+    if first_bytes.startswith(_REQUEST_METHODS):
+        request_line = first_bytes.split(b'\r\n', 1)[0]
+        if (first_bytes.startswith(_RTSP_ONLY_METHODS)
+                or b' RTSP/' in request_line or b' rtsp://' in request_line):
+            return 'rtsp'
+        return 'http'
+    return 'unknown'
+
+
+# Primeros bytes de todo lo que sniff_protocol sabe reconocer
+_SIGNATURES = (b'SSH-', b'\x16\x03') + _REQUEST_METHODS
+
+
+def needs_more_bytes(first_bytes: bytes) -> bool:
+    """
+    ¿Hay que esperar más bytes antes de clasificar? Un primer segmento puede
+    llegar partido (b'G', b'\x16', b'SS'): mientras sea el principio de una
+    firma conocida, o una petición sin su línea completa (HTTP y RTSP se
+    distinguen por ella), todavía no se puede decidir.
+    """
+    if len(first_bytes) >= config.MUX_PEEK_BYTES:
+        return False
+    if any(len(signature) > len(first_bytes) and signature.startswith(first_bytes)
+           for signature in _SIGNATURES):
+        return True
+    return first_bytes.startswith(_REQUEST_METHODS) and b'\n' not in first_bytes
+
+
+def parse_ports(spec: str) -> list:
+    """'2323,8000-8002' → [2323, 8000, 8001, 8002] (sin repetidos, en orden)"""
+    ports = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        for port in range(int(first), int(last or first) + 1):
+            if port not in ports:
+                ports.append(port)
+    return ports
+
+
+# El "recepcionista" de muchos puertos.
+# Hereda de BaseService el portero (admisión) y el pool de trabajadores; solo
+# cambia cómo se aceptan las conexiones (muchos sockets, UN bucle) y a quién
+# se le pasa cada una.
+class MuxService(BaseService):
+    """Un solo bucle de accept para muchos puertos; cada conexión va a su protocolo"""
+
+    def __init__(self, host: str = None, ports: list = None):
+        """Crea los handlers (sin arrancarlos: no escuchan, solo atienden lo que les pasemos)"""
+        super().__init__(host or config.HTTP_HOST, None, "Port Mux")
+        self.ports = ports or parse_ports(config.MUX_PORTS)
+        self.listeners = []
+        self.bound_ports = []         # Los puertos que sí se pudieron abrir
+        self._selector = None
+
+        # Los servicios de siempre, usados solo por su handle_client (versión con hilos:
+        # Paramiko ya es de hilos, y así todos comparten el pool de trabajadores)
+        self.handlers = {'http': HTTPService(), 'rtsp': RTSPService()}
+        if paramiko is not None:
+            self.handlers['ssh'] = SSHService()
+        try:
+            self.handlers['tls'] = HTTPService(use_tls=True)
+        except RuntimeError as e:
+            print(f"[!] Port Mux: HTTPS desactivado ({e})")
+
+        # Cuántas conexiones de cada protocolo: qué se prueba en puertos "raros"
+        self._counters_lock = threading.Lock()
+        self.protocol_counters = dict.fromkeys(('http', 'tls', 'ssh', 'rtsp', 'unknown', 'silent'), 0)
+
+    def start(self) -> None:
+        """Abre un socket por puerto y los atiende TODOS desde este hilo"""
+        self._selector = selectors.DefaultSelector()
+        for port in self.ports:
+            try:
+                listener = self._listen(port)
+            except OSError as e:
+                # Un puerto ocupado (o < 1024 sin permisos) no tumba a los demás
+                print(f"[!] Port Mux: no se pudo abrir el puerto {port}: {e}")
+                continue
+            self.listeners.append(listener)
+            self.bound_ports.append(port)
+            self._selector.register(listener, selectors.EVENT_READ)
+
+        if not self.listeners:
+            print("[!] Port Mux: ningún puerto disponible")
+            return
+
+        self.running = True
+        self._start_workers()
+        print(f"[*] {self.service_name} escuchando en {self.host}: {len(self.listeners)} puertos")
+
+        try:
+            # UN solo bucle: select() nos dice qué sockets tienen llamadas esperando.
+            # Aquí solo se acepta y se reparte; olfatear el protocolo es cosa de los
+            # trabajadores (un cliente que no dice nada no frena a los demás).
+            while self.running:
+                for key, _ in self._selector.select(timeout=1):
+                    try:
+                        client_socket, address = key.fileobj.accept()
+                    except (BlockingIOError, InterruptedError):
+                        continue  # Otro proceso (SO_REUSEPORT) se la llevó antes
+                    except OSError as e:
+                        if self.running:
+                            print(f"[!] {self.service_name} error al aceptar conexión: {e}")
+                        continue
+                    client_socket.setblocking(True)
+                    self._dispatch(client_socket, address)
+        except Exception as e:
+            if self.running:
+                print(f"[!] {self.service_name} error crítico: {e}")
+        finally:
+            self.stop()
+
+    def _listen(self, port: int) -> socket.socket:
+        """Socket de escucha no bloqueante (mismas opciones que BaseService.start)"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if config.SOCKET_REUSEPORT:
+                listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            listener.bind((self.host, port))
+            listener.listen(config.SOCKET_BACKLOG)
+            listener.setblocking(False)
+        except OSError:
+            listener.close()
+            raise
+        return listener
+
+    def handle_client(self, client_socket: socket.socket, address: tuple) -> None:
+        """
+        Mira los primeros bytes SIN consumirlos (MSG_PEEK, ver _peek) y pasa la
+        conexión al handler del protocolo, que la lee desde el principio como
+        siempre.
+        """
+        try:
+            first_bytes = self._peek(client_socket)
+            protocol = sniff_protocol(first_bytes) if first_bytes else None
+        except socket.timeout:
+            # Silencio: los clientes SSH esperan a que el servidor hable primero
+            protocol = 'ssh' if 'ssh' in self.handlers else 'silent'
+            first_bytes = b''
+        except OSError:
+            protocol = None
+
+        if protocol is None:  # Conectó y colgó sin decir nada
+            client_socket.close()
+            return
+        self._count(protocol)
+
+        handler = self.handlers.get(protocol)
+        if handler is None:
+            self._log_unknown(client_socket, address, protocol, first_bytes)
+            return
+        client_socket.settimeout(None)  # Cada handler pone sus propios plazos
+        handler.handle_client(client_socket, address)
+
+    def _peek(self, client_socket: socket.socket) -> bytes:
+        """
+        Primeros bytes SIN consumirlos, esperando (dentro de MUX_BANNER_TIMEOUT)
+        a que llegue lo bastante para clasificar. Entre un vistazo y el
+        siguiente SO_RCVLOWAT hace que recv() se bloquee hasta que haya algún
+        byte NUEVO (MSG_PEEK solo, con datos en cola, volvería al instante).
+
+        Returns:
+            Los bytes vistos (b'' si el cliente cerró sin mandar nada)
+
+        Raises:
+            socket.timeout: No llegó ni un byte a tiempo
+        """
+        deadline = time.monotonic() + config.MUX_BANNER_TIMEOUT
+        client_socket.settimeout(config.MUX_BANNER_TIMEOUT)
+        first_bytes = client_socket.recv(config.MUX_PEEK_BYTES, socket.MSG_PEEK)
+        try:
+            while first_bytes and needs_more_bytes(first_bytes):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                client_socket.settimeout(remaining)
+                client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, len(first_bytes) + 1)
+                try:
+                    peeked = client_socket.recv(config.MUX_PEEK_BYTES, socket.MSG_PEEK)
+                except socket.timeout:
+                    break  # Se clasifica con lo que haya llegado
+                if len(peeked) <= len(first_bytes):
+                    break  # Cerró su mitad de la conexión: no va a llegar más
+                first_bytes = peeked
+        finally:
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVLOWAT, 1)
+        return first_bytes
+
+    def _log_unknown(self, client_socket: socket.socket, address: tuple,
+                     protocol: str, first_bytes: bytes) -> None:
+        """Protocolo que no sabemos atender: se registra lo que mandó y se cuelga"""
+        try:
+            local_port = client_socket.getsockname()[1]
+        except OSError:
+            local_port = None
+        client_socket.close()
+        HoneypotLogger.log_connection(
+            service='MUX',
+            ip=address[0],
+            port=address[1],
+            data=first_bytes.decode('latin-1')[:config.LOG_DATA_MAX_LENGTH],
+            extra={
+                'protocol': protocol,
+                'local_port': local_port,
+                'first_bytes_hex': first_bytes[:64].hex(),
+            }
+        )
+
+    def _count(self, protocol: str) -> None:
+        """Suma una conexión al contador de su protocolo"""
+        with self._counters_lock:
+            self.protocol_counters[protocol] += 1
+
+    def get_stats(self) -> dict:
+        """Contadores de admisión + conexiones por protocolo detectado"""
+        stats = super().get_stats()
+        stats['ports'] = self.bound_ports
+        with self._counters_lock:
+            stats.update(self.protocol_counters)
+        return stats
+
+    def reload(self) -> dict:
+        """Las rutas HTTP son las de HTTPEndpoints: se recargan igual que en HTTPService"""
+        return self.handlers['http'].reload()
+
+    def stop(self) -> None:
+        """Cierra TODOS los sockets de escucha (y apaga los trabajadores)"""
+        super().stop()
+        for listener in self.listeners:
+            try:
+                listener.close()
+            except OSError:
+                pass
@@ -0,0 +1,212 @@
+"""
+PROXY protocol (v1 text and v2 binary) and trusted-proxy helpers.
+Behind a TCP load balancer every connection comes from the balancer; the
+PROXY header it sends first carries the real client address.
+"""
+
+import ipaddress
+import socket
+import struct
+import time
+import asyncio
+from functools import lru_cache
+from typing import Optional
+
+import config
+
+
+# Firma de 12 bytes con la que empieza TODA cabecera v2
+V2_SIGNATURE = b"\r\n\r\n\x00\r\nQUIT\n"
+# Una línea v1 mide como mucho 107 bytes (con el \r\n final)
+V1_MAX_LENGTH = 107
+
+
+class ProxyProtocolError(Exception):
+    """Cabecera PROXY ausente o mal formada en una conexión de un proxy de confianza"""
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PROXIES DE CONFIANZA (TRUSTED_PROXIES en config.py)
+# ═══════════════════════════════════════════════════════════════════════════
+
+@lru_cache(maxsize=1)
+def _trusted_networks(spec: str) -> tuple:
+    """'10.0.0.0/8, 127.0.0.1' → redes ipaddress (se parsea una vez por valor)"""
+    return tuple(ipaddress.ip_network(cidr.strip(), strict=False)
+                 for cidr in spec.split(',') if cidr.strip())
+
+
+@lru_cache(maxsize=1024)
+def _in_trusted(ip: str, spec: str) -> bool:
+    """¿Está 'ip' en alguna de las redes de 'spec'? (cacheado: pocas IPs de proxy)"""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks(spec))
+
+
+def is_trusted_proxy(ip: str) -> bool:
+    """¿Viene la conexión de uno de nuestros balanceadores / proxies?"""
+    return bool(config.TRUSTED_PROXIES) and _in_trusted(ip, config.TRUSTED_PROXIES)
+
+
+def forwarded_client(forwarded_for: str) -> Optional[str]:
+    """
+    IP real del cliente según X-Forwarded-For ("cliente, proxy1, proxy2").
+    Se lee de DERECHA a IZQUIERDA saltando nuestros proxies: lo que hay a la
+    izquierda del primer salto desconocido lo escribió el propio cliente (y
+    un atacante puede poner ahí lo que quiera).
+    """
+    hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            try:
+                return str(ipaddress.ip_address(hop))
+            except ValueError:
+                return None  # Basura en la cabecera: nos quedamos con el peer
+    return hops[0] if hops else None
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PARSEO DE LA CABECERA
+# ═══════════════════════════════════════════════════════════════════════════
+
+def parse_v1(line: bytes) -> Optional[tuple]:
+    """
+    "PROXY TCP4 203.0.113.7 10.0.0.5 51234 8080\\r\\n" → ('203.0.113.7', 51234)
+    "PROXY UNKNOWN ..." → None (el balanceador no sabe el origen: health checks)
+    """
+    if not line.startswith(b'PROXY ') or not line.endswith(b'\r\n') or len(line) > V1_MAX_LENGTH:
+        raise ProxyProtocolError("cabecera v1 mal formada")
+    parts = line[:-2].decode('ascii', errors='replace').split(' ')
+    if parts[1] == 'UNKNOWN':
+        return None
+    if len(parts) != 6 or parts[1] not in ('TCP4', 'TCP6'):
+        raise ProxyProtocolError("cabecera v1 mal formada")
+    version = 4 if parts[1] == 'TCP4' else 6
+    try:
+        source = ipaddress.ip_address(parts[2])
+        destination = ipaddress.ip_address(parts[3])
+    except ValueError:
+        raise ProxyProtocolError("dirección inválida en la cabecera v1")
+    if source.version != version or destination.version != version:
+        raise ProxyProtocolError(f"dirección que no es de la familia {parts[1]}")
+    port = _v1_port(parts[4])
+    _v1_port(parts[5])
+    return str(source), port
+
+
+def _v1_port(text: str) -> int:
+    """Puerto de una cabecera v1: solo dígitos, de 0 a 65535 ('-1', '+80', '99999' → error)"""
+    if not (text.isascii() and text.isdigit()) or int(text) > 65535:
+        raise ProxyProtocolError(f"puerto inválido en la cabecera v1: {text[:8]!r}")
+    return int(text)
+
+
+def parse_v2(header: bytes, body: bytes) -> Optional[tuple]:
+    """
+    Cabecera binaria: firma (12) + versión/comando (1) + familia (1) + longitud (2)
+    + direcciones. LOCAL (health check) o familias que no son TCP → None.
+    """
+    if header[:12] != V2_SIGNATURE or header[12] >> 4 != 2:
+        raise ProxyProtocolError("cabecera v2 mal formada")
+    command, family = header[12] & 0x0F, header[13]
+    if command == 0:          # LOCAL: conexión del propio balanceador
+        return None
+    if command != 1:
+        raise ProxyProtocolError("comando v2 desconocido")
+    if family == 0x11 and len(body) >= 12:      # TCP sobre IPv4
+        source, port = socket.inet_ntop(socket.AF_INET, body[:4]), struct.unpack('!H', body[8:10])[0]
+    elif family == 0x21 and len(body) >= 36:    # TCP sobre IPv6
+        source, port = socket.inet_ntop(socket.AF_INET6, body[:16]), struct.unpack('!H', body[32:34])[0]
+    else:
+        return None           # UDP, UNIX o sin especificar: nos quedamos con el peer
+    return source, port
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# LECTURA DESDE EL SOCKET (hilos, o asyncio con loop.sock_recv)
+# Se consume EXACTAMENTE la cabecera: lo que viene detrás (HTTP, TLS, SSH...)
+# se queda intacto para el handler del servicio.
+# ═══════════════════════════════════════════════════════════════════════════
+
+def read_header(client_socket: socket.socket) -> Optional[tuple]:
+    """Lee la cabecera PROXY de un socket bloqueante. Devuelve (ip, puerto) o None"""
+    client_socket.settimeout(config.PROXY_PROTOCOL_TIMEOUT)
+    try:
+        start = _recv_exactly(client_socket, 8)
+        if start.startswith(b'PROXY '):
+            # v1: byte a byte hasta el \r\n (como mucho ~100 recv). Con MSG_PEEK
+            # el bucle giraría sin parar mientras llega el resto de la línea.
+            line = start
+            deadline = time.monotonic() + config.PROXY_PROTOCOL_TIMEOUT
+            while not line.endswith(b'\r\n'):
+                if len(line) >= V1_MAX_LENGTH:
+                    raise ProxyProtocolError("cabecera v1 sin fin de línea")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout()
+                client_socket.settimeout(remaining)
+                line += _recv_exactly(client_socket, 1)
+            return parse_v1(line)
+        if V2_SIGNATURE.startswith(start):
+            header = start + _recv_exactly(client_socket, 8)
+            length = struct.unpack('!H', header[14:16])[0]
+            return parse_v2(header, _recv_exactly(client_socket, length))
+    except socket.timeout:
+        raise ProxyProtocolError("el proxy no envió la cabecera a tiempo")
+    raise ProxyProtocolError("la conexión no empieza por una cabecera PROXY")
+
+
+async def read_header_async(loop: asyncio.AbstractEventLoop, client_socket: socket.socket) -> Optional[tuple]:
+    """
+    Igual que read_header, con loop.sock_recv sobre el socket RECIÉN aceptado:
+    aún no hay StreamReader que guarde en su búfer lo que venga pegado detrás
+    de la cabecera (el ClientHello, en TLS, suele llegar en el mismo segmento)
+    """
+    try:
+        return await asyncio.wait_for(_read_header_async(loop, client_socket),
+                                      config.PROXY_PROTOCOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise ProxyProtocolError("el proxy no envió la cabecera a tiempo")
+
+
+async def _read_header_async(loop: asyncio.AbstractEventLoop, client_socket: socket.socket) -> Optional[tuple]:
+    """v1: byte a byte hasta el \\r\\n; v2: 16 bytes fijos + la longitud que declaran"""
+    start = await _sock_recv_exactly(loop, client_socket, 8)
+    if start.startswith(b'PROXY '):
+        line = start
+        while not line.endswith(b'\r\n'):
+            if len(line) >= V1_MAX_LENGTH:
+                raise ProxyProtocolError("cabecera v1 sin fin de línea")
+            line += await _sock_recv_exactly(loop, client_socket, 1)
+        return parse_v1(line)
+    if V2_SIGNATURE.startswith(start):
+        header = start + await _sock_recv_exactly(loop, client_socket, 8)
+        length = struct.unpack('!H', header[14:16])[0]
+        return parse_v2(header, await _sock_recv_exactly(loop, client_socket, length))
+    raise ProxyProtocolError("la conexión no empieza por una cabecera PROXY")
+
+
+async def _sock_recv_exactly(loop: asyncio.AbstractEventLoop, client_socket: socket.socket,
+                             size: int) -> bytes:
+    """Como _recv_exactly, sin bloquear el event loop"""
+    data = b''
+    while len(data) < size:
+        chunk = await loop.sock_recv(client_socket, size - len(data))
+        if not chunk:
+            raise ProxyProtocolError("conexión cerrada a mitad de la cabecera PROXY")
+        data += chunk
+    return data
+
+
+def _recv_exactly(client_socket: socket.socket, size: int) -> bytes:
+    """recv() hasta tener 'size' bytes (ni uno más)"""
+    data = b''
+    while len(data) < size:
+        chunk = client_socket.recv(size - len(data))
+        if not chunk:
+            raise ProxyProtocolError("conexión cerrada a mitad de la cabecera PROXY")
+        data += chunk
+    return data
@@ -4,9 +4,12 @@ Simulates a Real Time Streaming Protocol server (for IP Cameras).
 """
 
 import socket
+import asyncio
 import logging
 from .base import BaseService
+from .async_base import AsyncBaseService
 from core.logger import HoneypotLogger
+from detection.tracker import BehaviorTracker
 import config
 
 class RTSPService(BaseService):
@@ -30,52 +33,7 @@ class RTSPService(BaseService):
             if not data:
                 return
 
-            # Extraer método (OPTIONS, DESCRIBE, SETUP, PLAY)
-            first_line = data.split('\r\n')[0]
-            method = first_line.split(' ')[0] if ' ' in first_line else 'UNKNOWN'
-            
-            # 2. LOGGING
-            HoneypotLogger.log_connection(
-                service='RTSP',
-                ip=address[0],
-                port=address[1],
-                data=data[:config.LOG_DATA_MAX_LENGTH],
-                extra={'method': method, 'payload': data}
-            )
-            
-            # 3. RESPONDEMOS SIMULANDO TAPO C200
-            # Secuencia típica:
-            # Cliente: OPTIONS rtsp://...
-            # Servidor: 200 OK (Public: ...)
-            # Cliente: DESCRIBE rtsp://...
-            # Servidor: 401 Unauthorized (Digest realm="TP-Link...")
-            
-            cseq = "1"
-            # Intentar extraer CSeq del cliente para responder con el mismo
-            for line in data.split('\r\n'):
-                if line.startswith('CSeq:'):
-                    cseq = line.split(':')[1].strip()
-                    break
-
-            if method == 'OPTIONS':
-                # Respuesta a OPTIONS: "Hola, hablo RTSP"
-                response = (
-                    f"RTSP/1.0 200 OK\r\n"
-                    f"CSeq: {cseq}\r\n"
-                    f"Public: OPTIONS, DESCRIBE, SETUP, TEARDOWN, PLAY, PAUSE, GET_PARAMETER, SET_PARAMETER\r\n"
-                    f"\r\n"
-                )
-            else:
-                # A CUALQUIER OTRA COSA (DESCRIBE, SETUP...): "Identifícate"
-                # Simulamos la auth de TP-Link
-                response = (
-                    f"RTSP/1.0 401 Unauthorized\r\n"
-                    f"CSeq: {cseq}\r\n"
-                    f"WWW-Authenticate: Digest realm=\"IP Camera(A2497)\", nonce=\"5f9a6e12\", algorithm=\"MD5\"\r\n"
-                    f"WWW-Authenticate: Basic realm=\"IP Camera(A2497)\"\r\n"
-                    f"\r\n"
-                )
-            
+            response = self._process_request(data, address)
             client_socket.send(response.encode('utf-8'))
             
         except Exception as e:
@@ -85,3 +43,76 @@ class RTSPService(BaseService):
                 client_socket.close()
             except:
                 pass
+
+    def _process_request(self, data: str, address: tuple) -> str:
+        """Lógica RTSP independiente del transporte: registra y devuelve la respuesta"""
+        # Extraer método (OPTIONS, DESCRIBE, SETUP, PLAY)
+        first_line = data.split('\r\n')[0]
+        method = first_line.split(' ')[0] if ' ' in first_line else 'UNKNOWN'
+        
+        # 2. LOGGING
+        HoneypotLogger.log_connection(
+            service='RTSP',
+            ip=address[0],
+            port=address[1],
+            data=data[:config.LOG_DATA_MAX_LENGTH],
+            extra={'method': method, 'payload': data}
+        )
+        # Credenciales de la cámara: cada intento cuenta para el detector de fuerza bruta
+        if '\nauthorization:' in data.lower():
+            BehaviorTracker.default().record_auth('RTSP', address[0], address[1])
+        
+        # 3. RESPONDEMOS SIMULANDO TAPO C200
+        # Secuencia típica:
+        # Cliente: OPTIONS rtsp://...
+        # Servidor: 200 OK (Public: ...)
+        # Cliente: DESCRIBE rtsp://...
+        # Servidor: 401 Unauthorized (Digest realm="TP-Link...")
+        
+        cseq = "1"
+        # Intentar extraer CSeq del cliente para responder con el mismo
+        for line in data.split('\r\n'):
+            if line.startswith('CSeq:'):
+                cseq = line.split(':')[1].strip()
+                break
+
+        if method == 'OPTIONS':
+            # Respuesta a OPTIONS: "Hola, hablo RTSP"
+            response = (
+                f"RTSP/1.0 200 OK\r\n"
+                f"CSeq: {cseq}\r\n"
+                f"Public: OPTIONS, DESCRIBE, SETUP, TEARDOWN, PLAY, PAUSE, GET_PARAMETER, SET_PARAMETER\r\n"
+                f"\r\n"
+            )
+        else:
+            # A CUALQUIER OTRA COSA (DESCRIBE, SETUP...): "Identifícate"
+            # Simulamos la auth de TP-Link
+            response = (
+                f"RTSP/1.0 401 Unauthorized\r\n"
+                f"CSeq: {cseq}\r\n"
+                f"WWW-Authenticate: Digest realm=\"IP Camera(A2497)\", nonce=\"5f9a6e12\", algorithm=\"MD5\"\r\n"
+                f"WWW-Authenticate: Basic realm=\"IP Camera(A2497)\"\r\n"
+                f"\r\n"
+            )
+        
+        return response
+
+
+class AsyncRTSPService(RTSPService, AsyncBaseService):
+    """Servicio RTSP sobre asyncio (misma lógica que RTSPService)"""
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                            address: tuple) -> None:
+        """Handshake RTSP sin bloquear el event loop"""
+        try:
+            raw = await asyncio.wait_for(reader.read(config.BUFFER_SIZE), config.SOCKET_TIMEOUT)
+            if not raw:
+                return
+            data = raw.decode('utf-8', errors='ignore')
+            response = await self.run_blocking(self._process_request, data, address)
+            writer.write(response.encode('utf-8'))
+            await writer.drain()
+        except asyncio.TimeoutError:
+            pass
+        except Exception as e:
+            print(f"[!] Error en RTSP handler (asyncio): {e}")
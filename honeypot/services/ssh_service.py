@@ -14,6 +14,8 @@ except ImportError:
 from .base import BaseService
 from core.logger import HoneypotLogger
 from detection.ssh_attacks import SSHAttackDetector
+from detection.rules import reload_rules, rule_stats
+from detection.tracker import BehaviorTracker
 from responses.ssh_shell import FakeShell
 import config
 
@@ -183,6 +185,15 @@ class SSHService(BaseService):
                 break
         
         return command.strip()
+    
+    def get_stats(self) -> dict:
+        """Admission counters, per-rule hits of the command detector and the IP tracker"""
+        return {**super().get_stats(), 'rules': rule_stats('ssh'),
+                'tracker': BehaviorTracker.default().stats()}
+    
+    def reload(self) -> dict:
+        """Re-read the detection rules file (SIGHUP or POST /api/reload)"""
+        return {'rules': reload_rules()}
 
 
 if paramiko:
@@ -236,6 +247,8 @@ class SSHServerInterface(ServerInterface):
                 'type': 'auth_attempt'
             }
         )
+        # Attempts from the same IP over other connections (and services) add up
+        BehaviorTracker.default().record_auth('SSH', *self.client_address)
         
         # Accept after threshold attempts to seem realistic
         if self.auth_attempts >= config.SSH_AUTH_ATTEMPTS_THRESHOLD:
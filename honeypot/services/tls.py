@@ -0,0 +1,184 @@
+"""
+TLS support for the honeypot services (HTTPS personas).
+Self-signed persona certificates, generated once and cached on disk,
+and ONE shared SSLContext per process.
+"""
+
+import os
+import ssl
+import tempfile
+import datetime
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    fcntl = None          # Windows: sin workers hermanos con los que competir
+try:
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+except ImportError:
+    x509 = None
+
+import config
+
+
+# Un SSLContext por persona y proceso. Crearlo cuesta leer el certificado y la
+# clave de disco; reutilizarlo además comparte la caché de sesiones y la clave
+# de los tickets: un cliente que vuelve REANUDA la sesión (sin firma ni
+# intercambio de claves completo) en lugar de repetir el handshake entero.
+_contexts = {}
+_contexts_lock = threading.Lock()
+
+
+def server_context(persona: str = None) -> ssl.SSLContext:
+    """
+    Devuelve el SSLContext de servidor de la persona (por defecto el perfil activo).
+    La primera llamada carga o genera el certificado; las siguientes son un
+    acceso a diccionario.
+
+    Raises:
+        RuntimeError: Si no hay certificado en disco y no se puede generar
+                      (falta la librería cryptography).
+    """
+    persona = persona or config.HONEYPOT_PROFILE
+    context = _contexts.get(persona)
+    if context is not None:
+        return context
+    with _contexts_lock:
+        context = _contexts.get(persona)
+        if context is None:
+            cert_file, key_file = get_or_create_certificate(persona)
+            context = _contexts[persona] = _build_context(cert_file, key_file)
+    return context
+
+
+def get_or_create_certificate(persona: str) -> tuple:
+    """
+    Certificado autofirmado de la persona (como el 'snakeoil' de Apache o el
+    de fábrica de una cámara). Se genera en el primer arranque y se guarda en
+    TLS_CERT_DIR: siempre el mismo certificado, igual que un dispositivo real
+    (un certificado nuevo en cada reinicio delataría al honeypot).
+
+    Returns:
+        (ruta del certificado, ruta de la clave privada)
+    """
+    cert_file, key_file = _certificate_paths(config.TLS_CERT_DIR, persona)
+    if os.path.exists(cert_file) and os.path.exists(key_file):
+        return cert_file, key_file
+
+    if x509 is None:
+        raise RuntimeError("cryptography not installed and no certificate in " + config.TLS_CERT_DIR)
+
+    try:
+        os.makedirs(config.TLS_CERT_DIR, exist_ok=True)
+        with _generation_lock(config.TLS_CERT_DIR, persona):
+            # Los workers (--workers N) arrancan a la vez: solo uno genera, el
+            # resto espera al cerrojo y se queda con el par que ganó
+            if not (os.path.exists(cert_file) and os.path.exists(key_file)):
+                _write_pair(cert_file, key_file, *_generate_certificate(persona))
+    except OSError as e:
+        # Sin permisos: lo dejamos en un directorio temporal (vale solo para este
+        # arranque: en el siguiente el certificado cambiará)
+        print(f"[!] No se puede guardar el certificado en {config.TLS_CERT_DIR} ({e}); "
+              f"se usa uno temporal")
+        cert_file, key_file = _certificate_paths(tempfile.mkdtemp(prefix='honeypot-tls-'), persona)
+        _write_pair(cert_file, key_file, *_generate_certificate(persona))
+    return cert_file, key_file
+
+
+@contextmanager
+def _generation_lock(directory: str, persona: str):
+    """Cerrojo (flock) entre procesos sobre <dir>/.<persona>.lock; se suelta solo si el proceso muere"""
+    fd = os.open(os.path.join(directory, f".{persona}.lock"), os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)          # Cerrar el descriptor libera el flock
+
+
+def _certificate_paths(directory: str, persona: str) -> tuple:
+    """Rutas del certificado y la clave de una persona dentro de 'directory'"""
+    return (os.path.join(directory, f"{persona}.crt"),
+            os.path.join(directory, f"{persona}.key"))
+
+
+def _write_pair(cert_file: str, key_file: str, cert_pem: bytes, key_pem: bytes) -> None:
+    """
+    Escribe certificado y clave (la clave solo legible por nosotros: 0600).
+    Cada fichero se escribe entero en un temporal y se publica con os.replace:
+    nadie lee nunca un PEM a medias. La clave va primero; el par solo "existe"
+    (los dos ficheros) cuando ya está completo.
+    """
+    directory = os.path.dirname(cert_file)
+    for path, data in ((key_file, key_pem), (cert_file, cert_pem)):
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')   # mkstemp: 0600
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            if path == cert_file:
+                os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def _generate_certificate(persona: str) -> tuple:
+    """
+    Genera clave + certificado autofirmado con el sujeto de la persona
+    (TLS_CERT_SUBJECTS). Clave ECDSA P-256: firmar en cada handshake completo
+    cuesta una fracción de lo que cuesta con RSA 2048.
+
+    Returns:
+        (certificado PEM, clave privada PEM)
+    """
+    common_name, organization = config.TLS_CERT_SUBJECTS.get(
+        persona, config.TLS_CERT_SUBJECTS['default'])
+    attributes = [x509.NameAttribute(NameOID.COMMON_NAME, common_name)]
+    if organization:
+        attributes.append(x509.NameAttribute(NameOID.ORGANIZATION_NAME, organization))
+    subject = x509.Name(attributes)
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    # Emitido "hace tiempo" y válido 10 años, como el de fábrica de un equipo
+    not_before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=412)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)          # Autofirmado: emisor = sujeto
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(not_before)
+        .not_valid_after(not_before + datetime.timedelta(days=3650))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    return (
+        certificate.public_bytes(serialization.Encoding.PEM),
+        key.private_bytes(serialization.Encoding.PEM,
+                          serialization.PrivateFormat.TraditionalOpenSSL,
+                          serialization.NoEncryption()),
+    )
+
+
+def _build_context(cert_file: str, key_file: str) -> ssl.SSLContext:
+    """
+    SSLContext de servidor pensado para handshakes baratos:
+    - TLS 1.2+ (lo que acepta cualquier escáner actual)
+    - Tickets de sesión (TLS 1.2 y 1.3) y caché de sesiones del contexto:
+      las reconexiones se reanudan sin handshake completo
+    - ALPN http/1.1: nada de negociar HTTP/2, que no hablamos
+    """
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.load_cert_chain(cert_file, key_file)
+    context.options &= ~ssl.OP_NO_TICKET       # Tickets activados (por si la distro los quita)
+    context.options |= ssl.OP_NO_COMPRESSION
+    context.num_tickets = config.TLS_SESSION_TICKETS
+    context.set_alpn_protocols(['http/1.1'])
+    return context